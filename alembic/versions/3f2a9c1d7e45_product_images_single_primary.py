@@ -0,0 +1,44 @@
+"""product images: at most one primary per product
+
+Revision ID: 3f2a9c1d7e45
+Revises: c1edb345f74c
+Create Date: 2026-10-19 10:12:41.218504
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d7e45'
+down_revision: Union[str, None] = 'c1edb345f74c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # если после гонок остались лишние primary — оставляем первый по position/id
+    op.execute(
+        """
+        UPDATE product_images SET is_primary = false
+        WHERE is_primary AND id NOT IN (
+            SELECT DISTINCT ON (product_id) id
+            FROM product_images
+            WHERE is_primary
+            ORDER BY product_id, position, id
+        )
+        """
+    )
+    op.create_index(
+        'uq_product_images_primary',
+        'product_images',
+        ['product_id'],
+        unique=True,
+        postgresql_where=sa.text('is_primary'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_product_images_primary', table_name='product_images')
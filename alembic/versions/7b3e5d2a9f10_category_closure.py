@@ -0,0 +1,53 @@
+"""category closure table, products.category_id index
+
+Revision ID: 7b3e5d2a9f10
+Revises: 3f2a9c1d7e45
+Create Date: 2026-10-19 16:40:08.512377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e5d2a9f10'
+down_revision: Union[str, None] = '3f2a9c1d7e45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('category_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('ix_category_closure_descendant', 'category_closure', ['descendant_id', 'depth'], unique=False)
+    op.create_index('ix_products_category', 'products', ['category_id'], unique=False)
+
+    # заполняем замыкание по текущему дереву (глубина ограничена на случай цикла в данных)
+    op.execute(
+        """
+        INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE t(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM categories
+            UNION ALL
+            SELECT t.ancestor_id, c.id, t.depth + 1
+            FROM t JOIN categories c ON c.parent_id = t.descendant_id
+            WHERE t.depth < 64
+        )
+        SELECT ancestor_id, descendant_id, depth FROM t
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_category', table_name='products')
+    op.drop_index('ix_category_closure_descendant', table_name='category_closure')
+    op.drop_table('category_closure')
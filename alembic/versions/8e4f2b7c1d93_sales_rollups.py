@@ -0,0 +1,49 @@
+"""sales daily rollups and watermarks
+
+Revision ID: 8e4f2b7c1d93
+Revises: 5d1c8e4b2a67
+Create Date: 2026-10-19 21:07:15.284716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4f2b7c1d93'
+down_revision: Union[str, None] = '5d1c8e4b2a67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sales_daily',
+    sa.Column('dimension', sa.String(length=16), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('key_id', sa.Integer(), nullable=False),
+    sa.Column('units', sa.BigInteger(), nullable=False),
+    sa.Column('revenue_cents', sa.BigInteger(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dimension', 'day', 'key_id')
+    )
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('processed_until', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # инкрементальный прогон ищет изменённые заказы и пересчитывает их дни целиком;
+    # orders большая и под нагрузкой — CONCURRENTLY (без блокировки записи), вне транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_updated_at', 'orders', ['updated_at'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_orders_created_at', 'orders', ['created_at'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_created_at', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_orders_updated_at', table_name='orders', postgresql_concurrently=True)
+    op.drop_table('rollup_watermarks')
+    op.drop_table('sales_daily')
@@ -0,0 +1,33 @@
+"""payments: nullable provider_payment_id, unique per provider
+
+Revision ID: b6a3d9e51f08
+Revises: 8e4f2b7c1d93
+Create Date: 2026-10-19 23:41:52.118034
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6a3d9e51f08'
+down_revision: Union[str, None] = '8e4f2b7c1d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('payments', 'provider_payment_id',
+               existing_type=sa.String(),
+               nullable=True)
+    op.create_unique_constraint('uq_payments_provider_payment_id', 'payments', ['provider', 'provider_payment_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_payments_provider_payment_id', 'payments', type_='unique')
+    op.execute("DELETE FROM payments WHERE provider_payment_id IS NULL")
+    op.alter_column('payments', 'provider_payment_id',
+               existing_type=sa.String(),
+               nullable=False)
@@ -0,0 +1,84 @@
+"""orders archive tables, order history indexes
+
+Revision ID: d2a7c5e8f314
+Revises: b6a3d9e51f08
+Create Date: 2026-10-20 10:12:40.527391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7c5e8f314'
+down_revision: Union[str, None] = 'b6a3d9e51f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# типы уже созданы вместе с orders/payments
+order_status = postgresql.ENUM('NEW', 'CONFIRMED', 'CANCELED', name='order_status', create_type=False)
+payment_status = postgresql.ENUM('PENDING', 'PAID', 'FAILED', name='payment_status', create_type=False)
+
+
+def upgrade() -> None:
+    op.create_table('orders_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', order_status, nullable=False),
+    sa.Column('total_cents', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_orders_archive_user_created', 'orders_archive', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_archive_created_at', 'orders_archive', ['created_at'], unique=False)
+    op.create_table('order_items_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('price_cents', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_items_archive_order_id'), 'order_items_archive', ['order_id'], unique=False)
+    op.create_table('payments_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('amount_cents', sa.Integer(), nullable=False),
+    sa.Column('provider', sa.String(), nullable=False),
+    sa.Column('provider_payment_id', sa.String(), nullable=True),
+    sa.Column('status', payment_status, nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_payments_archive_order_id'), 'payments_archive', ['order_id'], unique=False)
+
+    # история пользователя / фильтр админки по статусу и поиск детей при архивации;
+    # таблицы большие и под нагрузкой — CONCURRENTLY (без блокировки записи), вне транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_user_created', 'orders', ['user_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_orders_status_created', 'orders', ['status', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_payments_order_id'), 'payments', ['order_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_payments_pending_order', 'payments', ['order_id'], unique=False, postgresql_where=sa.text("status = 'PENDING'"), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_payments_pending_order', table_name='payments', postgresql_where=sa.text("status = 'PENDING'"), postgresql_concurrently=True)
+        op.drop_index(op.f('ix_payments_order_id'), table_name='payments', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items', postgresql_concurrently=True)
+        op.drop_index('ix_orders_status_created', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_orders_user_created', table_name='orders', postgresql_concurrently=True)
+    op.drop_index(op.f('ix_payments_archive_order_id'), table_name='payments_archive')
+    op.drop_table('payments_archive')
+    op.drop_index(op.f('ix_order_items_archive_order_id'), table_name='order_items_archive')
+    op.drop_table('order_items_archive')
+    op.drop_index('ix_orders_archive_created_at', table_name='orders_archive')
+    op.drop_index('ix_orders_archive_user_created', table_name='orders_archive')
+    op.drop_table('orders_archive')
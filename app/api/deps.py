@@ -5,32 +5,43 @@ from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.db import get_db
+from app.db import get_read_db as get_read_db
 from app.models import User
 
 # ведущий слэш важен для корректной ссылки в OpenAPI
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    credentials_error = HTTPException(
+def _credentials_error() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def get_current_subject(token: str = Depends(oauth2_scheme)) -> str:
+    """`sub` из валидного JWT без похода в БД (для горячих чтений вроде корзины).
+
+    Блокировку пользователя не видит — для записей в БД используйте get_current_user.
+    """
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.jwt_algorithm])
-        email: str | None = payload.get("sub")
-        if email is None:
-            raise credentials_error
     except JWTError:
-        raise credentials_error
+        raise _credentials_error()
+    email: str | None = payload.get("sub")
+    if email is None:
+        raise _credentials_error()
+    return email
+
 
+def get_current_user(
+    email: str = Depends(get_current_subject),
+    db: Session = Depends(get_db),
+) -> User:
     user = db.query(User).filter(User.email == email).first()
     if not user or not user.is_active:
-        raise credentials_error
+        raise _credentials_error()
     return user
 
 
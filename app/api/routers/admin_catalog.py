@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import Boolean, Integer, String, column, delete, insert, select, update, values
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, require_superuser
-from app.core.cache import get_redis
-from app.models.catalog import Brand, Category, Inventory, Product, ProductImage
+from app.api.services.catalog import LISTING_FIELDS
+from app.api.services.events import catalog_changed
+from app.models.catalog import Brand, Category, CategoryClosure, Inventory, Product, ProductImage
 from app.schemas.catalog import (
     BrandCreate,
     BrandRead,
@@ -15,6 +17,7 @@ from app.schemas.catalog import (
     ProductCreate,
     ProductImageIn,
     ProductImageOut,
+    ProductImageSetItem,
     ProductRead,
     ProductUpdate,
 )
@@ -27,14 +30,14 @@ router = APIRouter(
 )
 
 
-def _invalidate_products_cache() -> None:
-    try:
-        r = get_redis()
-        if r:
-            for k in r.scan_iter(match="products:*"):
-                r.delete(k)
-    except Exception:
-        pass
+def _check_parent(db: Session, parent_id: int | None, cat_id: int | None = None) -> None:
+    if parent_id is None:
+        return
+    if not db.get(Category, parent_id):
+        raise HTTPException(status_code=400, detail="Parent category not found")
+    # (cat_id, parent_id) в замыкании — родитель внутри собственного поддерева (или сама категория)
+    if cat_id is not None and db.get(CategoryClosure, (cat_id, parent_id)):
+        raise HTTPException(status_code=400, detail="Category cannot be moved into its own subtree")
 
 
 # ------- Category -------
@@ -47,11 +50,12 @@ def _invalidate_products_cache() -> None:
     responses={201: {"description": "Created"}, 403: {"description": "Forbidden"}},
 )
 def create_category(payload: CategoryCreate, db: Session = Depends(get_db)) -> CategoryRead:
+    _check_parent(db, payload.parent_id)
     obj = Category(**payload.model_dump())
     db.add(obj)
+    catalog_changed(db, categories=True)
     db.commit()
     db.refresh(obj)
-    _invalidate_products_cache()
     return obj
 
 
@@ -71,12 +75,17 @@ def update_category(cat_id: int, payload: CategoryUpdate, db: Session = Depends(
     if not obj:
         raise HTTPException(status_code=404, detail="Not found")
 
-    for k, v in payload.model_dump(exclude_unset=True).items():
+    data = payload.model_dump(exclude_unset=True)
+    if "parent_id" in data:
+        _check_parent(db, data["parent_id"], cat_id)
+
+    # перенос поддерева в category_closure делает ORM-событие Category
+    for k, v in data.items():
         setattr(obj, k, v)
 
+    catalog_changed(db, categories=True)
     db.commit()
     db.refresh(obj)
-    _invalidate_products_cache()
     return obj
 
 
@@ -96,8 +105,8 @@ def delete_category(cat_id: int, db: Session = Depends(get_db)) -> None:
     if not obj:
         raise HTTPException(status_code=404, detail="Not found")
     db.delete(obj)
+    catalog_changed(db, categories=True)
     db.commit()
-    _invalidate_products_cache()
     return None
 
 
@@ -113,9 +122,9 @@ def delete_category(cat_id: int, db: Session = Depends(get_db)) -> None:
 def create_brand(payload: BrandCreate, db: Session = Depends(get_db)) -> BrandRead:
     obj = Brand(**payload.model_dump())
     db.add(obj)
+    catalog_changed(db, brands=True)
     db.commit()
     db.refresh(obj)
-    _invalidate_products_cache()
     return obj
 
 
@@ -138,9 +147,9 @@ def update_brand(brand_id: int, payload: BrandUpdate, db: Session = Depends(get_
     for k, v in payload.model_dump(exclude_unset=True).items():
         setattr(obj, k, v)
 
+    catalog_changed(db, brands=True)
     db.commit()
     db.refresh(obj)
-    _invalidate_products_cache()
     return obj
 
 
@@ -160,8 +169,8 @@ def delete_brand(brand_id: int, db: Session = Depends(get_db)) -> None:
     if not obj:
         raise HTTPException(status_code=404, detail="Not found")
     db.delete(obj)
+    catalog_changed(db, brands=True)
     db.commit()
-    _invalidate_products_cache()
     return None
 
 
@@ -177,9 +186,9 @@ def delete_brand(brand_id: int, db: Session = Depends(get_db)) -> None:
 def create_product(payload: ProductCreate, db: Session = Depends(get_db)) -> ProductRead:
     obj = Product(**payload.model_dump())
     db.add(obj)
+    catalog_changed(db)
     db.commit()
     db.refresh(obj)
-    _invalidate_products_cache()
     return obj
 
 
@@ -199,12 +208,15 @@ def update_product(prod_id: int, payload: ProductUpdate, db: Session = Depends(g
     if not obj:
         raise HTTPException(status_code=404, detail="Not found")
 
-    for k, v in payload.model_dump(exclude_unset=True).items():
+    data = payload.model_dump(exclude_unset=True)
+    # sku/slug не влияют на фильтры и порядок: сбрасываем только элементы этого товара
+    listings = any(getattr(obj, k) != v for k, v in data.items() if k in LISTING_FIELDS)
+    for k, v in data.items():
         setattr(obj, k, v)
 
+    catalog_changed(db, product_ids=[prod_id], listings=listings)
     db.commit()
     db.refresh(obj)
-    _invalidate_products_cache()
     return obj
 
 
@@ -224,8 +236,8 @@ def delete_product(prod_id: int, db: Session = Depends(get_db)) -> None:
     if not obj:
         raise HTTPException(status_code=404, detail="Not found")
     db.delete(obj)
+    catalog_changed(db, product_ids=[prod_id])
     db.commit()
-    _invalidate_products_cache()
     return None
 
 
@@ -259,12 +271,107 @@ def add_product_image(prod_id: int, data: ProductImageIn, db: Session = Depends(
         position=data.position,
     )
     db.add(img)
+    # Изображения есть только в карточке — листинги не трогаем
+    catalog_changed(db, product_ids=[prod_id], listings=False)
     db.commit()
     db.refresh(img)
-    _invalidate_products_cache()
     return img
 
 
+@router.put(
+    "/products/{prod_id}/images",
+    response_model=list[ProductImageOut],
+    summary="Replace Product Images",
+    description=(
+        "Заменить галерею товара целиком одной транзакцией: элементы с `id` обновляются "
+        "(порядок/primary/url), без `id` — добавляются, отсутствующие в списке — удаляются."
+    ),
+    responses={
+        200: {"description": "ok"},
+        400: {"description": "Invalid gallery"},
+        404: {"description": "Product not found"},
+        403: {"description": "Forbidden"},
+    },
+)
+def replace_product_images(
+    prod_id: int,
+    data: list[ProductImageSetItem],
+    db: Session = Depends(get_db),
+) -> list[ProductImageOut]:
+    product = db.get(Product, prod_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    if sum(1 for item in data if item.is_primary) > 1:
+        raise HTTPException(status_code=400, detail="Only one image can be primary")
+
+    keep_ids = [item.id for item in data if item.id is not None]
+    if len(keep_ids) != len(set(keep_ids)):
+        raise HTTPException(status_code=400, detail="Duplicate image ids")
+
+    existing_ids = set(db.scalars(select(ProductImage.id).where(ProductImage.product_id == prod_id)))
+    unknown = set(keep_ids) - existing_ids
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Images {sorted(unknown)} do not belong to product {prod_id}",
+        )
+
+    rows = [
+        {
+            "id": item.id,
+            "url": str(item.url),
+            "is_primary": item.is_primary,
+            "position": item.position if "position" in item.model_fields_set else idx,
+        }
+        for idx, item in enumerate(data)
+    ]
+    to_update = [row for row in rows if row["id"] is not None]
+    to_insert = [
+        {k: v for k, v in row.items() if k != "id"} | {"product_id": prod_id} for row in rows if row["id"] is None
+    ]
+
+    # 1) удаляем всё, чего нет в новой галерее
+    db.execute(
+        delete(ProductImage).where(
+            ProductImage.product_id == prod_id,
+            ProductImage.id.not_in(keep_ids),
+        )
+    )
+    # 2) снимаем текущий primary: уникальный частичный индекс проверяется построчно,
+    #    поэтому "обмен" primary внутри одного UPDATE мог бы упасть
+    db.execute(
+        update(ProductImage)
+        .where(ProductImage.product_id == prod_id, ProductImage.is_primary.is_(True))
+        .values(is_primary=False)
+    )
+    # 3) порядок/primary/url существующих — одним UPDATE ... FROM (VALUES ...)
+    if to_update:
+        v = values(
+            column("id", Integer),
+            column("url", String),
+            column("is_primary", Boolean),
+            column("position", Integer),
+            name="v",
+        ).data([(row["id"], row["url"], row["is_primary"], row["position"]) for row in to_update])
+        db.execute(
+            update(ProductImage)
+            .where(ProductImage.id == v.c.id)
+            .values(url=v.c.url, is_primary=v.c.is_primary, position=v.c.position)
+            .execution_options(synchronize_session=False)
+        )
+    # 4) новые — одним bulk INSERT
+    if to_insert:
+        db.execute(insert(ProductImage), to_insert)
+
+    catalog_changed(db, product_ids=[prod_id], listings=False)
+    db.commit()
+
+    return db.scalars(
+        select(ProductImage).where(ProductImage.product_id == prod_id).order_by(ProductImage.position, ProductImage.id)
+    ).all()
+
+
 @router.patch(
     "/products/{prod_id}/inventory",
     response_model=InventoryOut,
@@ -294,6 +401,7 @@ def upsert_inventory(
         inv.qty = qty
         inv.track_inventory = track_inventory
 
+    # остатка нет в листингах — только карточка товара
+    catalog_changed(db, product_ids=[prod_id], listings=False)
     db.commit()
-    _invalidate_products_cache()
     return InventoryOut(product_id=prod_id, qty=inv.qty, track_inventory=inv.track_inventory)
@@ -1,11 +1,19 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, require_superuser
+from app.api.services.orders import get_order_rows, order_transition_error, transition_orders
+from app.core.responses import RawJSONResponse
 from app.models.order import Order, OrderStatus
-from app.schemas.order import AdminOrderRead, AdminOrderUpdate
+from app.schemas.order import (
+    AdminOrderBulkResult,
+    AdminOrderBulkUpdate,
+    AdminOrderRead,
+    AdminOrderReadListAdapter,
+    AdminOrderUpdate,
+)
 
 router = APIRouter(
     prefix="/admin/orders",
@@ -21,25 +29,54 @@ router = APIRouter(
 def list_orders(
     status: Optional[OrderStatus] = Query(default=None),
     user_id: Optional[int] = Query(default=None),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000, description="Размер страницы (по умолчанию — все)"),
+    offset: int = Query(default=0, ge=0, description="Смещение"),
+    archived: bool = Query(default=False, description="Закрытые заказы из архива"),
     db: Session = Depends(get_db),
     current_admin=Depends(require_superuser),
-) -> list[AdminOrderRead]:
+) -> Response:
     """
     List orders with optional filters:
     - by status
     - by user_id
-    """
-    query = db.query(Order)
 
-    if status is not None:
-        query = query.filter(Order.status == status)
+    Closed orders older than `ORDERS_ARCHIVE_AFTER_MONTHS` are moved to the archive:
+    list them with `archived=true`.
+    """
+    # колонки + позиции одним SELECT ... IN; ORM-объекты не создаются
+    rows = get_order_rows(
+        db,
+        user_id=user_id,
+        order_status=status,
+        limit=limit,
+        offset=offset,
+        with_items=True,
+        archived=archived,
+    )
+    return RawJSONResponse(AdminOrderReadListAdapter.dump_json(AdminOrderReadListAdapter.validate_python(rows)))
 
-    if user_id is not None:
-        query = query.filter(Order.user_id == user_id)
 
-    query = query.order_by(Order.created_at.desc())
+@router.patch(
+    ":bulk",
+    response_model=AdminOrderBulkResult,
+    summary="Change status of many orders (admin)",
+)
+def bulk_update_order_status(
+    payload: AdminOrderBulkUpdate,
+    db: Session = Depends(get_db),
+    current_admin=Depends(require_superuser),
+) -> AdminOrderBulkResult:
+    """
+    Apply one status transition to a list of order ids or to orders matching a filter
+    (up to `filter.limit`, oldest ids first — repeat until `updated` is empty).
 
-    return list(query.all())
+    Allowed transitions: new → confirmed, new → canceled, confirmed → canceled.
+    Orders in any other status are left untouched and listed in `skipped`.
+    Canceling returns the items to inventory.
+    """
+    result = transition_orders(db, payload.status, ids=payload.ids, where=payload.filter)
+    db.commit()
+    return result
 
 
 @router.patch(
@@ -62,10 +99,11 @@ def update_order_status(
             detail="Order not found.",
         )
 
-    order.status = payload.status
-
-    db.add(order)
-    db.commit()
-    db.refresh(order)
+    if order.status != payload.status:
+        # тот же переход, что и в bulk: проверка статуса и возврат остатков при отмене
+        if not transition_orders(db, payload.status, ids=[order_id])["updated"]:
+            raise order_transition_error(order_id, order.status, payload.status)
+        db.commit()
+        db.refresh(order)
 
     return order
@@ -0,0 +1,46 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, require_superuser
+from app.api.services.reports import sales_report
+from app.schemas.report import ReportGroupBy, SalesReport
+
+router = APIRouter(
+    prefix="/admin/reports",
+    tags=["admin:reports"],
+    dependencies=[Depends(require_superuser)],
+)
+
+MAX_REPORT_DAYS = 366
+
+
+@router.get(
+    "/sales",
+    response_model=SalesReport,
+    summary="Sales by day, product, category or brand (admin)",
+)
+def get_sales_report(
+    date_from: Optional[date] = Query(
+        default=None, alias="from", description="Первый день (UTC), по умолчанию to - 29"
+    ),
+    date_to: Optional[date] = Query(
+        default=None, alias="to", description="Последний день включительно, по умолчанию сегодня"
+    ),
+    group_by: ReportGroupBy = Query(default="day"),
+    limit: int = Query(default=100, ge=1, le=1000, description="Для product/category/brand: топ по выручке"),
+    db: Session = Depends(get_db),
+) -> SalesReport:
+    """
+    Units, revenue (`price_cents * quantity`) and order count of non-canceled orders,
+    answered from the daily rollups. Orders changed after `as_of` are not counted yet.
+    """
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    if (date_to - date_from).days >= MAX_REPORT_DAYS:
+        raise HTTPException(status_code=400, detail=f"Report range is limited to {MAX_REPORT_DAYS} days")
+    return sales_report(db, date_from=date_from, date_to=date_to, group_by=group_by, limit=limit)
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.api.services.catalog_tree import get_brand_list
+from app.core import http_cache
+from app.schemas.catalog import BrandRead
+
+router = APIRouter(prefix="/brands", tags=["brands"])
+
+
+@router.get(
+    "",
+    response_model=list[BrandRead],
+    summary="List brands",
+    description="Все бренды по алфавиту из снимка в памяти процесса.",
+    responses={304: {"description": "Not modified"}},
+)
+def list_brands(request: Request, db: Session = Depends(get_db)) -> Response:
+    brands = get_brand_list(db)
+    return http_cache.respond(request, brands.json, http_cache.Stored(brands.etag), ("brands",))
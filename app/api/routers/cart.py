@@ -0,0 +1,100 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, Response, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_subject, get_current_user, get_db
+from app.api.services import cart as cart_service
+from app.core.responses import RawJSONResponse
+from app.models import User
+from app.schemas.cart import CartItemAdd, CartItemUpdate, CartRead, CartReadAdapter
+from app.schemas.order import OrderRead
+
+router = APIRouter(prefix="/cart", tags=["cart"])
+
+
+def _cart_response(subject: str, background: BackgroundTasks) -> Response:
+    cart, stale_ids = cart_service.read_cart(subject)
+    if stale_ids:
+        # обновление снимков — после отправки ответа, вне горячего пути
+        background.add_task(cart_service.refresh_snapshots, subject, stale_ids)
+    return RawJSONResponse(CartReadAdapter.dump_json(CartReadAdapter.validate_python(cart)))
+
+
+@router.get(
+    "",
+    response_model=CartRead,
+    summary="Get current user's cart",
+    description="Корзина из Redis (без обращения к Postgres). Устаревшие снимки помечены `stale`.",
+)
+def get_cart(background: BackgroundTasks, subject: str = Depends(get_current_subject)) -> Response:
+    return _cart_response(subject, background)
+
+
+@router.post(
+    "/items",
+    response_model=CartRead,
+    summary="Add product to cart",
+    description="Добавить товар (количество суммируется с уже лежащим в корзине).",
+    responses={400: {"description": "Not enough stock"}, 404: {"description": "Product not found"}},
+)
+def add_cart_item(
+    payload: CartItemAdd,
+    background: BackgroundTasks,
+    db: Session = Depends(get_db),
+    subject: str = Depends(get_current_subject),
+) -> Response:
+    cart_service.set_quantity(db, subject, payload.product_id, payload.quantity, increment=True)
+    return _cart_response(subject, background)
+
+
+@router.put(
+    "/items/{product_id}",
+    response_model=CartRead,
+    summary="Set quantity of a cart line",
+    responses={400: {"description": "Not enough stock"}, 404: {"description": "Product not found"}},
+)
+def update_cart_item(
+    product_id: int,
+    payload: CartItemUpdate,
+    background: BackgroundTasks,
+    db: Session = Depends(get_db),
+    subject: str = Depends(get_current_subject),
+) -> Response:
+    cart_service.set_quantity(db, subject, product_id, payload.quantity)
+    return _cart_response(subject, background)
+
+
+@router.delete(
+    "/items/{product_id}",
+    response_model=CartRead,
+    summary="Remove product from cart",
+)
+def remove_cart_item(
+    product_id: int,
+    background: BackgroundTasks,
+    subject: str = Depends(get_current_subject),
+) -> Response:
+    cart_service.remove_item(subject, product_id)
+    return _cart_response(subject, background)
+
+
+@router.delete("", status_code=status.HTTP_204_NO_CONTENT, summary="Clear cart")
+def clear_cart(subject: str = Depends(get_current_subject)) -> None:
+    cart_service.clear_cart(subject)
+    return None
+
+
+@router.post(
+    "/checkout",
+    response_model=OrderRead,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create an order from the cart",
+    description=(
+        "Оформляет заказ из корзины через ту же проверку цен и остатков, что и POST /orders; корзина очищается."
+    ),
+    responses={400: {"description": "Cart is empty / not enough stock / product inactive"}},
+)
+def checkout_cart(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> OrderRead:
+    return cart_service.checkout(db, current_user.email, current_user.id)
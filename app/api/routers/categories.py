@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.api.services.catalog_tree import get_category_tree
+from app.core import http_cache
+from app.core.responses import RawJSONResponse
+from app.schemas.catalog import CategoryRead, CategoryReadListAdapter, CategoryTreeNode
+
+router = APIRouter(prefix="/categories", tags=["categories"])
+
+
+@router.get(
+    "",
+    response_model=list[CategoryTreeNode],
+    summary="Category tree",
+    description="Дерево категорий (корни с вложенными children) из снимка в памяти процесса.",
+    responses={304: {"description": "Not modified"}},
+)
+def list_categories(request: Request, db: Session = Depends(get_db)) -> Response:
+    tree = get_category_tree(db)
+    # тело и ETag посчитаны при сборке снимка: здесь ни БД, ни сериализации
+    return http_cache.respond(request, tree.json, http_cache.Stored(tree.etag), ("categories",))
+
+
+@router.get(
+    "/{cat_id}/breadcrumbs",
+    response_model=list[CategoryRead],
+    summary="Category breadcrumbs",
+    description="Путь от корня до категории включительно (из дерева в памяти процесса).",
+    responses={404: {"description": "Not found"}},
+)
+def get_breadcrumbs(cat_id: int, db: Session = Depends(get_db)) -> Response:
+    path = get_category_tree(db).breadcrumbs(cat_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Not found")
+    validated = CategoryReadListAdapter.validate_python(path, from_attributes=True)
+    return RawJSONResponse(CategoryReadListAdapter.dump_json(validated))
@@ -1,9 +1,10 @@
 import time
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy import text
 
 from app.api.deps import get_db
+from app.core import metrics
 from app.core.cache import get_redis
 from app.core.config import settings
 
@@ -43,3 +44,9 @@ async def healthz(db=Depends(get_db)):
             "redis": redis_status,
         },
     }
+
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics() -> Response:
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
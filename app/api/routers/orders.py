@@ -2,14 +2,15 @@ from __future__ import annotations
 
 from typing import List
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
-from app.api.services.orders import create_order_for_user, get_orders_for_user
+from app.api.deps import get_current_subject, get_current_user, get_db
+from app.api.services.orders import create_order_for_user, get_order_rows
 from app.api.services.payments import pay_order_for_user
+from app.core.responses import RawJSONResponse
 from app.models import User
-from app.schemas.order import OrderCreate, OrderRead
+from app.schemas.order import OrderCreate, OrderRead, OrderReadListAdapter
 from app.schemas.payment import PaymentRead
 
 router = APIRouter(prefix="/orders", tags=["orders"])
@@ -36,11 +37,12 @@ def create_order(
     summary="List orders of current user",
 )
 def list_my_orders(
+    archived: bool = Query(default=False, description="Старые закрытые заказы из архива"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> List[OrderRead]:
-    orders = get_orders_for_user(db, current_user.id)
-    return orders
+) -> Response:
+    rows = get_order_rows(db, user_id=current_user.id, archived=archived)
+    return RawJSONResponse(OrderReadListAdapter.dump_json(OrderReadListAdapter.validate_python(rows)))
 
 
 @router.post(
@@ -49,10 +51,19 @@ def list_my_orders(
     status_code=201,
     summary="Pay for an order of current user",
 )
-def pay_order(
+async def pay_order(
     order_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    subject: str = Depends(get_current_subject),
 ) -> PaymentRead:
-    payment = pay_order_for_user(db, current_user.id, order_id)
+    """
+    Creates a `pending` payment and charges it at the provider. The result arrives via
+    `POST /payments/webhook`; the demo provider (`PAYMENT_PROVIDER=test`) approves at once.
+    `402` — the provider declined the charge (the order can be paid again); `502` — the provider
+    did not answer or rejected the request itself (e.g. 401/403), the payment stays `pending`
+    and calling this endpoint again resends it.
+    """
+    # async: ответа провайдера ждём в event loop, запросы к БД — в threadpool;
+    # пользователя проверяет сам сервис, чтобы не держать соединение между шагами
+    payment = await pay_order_for_user(db, subject, order_id)
     return payment
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.api.deps import get_db
+from app.api.services.payment_gateway import InvalidWebhook, get_gateway, parse_webhook
+from app.api.services.payments import apply_webhook
+from app.schemas.payment import WebhookAck
+
+router = APIRouter(prefix="/payments", tags=["payments"])
+
+
+@router.post(
+    "/webhook",
+    response_model=WebhookAck,
+    summary="Payment result from the provider",
+)
+async def payment_webhook(request: Request, db: Session = Depends(get_db)) -> WebhookAck:
+    """
+    Signed with `X-Signature: sha256=<hmac>` over `"<X-Signature-Timestamp>.<body>"`.
+    Repeated deliveries of the same result are acknowledged with `applied: false`.
+    """
+    # подпись считается по сырому телу — поэтому Request, а не pydantic-модель
+    body = await request.body()
+    try:
+        event = parse_webhook(body, request.headers)
+    except InvalidWebhook as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid webhook: {exc}") from None
+    applied = await run_in_threadpool(apply_webhook, db, get_gateway().name, event)
+    return WebhookAck(applied=applied)
@@ -1,19 +1,49 @@
-import json
 from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session, joinedload
 
-from app.api.deps import get_db
-from app.core.cache import get_redis
+from app.api.deps import get_db, get_read_db
+from app.api.services import warmer
+from app.api.services.catalog import (
+    ListingParams,
+    filters_cache_key,
+    listing_filters,
+    listing_page,
+    load_product_details,
+    product_detail,
+    product_facets,
+)
+from app.core import http_cache
+from app.core.cache import (
+    CATALOG_CARDS_VERSION_KEY,
+    PRODUCT_DETAIL_TTL,
+    PRODUCTS_LIST_TTL,
+    catalog_generation,
+    get_redis,
+    product_detail_key,
+)
+from app.core.metrics import PRODUCTS_CACHE
 from app.models.catalog import Product
-from app.schemas.catalog import Page, ProductDetail, ProductImageOut, ProductRead
+from app.schemas.catalog import (
+    Facets,
+    FacetsAdapter,
+    Page,
+    ProductDetail,
+    ProductDetailAdapter,
+    ProductRead,
+    ProductReadListAdapter,
+)
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 Sort = Literal["price_asc", "price_desc", "created_desc", "created_asc"]
 
+# теги для purge на CDN
+LISTING_SURROGATE_KEYS = ("products",)
+
+BATCH_MAX_IDS = 200
+
 
 @router.get(
     "",
@@ -26,9 +56,12 @@ Sort = Literal["price_asc", "price_desc", "created_desc", "created_asc"]
     },
 )
 def list_products(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
+    primary: Session = Depends(get_db),
     q: Optional[str] = Query(None, description="Поиск по имени (ILIKE)"),
     category_id: Optional[int] = Query(None, description="Фильтр по категории"),
+    include_descendants: bool = Query(False, description="С category_id: включая все подкатегории"),
     brand_id: Optional[int] = Query(None, description="Фильтр по бренду"),
     sort: Sort = Query("created_desc", description="Сортировка"),
     min_price: int | None = Query(
@@ -43,120 +76,150 @@ def list_products(
     ),
     limit: int = Query(20, ge=1, le=100, description="Размер страницы"),
     offset: int = Query(0, ge=0, description="Смещение"),
-):
+) -> Response:
     if min_price is not None and max_price is not None and min_price > max_price:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="min_price cannot be greater than max_price",
         )
 
-    r = get_redis()
-    cache_key = (
-        "products:"
-        f"q={q or ''}|"
-        f"category={category_id or ''}|"
-        f"brand={brand_id or ''}|"
-        f"min_price={min_price if min_price is not None else ''}|"
-        f"max_price={max_price if max_price is not None else ''}|"
-        f"sort={sort}|"
-        f"limit={limit}|"
-        f"offset={offset}"
+    params = ListingParams(
+        q=q,
+        category_id=category_id,
+        include_descendants=include_descendants,
+        brand_id=brand_id,
+        min_price=min_price,
+        max_price=max_price,
+        sort=sort,
+        limit=limit,
+        offset=offset,
     )
+    cache_key = params.cache_key(catalog_generation())
+    warmer.record_listing_hit(params)
+
+    # 304 по ETag страницы или gzip-копия популярной страницы — без сборки тела
+    page = http_cache.lookup_page(request, cache_key, CATALOG_CARDS_VERSION_KEY, LISTING_SURROGATE_KEYS)
+    if page.response is not None:
+        PRODUCTS_CACHE.labels("hit").inc()
+        return page.response
+
+    # страница (total и id) — с реплики, элементы товаров — с primary: их кэш сбрасывается точечно
+    body, result = listing_page(db, params, cache_key, primary)
+    PRODUCTS_CACHE.labels(result).inc()
+
+    if page.etag is not None:
+        stored = http_cache.Stored(page.etag)
+    elif page.version is not None:
+        precompress = warmer.is_popular_listing(params)
+        stored = http_cache.store_page(cache_key, page.version, body, PRODUCTS_LIST_TTL, precompress=precompress)
+    else:
+        stored = http_cache.Stored(http_cache.make_etag(body))
+    return http_cache.respond(request, body, stored, LISTING_SURROGATE_KEYS)
 
-    if r is not None:
-        try:
-            cached = r.get(cache_key)
-            if cached:
-                if isinstance(cached, bytes):
-                    cached = cached.decode("utf-8")
-                return json.loads(cached)
-        except Exception:
-            pass
 
-    # Базовые фильтры (используем один и тот же набор для items и total)
-    filters = [Product.is_active.is_(True)]
-
-    if q:
-        like = f"%{q.lower()}%"
-        filters.append(func.lower(Product.name).like(like))
-    if category_id:
-        filters.append(Product.category_id == category_id)
-    if brand_id:
-        filters.append(Product.brand_id == brand_id)
-    if min_price is not None:
-        filters.append(Product.price_cents >= min_price)
-    if max_price is not None:
-        filters.append(Product.price_cents <= max_price)
-
-    # Карта сортировок
-    order_map = {
-        "price_asc": Product.price_cents.asc(),
-        "price_desc": Product.price_cents.desc(),
-        "created_desc": Product.created_at.desc(),
-        "created_asc": Product.created_at.asc(),
-    }
-
-    use_popular = sort == "popular"
-
-    if use_popular:
-        stmt_all = select(Product).where(*filters)
-        products = db.execute(stmt_all).scalars().all()
-        total = len(products)
-
-        views_map: dict[int, int] = {}
-
-        if r is not None and products:
-            try:
-                ids = [p.id for p in products]
-                keys = [f"product:views:{pid}" for pid in ids]
-                raw_counts = r.mget(keys)  # список либо None
-
-                for pid, raw in zip(ids, raw_counts):
-                    try:
-                        views_map[pid] = int(raw) if raw is not None else 0
-                    except (TypeError, ValueError):
-                        views_map[pid] = 0
-            except Exception:
-                # Если Redis отвалился - считаем, что у всех 0 просмотров
-                views_map = {}
-
-        # Сортируем: сначала по просмотрам, потом по дате создания
-        products.sort(
-            key=lambda p: (views_map.get(p.id, 0), p.created_at),
-            reverse=True,
+@router.get(
+    "/facets",
+    response_model=Facets,
+    summary="Product facets",
+    description=(
+        "Количество товаров по брендам, категориям и ценовым диапазонам "
+        "с теми же фильтрами, что и у листинга (один сгруппированный запрос)."
+    ),
+    responses={400: {"description": "min_price > max_price"}},
+)
+def get_product_facets(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    q: Optional[str] = Query(None, description="Поиск по имени (ILIKE)"),
+    category_id: Optional[int] = Query(None, description="Фильтр по категории"),
+    include_descendants: bool = Query(False, description="С category_id: включая все подкатегории"),
+    brand_id: Optional[int] = Query(None, description="Фильтр по бренду"),
+    min_price: int | None = Query(None, ge=0, description="Minimum price in cents (inclusive)"),
+    max_price: int | None = Query(None, ge=0, description="Maximum price in cents (inclusive)"),
+) -> Response:
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="min_price cannot be greater than max_price",
         )
 
-        # Пагинация уже по отсортированному списку
-        items = products[offset : offset + limit]
-    else:
-        # обычная сортировка по полю из order_map
-        stmt_items = select(Product).where(*filters).order_by(order_map[sort]).limit(limit).offset(offset)
-        items = db.execute(stmt_items).scalars().all()
-
-        # total через subquery, чтобы не ловить SADeprecationWarning
-        base_stmt = select(Product.id).where(*filters).subquery()
-        total = db.scalar(select(func.count()).select_from(base_stmt)) or 0
-
-    result = Page(total=total, limit=limit, offset=offset, items=items)
+    # то же поколение каталога, что и у листинга: инвалидация общая
+    cache_key = f"products:{catalog_generation()}:facets:" + filters_cache_key(
+        q=q,
+        category_id=category_id,
+        include_descendants=include_descendants,
+        brand_id=brand_id,
+        min_price=min_price,
+        max_price=max_price,
+    )
+    cached, _ = http_cache.lookup(request, cache_key, LISTING_SURROGATE_KEYS)
+    if cached is not None:
+        return cached
+
+    filters = listing_filters(
+        q=q,
+        category_id=category_id,
+        include_descendants=include_descendants,
+        brand_id=brand_id,
+        min_price=min_price,
+        max_price=max_price,
+    )
+    body = FacetsAdapter.dump_json(FacetsAdapter.validate_python(product_facets(db, filters)))
 
-    # Запрос на элементы
-    stmt_items = select(Product).where(*filters).order_by(order_map[sort]).limit(limit).offset(offset)
-    items = db.execute(stmt_items).scalars().all()
+    stored = http_cache.store(cache_key, body, PRODUCTS_LIST_TTL)
+    return http_cache.respond(request, body, stored, LISTING_SURROGATE_KEYS)
 
-    # total через subquery, чтобы не ловить SADeprecationWarning
-    base_stmt = select(Product.id).where(*filters).subquery()
-    total = db.scalar(select(func.count()).select_from(base_stmt)) or 0
 
-    result = Page(total=total, limit=limit, offset=offset, items=items)
+@router.get(
+    "/batch",
+    response_model=list[ProductDetail],
+    summary="Get products by IDs",
+    description=(
+        "Карточки нескольких товаров за один запрос (корзина, избранное): `?ids=1&ids=2` "
+        f"или `?ids=1,2`, до {BATCH_MAX_IDS} штук. Порядок — как в запросе; неизвестные "
+        "и неактивные товары пропускаются. Просмотры не считаются."
+    ),
+    responses={400: {"description": "Too many or malformed ids"}},
+)
+def get_products_batch(
+    request: Request,
+    # промахи кладутся в кэш карточек: только с primary (см. get_product)
+    db: Session = Depends(get_db),
+    ids: list[str] = Query(..., description="ID товаров"),
+) -> Response:
+    try:
+        requested = [int(part) for raw in ids for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be integers")
+    prod_ids = list(dict.fromkeys(requested))
+    if not prod_ids or len(prod_ids) > BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids must contain from 1 to {BATCH_MAX_IDS} products",
+        )
 
-    # Redis: записываем на 120 секунд
+    # попадания — одним MGET по тем же ключам, что и у /products/{id}
+    bodies: dict[int, bytes] = {}
+    r = get_redis()
     if r is not None:
         try:
-            r.setex(cache_key, 120, json.dumps(result.model_dump(mode="json")))
+            for pid, body in zip(prod_ids, r.mget([product_detail_key(pid) for pid in prod_ids])):
+                if body is not None:
+                    bodies[pid] = body
         except Exception:
             pass
 
-    return result
+    misses = [pid for pid in prod_ids if pid not in bodies]
+    if misses:
+        fresh = load_product_details(db, misses)
+        http_cache.store_many({product_detail_key(pid): body for pid, body in fresh.items()}, PRODUCT_DETAIL_TTL)
+        bodies.update(fresh)
+
+    found = [pid for pid in prod_ids if pid in bodies]
+    # закэшированные карточки — готовый JSON, склеиваем без парсинга
+    body = b"[" + b",".join(bodies[pid] for pid in found) + b"]"
+    surrogate_keys = [f"product-{pid}" for pid in found]
+    return http_cache.respond(request, body, http_cache.Stored(http_cache.make_etag(body)), surrogate_keys)
 
 
 @router.get(
@@ -166,36 +229,40 @@ def list_products(
     description="Карточка товара с изображениями и остатком.",
     responses={404: {"description": "Not found"}},
 )
-def get_product(prod_id: int, db: Session = Depends(get_db)) -> ProductDetail:
-    obj = (
-        db.query(Product)
-        .options(
-            joinedload(Product.images),
-            joinedload(Product.inventory),
+def get_product(prod_id: int, request: Request, db: Session = Depends(get_db)) -> Response:
+    # карточку с отстающей реплики outbox уже не сбросит: она прожила бы в кэше весь
+    # PRODUCT_DETAIL_TTL. Поэтому промах читается с primary; попадание БД не трогает
+    r = get_redis()
+    cache_key = product_detail_key(prod_id)
+    surrogate_keys = (f"product-{prod_id}",)
+
+    response, _ = http_cache.lookup(request, cache_key, surrogate_keys)
+    if response is None:
+        obj = (
+            db.query(Product)
+            .options(
+                joinedload(Product.images),
+                joinedload(Product.inventory),
+            )
+            .filter(Product.id == prod_id, Product.is_active.is_(True))
+            .first()
         )
-        .filter(Product.id == prod_id, Product.is_active.is_(True))
-        .first()
-    )
-    if not obj:
-        raise HTTPException(status_code=404, detail="Not found")
+        if not obj:
+            raise HTTPException(status_code=404, detail="Not found")
 
-    # Счётчик просмотров товаров в Redis
-    r = get_redis()
+        body = ProductDetailAdapter.dump_json(product_detail(obj))
+        stored = http_cache.store(cache_key, body, PRODUCT_DETAIL_TTL)
+        response = http_cache.respond(request, body, stored, surrogate_keys)
+
+    warmer.record_product_hit(prod_id)
+    # Счётчик просмотров товаров в Redis (считаем и попадания в кэш, и 304)
     if r is not None:
         try:
             r.incr(f"product:views:{prod_id}")
         except Exception:
             pass
 
-    inv_qty = obj.inventory.qty if obj.inventory else None
-
-    base = ProductRead.model_validate(obj, from_attributes=True).model_dump()
-    return ProductDetail(
-        **base,
-        images=[ProductImageOut.model_validate(i, from_attributes=True) for i in obj.images],
-        inventory_qty=inv_qty,
-        in_stock=(inv_qty or 0) > 0,
-    )
+    return response
 
 
 @router.get(
@@ -209,14 +276,23 @@ def get_product(prod_id: int, db: Session = Depends(get_db)) -> ProductDetail:
 )
 def get_similar_products(
     prod_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     limit: int = Query(
         4,
         ge=1,
         le=20,
         description="Maximum number of similar products to return",
     ),
-) -> list[ProductRead]:
+) -> Response:
+    # подборка зависит от соседних товаров, поэтому ключ — под поколением каталога
+    cache_key = f"products:{catalog_generation()}:similar:{prod_id}|limit={limit}"
+    surrogate_keys = (*LISTING_SURROGATE_KEYS, f"product-{prod_id}")
+
+    cached, _ = http_cache.lookup(request, cache_key, surrogate_keys)
+    if cached is not None:
+        return cached
+
     base = db.query(Product).filter(Product.id == prod_id, Product.is_active.is_(True)).first()
     if not base:
         raise HTTPException(
@@ -247,4 +323,8 @@ def get_similar_products(
         items = query_similar(same_category=True, same_brand=False)
     if not items:
         items = query_similar(same_category=False, same_brand=False)
-    return items
+    validated = ProductReadListAdapter.validate_python(items, from_attributes=True)
+    body = ProductReadListAdapter.dump_json(validated)
+
+    stored = http_cache.store(cache_key, body, PRODUCTS_LIST_TTL)
+    return http_cache.respond(request, body, stored, surrogate_keys)
@@ -0,0 +1,111 @@
+"""Архив заказов.
+
+Закрытые заказы (`confirmed` / `canceled`) старше `ORDERS_ARCHIVE_AFTER_MONTHS` месяцев
+вместе с позициями и платежами переносятся в `orders_archive`, `order_items_archive`,
+`payments_archive` (`scripts/archive_orders.py`, по cron). Каждая пачка — одна короткая
+транзакция: `DELETE ... RETURNING` из рабочей таблицы прямо в `INSERT` в архивную, так что
+строка всегда ровно в одной из них. Рабочие `orders`/`order_items`/`payments` и их индексы
+остаются размером с «живое» окно, а не со всю историю.
+
+Не архивируются:
+
+* заказы, изменённые после последнего прогона роллапов продаж (с запасом на перекрытие
+  окна): инкрементальный прогон ищет изменения в `orders.updated_at` и не должен их потерять;
+* заказы с платежом в `pending` — по нему ещё может прийти вебхук.
+
+Архив только читается: история заказов (`?archived=true`) и роллапы продаж.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.orm import Session
+
+from app.api.services.reports import SALES_WATERMARK
+from app.core.config import settings
+from app.db import Base
+from app.models.archive import OrderArchive, OrderItemArchive, PaymentArchive
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.payment import Payment, PaymentStatus
+from app.models.report import RollupWatermark
+
+ARCHIVABLE_STATUSES = (OrderStatus.CONFIRMED, OrderStatus.CANCELED)
+
+
+def archive_cutoff(now: datetime, months: int) -> datetime:
+    """Начало месяца (UTC) `months` месяцев назад: архивируются целые месяцы."""
+    index = now.year * 12 + now.month - 1 - months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _settled_before(db: Session) -> Optional[datetime]:
+    processed_until = db.scalar(select(RollupWatermark.processed_until).where(RollupWatermark.name == SALES_WATERMARK))
+    if processed_until is None:
+        return None
+    return processed_until - timedelta(seconds=settings.reports_rollup_overlap_seconds)
+
+
+def _move(db: Session, live: type[Base], archive: type[Base], where) -> None:
+    """`WITH moved AS (DELETE FROM live ... RETURNING ...) INSERT INTO archive SELECT * FROM moved`."""
+    columns = [c.name for c in archive.__table__.columns if c.name in live.__table__.columns]
+    moved = delete(live).where(where).returning(*(live.__table__.columns[name] for name in columns)).cte("moved")
+    db.execute(insert(archive).from_select(columns, select(moved)))
+
+
+def archive_orders(
+    db: Session,
+    *,
+    before: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    pause: float = 0.0,
+) -> int:
+    """Перенести закрытые заказы, созданные до `before`, в архив; возвращает число заказов.
+
+    По умолчанию `before` — `archive_cutoff(now, ORDERS_ARCHIVE_AFTER_MONTHS)`.
+    Пачки по `batch_size` заказов, commit после каждой (и `pause` секунд между ними — меньше
+    всплеск WAL и отставание реплик); строки берутся FOR UPDATE SKIP LOCKED, так что
+    параллельные изменения заказов и второй прогон джобы не ждут друг друга.
+    """
+    if before is None:
+        before = archive_cutoff(datetime.now(timezone.utc), settings.orders_archive_after_months)
+    batch_size = batch_size or settings.orders_archive_batch_size
+
+    conditions = [
+        Order.created_at < before,
+        ~exists().where(Payment.order_id == Order.id, Payment.status == PaymentStatus.PENDING),
+    ]
+    settled = _settled_before(db)
+    if settled is not None:
+        conditions.append(Order.updated_at < settled)
+
+    total = batches = 0
+    # по статусу отдельно — (status, created_at) по индексу, не проходя мимо старых new;
+    # keyset по created_at — не сканировать заново заказы, пропущенные в прошлых пачках
+    for order_status in ARCHIVABLE_STATUSES:
+        resume_from: Optional[datetime] = None
+        while max_batches is None or batches < max_batches:
+            stmt = select(Order.id, Order.created_at).where(Order.status == order_status, *conditions)
+            if resume_from is not None:
+                stmt = stmt.where(Order.created_at >= resume_from)
+            batch = db.execute(
+                stmt.order_by(Order.created_at).limit(batch_size).with_for_update(of=Order, skip_locked=True)
+            ).all()
+            if not batch:
+                break
+            ids = [row.id for row in batch]
+            resume_from = batch[-1].created_at
+
+            # сначала дети: на orders.id смотрят внешние ключи
+            _move(db, Payment, PaymentArchive, Payment.order_id.in_(ids))
+            _move(db, OrderItem, OrderItemArchive, OrderItem.order_id.in_(ids))
+            _move(db, Order, OrderArchive, Order.id.in_(ids))
+            total += len(ids)
+            db.commit()
+            batches += 1
+            if pause:
+                time.sleep(pause)
+    db.commit()
+    return total
@@ -0,0 +1,197 @@
+"""Корзина в Redis: один hash на пользователя (`cart:{sub}`).
+
+Поля hash:
+* `q:{product_id}` — количество (HINCRBY/HSET — атомарно, без read-modify-write);
+* `s:{product_id}` — JSON-снимок товара: имя, цена, остаток, время снимка.
+
+Чтение корзины — один HGETALL, Postgres не трогается. Снимки старше
+`CART_SNAPSHOT_MAX_AGE` помечаются `stale` и обновляются в фоне после ответа.
+Оформление заказа идёт через create_order_for_user: цены и остатки там
+проверяются по БД, снимок служит только для отображения. После заказа из корзины
+вычитается только оформленное (Lua-скрипт, атомарно): то, что добавили во время
+оформления, остаётся в корзине.
+"""
+
+import time
+from typing import Any, Iterable
+
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.services.orders import create_order_for_user
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models.catalog import Inventory, Product
+from app.models.order import Order
+from app.schemas.order import OrderCreate, OrderItemCreate
+
+# ARGV: product_id, quantity, ... — вычесть оформленное; строки, где ничего не осталось, удалить
+CHECKOUT_REMOVE_LUA = """
+for i = 1, #ARGV, 2 do
+  local pid = ARGV[i]
+  local left = redis.call('HINCRBY', KEYS[1], 'q:' .. pid, -tonumber(ARGV[i + 1]))
+  if left <= 0 then
+    redis.call('HDEL', KEYS[1], 'q:' .. pid, 's:' .. pid)
+  end
+end
+return 0
+"""
+
+
+def cart_key(subject: str) -> str:
+    return f"cart:{subject}"
+
+
+def _redis():
+    r = get_redis()
+    if r is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Cart is unavailable")
+    return r
+
+
+def snapshot_products(db: Session, product_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+    """Снимки активных товаров одним запросом (товар + отслеживаемый остаток)."""
+    ids = list(product_ids)
+    if not ids:
+        return {}
+    rows = db.execute(
+        select(Product.id, Product.name, Product.price_cents, Inventory.qty, Inventory.track_inventory)
+        .outerjoin(Inventory, Inventory.product_id == Product.id)
+        .where(Product.id.in_(ids), Product.is_active.is_(True))
+    ).all()
+    now = time.time()
+    return {
+        row.id: {
+            "name": row.name,
+            "price_cents": row.price_cents,
+            "stock": row.qty if row.track_inventory else None,
+            "at": now,
+        }
+        for row in rows
+    }
+
+
+def read_cart(subject: str) -> tuple[dict[str, Any], list[int]]:
+    """Корзина из одного HGETALL и список товаров с устаревшим снимком."""
+    raw = _redis().hgetall(cart_key(subject))
+    quantities: dict[int, int] = {}
+    snapshots: dict[int, dict] = {}
+    for field, value in raw.items():
+        kind, _, pid = field.decode().partition(":")
+        if kind == "q":
+            quantities[int(pid)] = int(value)
+        elif kind == "s":
+            snapshots[int(pid)] = orjson.loads(value)
+
+    now = time.time()
+    items, stale_ids, total = [], [], 0
+    for pid in sorted(quantities):
+        qty = quantities[pid]
+        snap = snapshots.get(pid)
+        stale = snap is None or now - snap["at"] > settings.cart_snapshot_max_age
+        if stale:
+            stale_ids.append(pid)
+        price = snap["price_cents"] if snap else None
+        line_total = (price or 0) * qty
+        total += line_total
+        items.append(
+            {
+                "product_id": pid,
+                "quantity": qty,
+                "name": snap["name"] if snap else None,
+                "price_cents": price,
+                "stock": snap["stock"] if snap else None,
+                "line_total_cents": line_total,
+                "snapshot_at": snap["at"] if snap else None,
+                "stale": stale,
+            }
+        )
+    return {"items": items, "total_cents": total}, stale_ids
+
+
+def _write_snapshots(pipe, subject: str, snapshots: dict[int, dict]) -> None:
+    for pid, snap in snapshots.items():
+        pipe.hset(cart_key(subject), f"s:{pid}", orjson.dumps(snap))
+
+
+def refresh_snapshots(subject: str, product_ids: list[int]) -> None:
+    """Фоновое обновление снимков (после ответа). Пропавшие товары остаются как есть —
+    их отбракует оформление заказа."""
+    db = SessionLocal()
+    try:
+        snapshots = snapshot_products(db, product_ids)
+    finally:
+        db.close()
+    if not snapshots:
+        return
+    try:
+        r = _redis()
+        # только для строк, которые ещё в корзине
+        present = r.hmget(cart_key(subject), [f"q:{pid}" for pid in snapshots])
+        pipe = r.pipeline()
+        _write_snapshots(pipe, subject, {pid: s for (pid, s), q in zip(snapshots.items(), present) if q is not None})
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def set_quantity(db: Session, subject: str, product_id: int, quantity: int, *, increment: bool = False) -> None:
+    """Положить товар в корзину (increment=True) или задать количество. Пишет в Redis свежий снимок."""
+    snapshot = snapshot_products(db, [product_id]).get(product_id)
+    if snapshot is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+
+    stock = snapshot["stock"]
+    not_enough = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Not enough stock for product {product_id}.",
+    )
+    if not increment and stock is not None and quantity > stock:
+        raise not_enough
+
+    r = _redis()
+    key, field = cart_key(subject), f"q:{product_id}"
+    pipe = r.pipeline()
+    if increment:
+        pipe.hincrby(key, field, quantity)
+    else:
+        pipe.hset(key, field, quantity)
+    _write_snapshots(pipe, subject, {product_id: snapshot})
+    pipe.expire(key, settings.cart_ttl_seconds)
+    new_qty = pipe.execute()[0]
+
+    # окончательная проверка остатка — при оформлении; здесь отсекаем явный перебор
+    if increment and stock is not None and new_qty > stock:
+        r.hincrby(key, field, -quantity)
+        raise not_enough
+
+
+def remove_item(subject: str, product_id: int) -> None:
+    _redis().hdel(cart_key(subject), f"q:{product_id}", f"s:{product_id}")
+
+
+def clear_cart(subject: str) -> None:
+    _redis().delete(cart_key(subject))
+
+
+def remove_checked_out(subject: str, items: list[OrderItemCreate]) -> None:
+    """Убрать из корзины оформленные количества; добавленное параллельно не трогаем."""
+    r = _redis()
+    args = [value for item in items for value in (item.product_id, item.quantity)]
+    r.register_script(CHECKOUT_REMOVE_LUA)(keys=[cart_key(subject)], args=args)
+
+
+def checkout(db: Session, subject: str, user_id: int) -> Order:
+    cart, _ = read_cart(subject)
+    if not cart["items"]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cart is empty.")
+
+    order_in = OrderCreate(
+        items=[OrderItemCreate(product_id=line["product_id"], quantity=line["quantity"]) for line in cart["items"]]
+    )
+    order = create_order_for_user(db, user_id, order_in)
+    remove_checked_out(subject, order_in.items)
+    return order
@@ -0,0 +1,351 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Iterable, Optional
+
+import orjson
+from sqlalchemy import func, literal_column, select, tuple_
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.cache import PRODUCT_CARD_TTL, PRODUCTS_LIST_TTL, get_redis, product_card_key
+from app.models.catalog import CategoryClosure, Product
+from app.schemas.catalog import ProductDetail, ProductDetailAdapter, ProductRead, ProductReadAdapter
+
+# Границы ценовых диапазонов (центы): [0, 1000), [1000, 2500), ..., [100000, ∞)
+PRICE_BUCKETS = (0, 1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000)
+
+
+def listing_filters(
+    *,
+    q: Optional[str] = None,
+    category_id: Optional[int] = None,
+    include_descendants: bool = False,
+    brand_id: Optional[int] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+) -> list:
+    """Общий набор условий для листинга и фасетов (только активные товары)."""
+    filters = [Product.is_active.is_(True)]
+
+    if q:
+        like = f"%{q.lower()}%"
+        filters.append(func.lower(Product.name).like(like))
+    if category_id and include_descendants:
+        # полу-join по замыканию: PK (ancestor_id, ...) + ix_products_category, без рекурсии
+        subtree = select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id == category_id)
+        filters.append(Product.category_id.in_(subtree))
+    elif category_id:
+        filters.append(Product.category_id == category_id)
+    if brand_id:
+        filters.append(Product.brand_id == brand_id)
+    if min_price is not None:
+        filters.append(Product.price_cents >= min_price)
+    if max_price is not None:
+        filters.append(Product.price_cents <= max_price)
+    return filters
+
+
+def filters_cache_key(
+    *,
+    q: Optional[str],
+    category_id: Optional[int],
+    include_descendants: bool = False,
+    brand_id: Optional[int],
+    min_price: Optional[int],
+    max_price: Optional[int],
+) -> str:
+    return (
+        f"q={q or ''}|"
+        f"category={category_id or ''}{'+' if category_id and include_descendants else ''}|"
+        f"brand={brand_id or ''}|"
+        f"min_price={min_price if min_price is not None else ''}|"
+        f"max_price={max_price if max_price is not None else ''}"
+    )
+
+
+@dataclass(frozen=True)
+class ListingParams:
+    """Параметры страницы `GET /products`: из них строятся и ключ кэша, и запрос."""
+
+    q: Optional[str] = None
+    category_id: Optional[int] = None
+    include_descendants: bool = False
+    brand_id: Optional[int] = None
+    min_price: Optional[int] = None
+    max_price: Optional[int] = None
+    sort: str = "created_desc"
+    limit: int = 20
+    offset: int = 0
+
+    def _filter_args(self) -> dict[str, Any]:
+        return {
+            "q": self.q,
+            "category_id": self.category_id,
+            "include_descendants": self.include_descendants,
+            "brand_id": self.brand_id,
+            "min_price": self.min_price,
+            "max_price": self.max_price,
+        }
+
+    def filters(self) -> list:
+        return listing_filters(**self._filter_args())
+
+    def cache_key(self, generation: int) -> str:
+        return (
+            f"products:{generation}:"
+            + filters_cache_key(**self._filter_args())
+            + f"|sort={self.sort}|limit={self.limit}|offset={self.offset}"
+        )
+
+    def dumps(self) -> bytes:
+        """Компактная форма без поколения (член sorted set у прогрева кэша)."""
+        return orjson.dumps(asdict(self), option=orjson.OPT_SORT_KEYS)
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "ListingParams":
+        return cls(**orjson.loads(raw))
+
+
+# Карта сортировок
+LISTING_ORDER = {
+    "price_asc": Product.price_cents.asc(),
+    "price_desc": Product.price_cents.desc(),
+    "created_desc": Product.created_at.desc(),
+    "created_asc": Product.created_at.asc(),
+}
+
+
+# Поля, от которых зависят состав и порядок страниц листинга (фильтры и сортировки).
+# Правка остальных полей меняет только элемент товара, поколение каталога не трогаем.
+LISTING_FIELDS = frozenset({"name", "brand_id", "category_id", "price_cents", "is_active"})
+
+
+def _listing_items(db: Session, params: ListingParams, entity: Any = Product) -> tuple[int, list]:
+    """total и строки страницы; `entity=Product.id` — только id (проекция без загрузки товаров)."""
+    # Базовые фильтры (используем один и тот же набор для items и total)
+    filters = params.filters()
+
+    if params.sort == "popular":
+        products = db.execute(select(Product).where(*filters)).scalars().all()
+        total = len(products)
+
+        views_map: dict[int, int] = {}
+        r = get_redis()
+        if r is not None and products:
+            try:
+                ids = [p.id for p in products]
+                raw_counts = r.mget([f"product:views:{pid}" for pid in ids])  # список либо None
+
+                for pid, raw in zip(ids, raw_counts):
+                    try:
+                        views_map[pid] = int(raw) if raw is not None else 0
+                    except (TypeError, ValueError):
+                        views_map[pid] = 0
+            except Exception:
+                # Если Redis отвалился - считаем, что у всех 0 просмотров
+                views_map = {}
+
+        # Сортируем: сначала по просмотрам, потом по дате создания
+        products.sort(key=lambda p: (views_map.get(p.id, 0), p.created_at), reverse=True)
+
+        # Пагинация уже по отсортированному списку
+        page = products[params.offset : params.offset + params.limit]
+        return total, page if entity is Product else [p.id for p in page]
+
+    stmt_items = (
+        select(entity).where(*filters).order_by(LISTING_ORDER[params.sort]).limit(params.limit).offset(params.offset)
+    )
+    items = db.execute(stmt_items).scalars().all()
+
+    # total через subquery, чтобы не ловить SADeprecationWarning
+    base_stmt = select(Product.id).where(*filters).subquery()
+    total = db.scalar(select(func.count()).select_from(base_stmt)) or 0
+    return total, list(items)
+
+
+def product_card(obj: Product) -> bytes:
+    """JSON элемента листинга (`ProductRead`)."""
+    return ProductReadAdapter.dump_json(ProductReadAdapter.validate_python(obj, from_attributes=True))
+
+
+def load_product_cards(db: Session, prod_ids: Iterable[int]) -> dict[int, bytes]:
+    """Элементы листинга активных товаров одним IN-запросом."""
+    objs = db.execute(select(Product).where(Product.id.in_(list(prod_ids)), Product.is_active.is_(True))).scalars()
+    return {obj.id: product_card(obj) for obj in objs}
+
+
+def build_listing(db: Session, params: ListingParams) -> tuple[int, dict[int, bytes]]:
+    """total и элементы страницы из Postgres; порядок ключей — порядок страницы."""
+    total, items = _listing_items(db, params)
+    return total, {obj.id: product_card(obj) for obj in items}
+
+
+def listing_body(params: ListingParams, total: int, cards: Iterable[bytes]) -> bytes:
+    """JSON `Page` из готовых элементов — склейка байт без парсинга."""
+    return b'{"total":%d,"limit":%d,"offset":%d,"items":[%b]}' % (total, params.limit, params.offset, b",".join(cards))
+
+
+def store_listing(key: str, total: int, ids: Iterable[int], cards: Optional[dict[int, bytes]] = None) -> None:
+    """Записать страницу (только total и id) и, если переданы, её элементы одним pipeline."""
+    r = get_redis()
+    if r is None:
+        return
+    try:
+        pipe = r.pipeline(transaction=False)
+        pipe.setex(key, PRODUCTS_LIST_TTL, orjson.dumps({"total": total, "ids": list(ids)}))
+        for pid, card in (cards or {}).items():
+            pipe.setex(product_card_key(pid), PRODUCT_CARD_TTL, card)
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def hydrate_cards(db: Session, prod_ids: list[int]) -> dict[int, bytes]:
+    """Элементы листинга по id: один MGET, недостающие — одним IN-запросом и обратно в Redis."""
+    cards: dict[int, bytes] = {}
+    r = get_redis()
+    if r is not None and prod_ids:
+        try:
+            for pid, card in zip(prod_ids, r.mget([product_card_key(pid) for pid in prod_ids])):
+                if card is not None:
+                    cards[pid] = card
+        except Exception:
+            pass
+
+    missing = [pid for pid in prod_ids if pid not in cards]
+    if not missing:
+        return cards
+    loaded = load_product_cards(db, missing)
+    if r is not None and loaded:
+        try:
+            pipe = r.pipeline(transaction=False)
+            for pid, card in loaded.items():
+                pipe.setex(product_card_key(pid), PRODUCT_CARD_TTL, card)
+            pipe.execute()
+        except Exception:
+            pass
+    cards.update(loaded)
+    return cards
+
+
+def listing_page(db: Session, params: ListingParams, key: str, primary: Optional[Session] = None) -> tuple[bytes, str]:
+    """JSON страницы листинга и результат кэша для метрик (hit / miss / error).
+
+    Под `key` лежит только `{"total", "ids"}`; элементы товаров хранятся по одному
+    (`product:{id}:card`) и общие для всех страниц, так что правка товара сбрасывает
+    один его элемент, а не все листинги. Товар, пропавший между сменой поколения и
+    обновлением страницы, из неё просто выпадает.
+
+    `db` может смотреть на реплику: с неё берутся только total и id страницы. Элементы
+    товаров читаются и кладутся в кэш через `primary` (None — `db` и есть primary):
+    отстающая реплика не должна вернуть в `product:{id}:card` строку, которую outbox
+    только что сбросил, — она прожила бы там весь PRODUCT_CARD_TTL.
+    """
+    primary = primary if primary is not None else db
+    r = get_redis()
+    try:
+        raw = r.get(key) if r is not None else None
+    except Exception:
+        # в кэш ничего не пишется — можно целиком с db
+        total, cards = build_listing(db, params)
+        return listing_body(params, total, cards.values()), "error"
+
+    if raw is None:
+        total, ids = _listing_items(db, params, Product.id)
+        store_listing(key, total, ids)
+        result = "miss"
+    else:
+        entry = orjson.loads(raw)
+        total, ids = entry["total"], entry["ids"]
+        result = "hit"
+    cards = hydrate_cards(primary, ids)
+    return listing_body(params, total, (cards[pid] for pid in ids if pid in cards)), result
+
+
+def product_detail(obj: Product) -> ProductDetail:
+    inv_qty = obj.inventory.qty if obj.inventory else None
+    # одна валидация вместо model_validate → model_dump → ProductDetail(**base)
+    return ProductDetailAdapter.validate_python(
+        {
+            **{name: getattr(obj, name) for name in ProductRead.model_fields},
+            "images": sorted(obj.images, key=lambda i: (i.position, i.id)),
+            "inventory_qty": inv_qty,
+            "in_stock": (inv_qty or 0) > 0,
+        },
+        from_attributes=True,
+    )
+
+
+def load_product_details(db: Session, prod_ids: Iterable[int]) -> dict[int, bytes]:
+    """JSON карточек активных товаров: один IN-запрос + по одному selectinload на изображения и остатки."""
+    objs = (
+        db.execute(
+            select(Product)
+            .options(selectinload(Product.images), selectinload(Product.inventory))
+            .where(Product.id.in_(list(prod_ids)), Product.is_active.is_(True))
+        )
+        .scalars()
+        .all()
+    )
+    return {obj.id: ProductDetailAdapter.dump_json(product_detail(obj)) for obj in objs}
+
+
+def product_facets(db: Session, filters: list) -> dict[str, Any]:
+    """Количество товаров по брендам, категориям и ценовым диапазонам — одним запросом.
+
+    GROUP BY GROUPING SETS ((brand_id), (category_id), (bucket), ()): один проход
+    по отфильтрованным строкам вместо отдельного count(*) на каждое значение фасета.
+    `grouping(col) = 0` отличает группу по колонке от NULL-значения самой колонки.
+    """
+    # границы — литералы: одинаковое выражение в SELECT и GROUP BY без разных bind-параметров
+    thresholds = literal_column(f"ARRAY[{','.join(str(b) for b in PRICE_BUCKETS)}]")
+    bucket = func.width_bucket(Product.price_cents, thresholds)
+
+    stmt = (
+        select(
+            Product.brand_id,
+            Product.category_id,
+            bucket.label("bucket"),
+            func.grouping(Product.brand_id).label("g_brand"),
+            func.grouping(Product.category_id).label("g_category"),
+            func.grouping(bucket).label("g_bucket"),
+            func.count().label("cnt"),
+        )
+        .where(*filters)
+        .group_by(
+            func.grouping_sets(
+                tuple_(Product.brand_id),
+                tuple_(Product.category_id),
+                tuple_(bucket),
+                tuple_(),
+            )
+        )
+    )
+
+    total = 0
+    brands: list[dict] = []
+    categories: list[dict] = []
+    buckets: dict[int, int] = {}
+    for row in db.execute(stmt):
+        if not row.g_brand:
+            brands.append({"id": row.brand_id, "count": row.cnt})
+        elif not row.g_category:
+            categories.append({"id": row.category_id, "count": row.cnt})
+        elif not row.g_bucket:
+            buckets[row.bucket] = row.cnt
+        else:
+            total = row.cnt
+
+    def by_count(item: dict) -> tuple:
+        return -item["count"], item["id"] is None, item["id"] or 0
+
+    # width_bucket: i-й диапазон — [PRICE_BUCKETS[i-1], PRICE_BUCKETS[i])
+    edges = (*PRICE_BUCKETS, None)
+    price = [
+        {"min_cents": edges[i], "max_cents": edges[i + 1], "count": buckets.get(i + 1, 0)}
+        for i in range(len(PRICE_BUCKETS))
+    ]
+    return {
+        "total": total,
+        "brands": sorted(brands, key=by_count),
+        "categories": sorted(categories, key=by_count),
+        "price": price,
+    }
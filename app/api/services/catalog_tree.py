@@ -0,0 +1,167 @@
+"""Справочники каталога в памяти процесса: дерево категорий и список брендов.
+
+Снимок строится одним запросом и живёт в процессе вместе с готовым JSON и ETag,
+так что ответ на `GET /categories` / `GET /brands` — это отдача готовых bytes.
+Версия снимка хранится в Redis (`catalog:categories:version`,
+`catalog:brands:version`): админские правки делают INCR, остальные воркеры
+замечают это не позже чем через `CATEGORY_TREE_CHECK_INTERVAL` секунд. Между
+проверками чтение не обращается ни к Redis, ни к БД.
+
+Снимок строится с primary, а не с реплики: у него нет TTL, и дерево, прочитанное
+с отстающей реплики, жило бы до следующей правки.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Generic, Optional, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.http_cache import make_etag
+from app.models.catalog import Brand, Category
+from app.schemas.catalog import BrandReadListAdapter, CategoryTreeListAdapter
+
+CATEGORY_TREE_VERSION_KEY = "catalog:categories:version"
+BRANDS_VERSION_KEY = "catalog:brands:version"
+
+# Полная пересборка замыкания (для массовой загрузки мимо ORM, например COPY)
+CLOSURE_REBUILD_SQL = """
+DELETE FROM category_closure;
+INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE t(ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM categories
+    UNION ALL
+    SELECT t.ancestor_id, c.id, t.depth + 1
+    FROM t JOIN categories c ON c.parent_id = t.descendant_id
+    WHERE t.depth < 64
+)
+SELECT ancestor_id, descendant_id, depth FROM t
+ON CONFLICT DO NOTHING;
+"""
+
+
+@dataclass(frozen=True)
+class CategoryNode:
+    id: int
+    name: str
+    slug: str
+    parent_id: Optional[int]
+    children: tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class CategoryTree:
+    nodes: dict[int, CategoryNode]
+    roots: tuple[int, ...]
+    json: bytes
+    etag: str
+
+    def breadcrumbs(self, cat_id: int) -> list[CategoryNode]:
+        """Путь от корня до категории включительно; [] для неизвестной категории."""
+        path: list[CategoryNode] = []
+        node = self.nodes.get(cat_id)
+        while node is not None and len(path) <= len(self.nodes):
+            path.append(node)
+            node = self.nodes.get(node.parent_id) if node.parent_id is not None else None
+        return path[::-1]
+
+
+@dataclass(frozen=True)
+class BrandList:
+    json: bytes
+    etag: str
+
+
+T = TypeVar("T")
+
+
+class _Snapshot(Generic[T]):
+    def __init__(self, version_key: str, build: Callable[[Session], T]):
+        self.version_key = version_key
+        self.build = build
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._version: Optional[bytes] = None
+        self._checked_at = 0.0
+
+    def _fresh(self, now: float) -> bool:
+        return self._value is not None and now - self._checked_at < settings.category_tree_check_interval
+
+    def _remote_version(self) -> Optional[bytes]:
+        try:
+            return get_redis().get(self.version_key)
+        except Exception:
+            return None
+
+    def get(self, db: Session) -> T:
+        now = time.monotonic()
+        value = self._value
+        if value is not None and self._fresh(now):
+            return value
+
+        with self._lock:
+            if self._fresh(now):
+                return self._value
+            # версию читаем до запроса: правка во время сборки приведёт к ещё одной пересборке
+            version = self._remote_version()
+            if self._value is None or version != self._version:
+                self._value = self.build(db)
+                self._version = version
+            self._checked_at = time.monotonic()
+            return self._value
+
+    def invalidate(self) -> None:
+        """Сброс своего снимка и сигнал остальным процессам (из обработчика outbox)."""
+        with self._lock:
+            self._value = None
+        get_redis().incr(self.version_key)
+
+
+def build_category_tree(db: Session) -> CategoryTree:
+    rows = db.execute(select(Category.id, Category.name, Category.slug, Category.parent_id).order_by(Category.id)).all()
+    children: dict[Optional[int], list[int]] = {}
+    for row in rows:
+        children.setdefault(row.parent_id, []).append(row.id)
+    nodes = {
+        row.id: CategoryNode(row.id, row.name, row.slug, row.parent_id, tuple(children.get(row.id, ()))) for row in rows
+    }
+    # родитель вне таблицы (не должно случаться из-за FK) — считаем узел корнем
+    roots = tuple(row.id for row in rows if row.parent_id is None or row.parent_id not in nodes)
+
+    def nested(cat_id: int, depth: int = 0) -> dict:
+        node = nodes[cat_id]
+        kids = [nested(c, depth + 1) for c in node.children] if depth < 64 else []
+        return {"id": node.id, "name": node.name, "slug": node.slug, "children": kids}
+
+    body = CategoryTreeListAdapter.dump_json(CategoryTreeListAdapter.validate_python([nested(r) for r in roots]))
+    return CategoryTree(nodes=nodes, roots=roots, json=body, etag=make_etag(body))
+
+
+def build_brand_list(db: Session) -> BrandList:
+    rows = db.execute(select(Brand.id, Brand.name, Brand.slug).order_by(Brand.name, Brand.id)).all()
+    body = BrandReadListAdapter.dump_json(BrandReadListAdapter.validate_python(rows, from_attributes=True))
+    return BrandList(json=body, etag=make_etag(body))
+
+
+_categories = _Snapshot(CATEGORY_TREE_VERSION_KEY, build_category_tree)
+_brands = _Snapshot(BRANDS_VERSION_KEY, build_brand_list)
+
+
+def get_category_tree(db: Session) -> CategoryTree:
+    return _categories.get(db)
+
+
+def invalidate_category_tree() -> None:
+    _categories.invalidate()
+
+
+def get_brand_list(db: Session) -> BrandList:
+    return _brands.get(db)
+
+
+def invalidate_brand_list() -> None:
+    _brands.invalidate()
@@ -0,0 +1,105 @@
+"""События outbox приложения: топики, постановка в транзакцию и обработчики.
+
+Обработчики выполняются воркером (`python -m app.worker`) после commit.
+Ошибка Redis в обработчике не глотается — событие будет повторено.
+"""
+
+import logging
+from typing import Iterable
+
+from sqlalchemy.orm import Session
+
+from app.api.services import warmer
+from app.api.services.catalog_tree import invalidate_brand_list, invalidate_category_tree
+from app.core import outbox
+from app.core.cache import bump_catalog_generation, invalidate_product_cards, invalidate_product_detail
+from app.models.order import Order
+from app.models.payment import Payment
+
+logger = logging.getLogger("app.events")
+
+CACHE_INVALIDATE = "cache.invalidate"
+ORDER_CREATED = "order.created"
+ORDER_PAID = "order.paid"
+
+
+def catalog_changed(
+    db: Session,
+    *,
+    product_ids: Iterable[int] = (),
+    listings: bool = True,
+    categories: bool = False,
+    brands: bool = False,
+) -> None:
+    """Сбросить кэши каталога после commit текущей транзакции.
+
+    `product_ids` — карточки и элементы листингов этих товаров; `listings` — ещё и
+    поколение каталога (все страницы): только если могли измениться состав или порядок.
+    """
+    outbox.enqueue(
+        db,
+        CACHE_INVALIDATE,
+        {
+            "listings": listings,
+            "product_ids": sorted(set(product_ids)),
+            "categories": categories,
+            "brands": brands,
+        },
+    )
+
+
+def enqueue_order_created(db: Session, order: Order, *, product_ids: Iterable[int]) -> None:
+    """`product_ids` — товары, у которых изменился остаток (их карточки сбрасываются)."""
+    outbox.enqueue(
+        db,
+        ORDER_CREATED,
+        {
+            "order_id": order.id,
+            "user_id": order.user_id,
+            "total_cents": order.total_cents,
+            "product_ids": sorted(set(product_ids)),
+        },
+    )
+
+
+def enqueue_order_paid(db: Session, order: Order, payment: Payment) -> None:
+    outbox.enqueue(
+        db,
+        ORDER_PAID,
+        {
+            "order_id": order.id,
+            "user_id": order.user_id,
+            "payment_id": payment.id,
+            "amount_cents": payment.amount_cents,
+        },
+    )
+
+
+@outbox.handler(CACHE_INVALIDATE)
+def _invalidate_caches(payload: dict) -> None:
+    if payload.get("listings"):
+        bump_catalog_generation()
+    invalidate_product_detail(*payload.get("product_ids", ()))
+    invalidate_product_cards(*payload.get("product_ids", ()))
+    if payload.get("categories"):
+        invalidate_category_tree()
+    if payload.get("brands"):
+        invalidate_brand_list()
+
+    # популярное — обратно в кэш до того, как за ним придут пользователи
+    warmer.warm_products(payload.get("product_ids", ()))
+    if payload.get("listings"):
+        warmer.schedule_listings_warm()
+
+
+@outbox.handler(ORDER_CREATED)
+def _order_created(payload: dict) -> None:
+    # остаток виден в карточке товара
+    invalidate_product_detail(*payload.get("product_ids", ()))
+    warmer.warm_products(payload.get("product_ids", ()))
+
+
+@outbox.handler(ORDER_PAID)
+def _order_paid(payload: dict) -> None:
+    # точка расширения: письмо покупателю, вебхуки, аналитика
+    logger.info("order %s paid: %s cents", payload.get("order_id"), payload.get("amount_cents"))
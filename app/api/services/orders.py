@@ -1,9 +1,22 @@
+from collections import defaultdict
+from typing import Any, Iterable, Optional
+
 from fastapi import HTTPException, status
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 
+from app.api.services import events
+from app.models.archive import OrderArchive, OrderItemArchive
 from app.models.catalog import Inventory, Product
 from app.models.order import Order, OrderItem, OrderStatus
-from app.schemas.order import OrderCreate
+from app.schemas.order import AdminOrderFilter, OrderCreate
+
+# целевой статус → из каких статусов в него можно перейти
+ORDER_TRANSITIONS: dict[OrderStatus, tuple[OrderStatus, ...]] = {
+    OrderStatus.NEW: (),
+    OrderStatus.CONFIRMED: (OrderStatus.NEW,),
+    OrderStatus.CANCELED: (OrderStatus.NEW, OrderStatus.CONFIRMED),
+}
 
 
 def create_order_for_user(
@@ -75,10 +88,140 @@ def create_order_for_user(
     )
 
     db.add(order)
+    db.flush()
+    # остаток виден в карточке товара — карточки сбросит воркер после commit
+    events.enqueue_order_created(db, order, product_ids=inv_by_pid.keys())
     db.commit()
     db.refresh(order)
     return order
 
 
-def get_orders_for_user(db: Session, user_id: int) -> list[Order]:
-    return db.query(Order).filter(Order.user_id == user_id).order_by(Order.created_at.desc()).all()
+def get_order_rows(
+    db: Session,
+    *,
+    user_id: Optional[int] = None,
+    order_status: Optional[OrderStatus] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    with_items: bool = False,
+    archived: bool = False,
+) -> list[dict[str, Any]]:
+    """Заказы для списков — колонками, без гидрации ORM-объектов.
+
+    Возвращает dict-строки под `OrderRead` / `AdminOrderRead` (`with_items=True`):
+    один SELECT по orders и, при необходимости, один SELECT ... IN по order_items.
+    `archived=True` — то же самое по `orders_archive` / `order_items_archive`.
+    """
+    order, item = (OrderArchive, OrderItemArchive) if archived else (Order, OrderItem)
+    stmt = select(order.id, order.user_id, order.status, order.total_cents, order.created_at)
+    if user_id is not None:
+        stmt = stmt.where(order.user_id == user_id)
+    if order_status is not None:
+        stmt = stmt.where(order.status == order_status)
+    # (user_id | status, created_at, id) — страница читается по индексу, без сортировки всей выборки
+    stmt = stmt.order_by(order.created_at.desc(), order.id.desc()).offset(offset)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    rows = [dict(row._mapping) for row in db.execute(stmt)]
+    if not with_items or not rows:
+        return rows
+
+    items_by_order: dict[int, list[dict[str, Any]]] = defaultdict(list)
+    items_stmt = (
+        select(item.id, item.order_id, item.product_id, item.quantity, item.price_cents)
+        .where(item.order_id.in_([row["id"] for row in rows]))
+        .order_by(item.id)
+    )
+    for row in db.execute(items_stmt):
+        items_by_order[row.order_id].append(dict(row._mapping))
+
+    for row in rows:
+        row["items"] = items_by_order[row["id"]]
+    return rows
+
+
+def _restock(db: Session, order_ids: list[int]) -> list[int]:
+    """Вернуть на склад позиции отменённых заказов — одним UPDATE ... FROM; возвращает id товаров."""
+    returned = (
+        select(OrderItem.product_id, func.sum(OrderItem.quantity).label("qty"))
+        .where(OrderItem.order_id.in_(order_ids))
+        .group_by(OrderItem.product_id)
+        .subquery()
+    )
+    stmt = (
+        update(Inventory)
+        .where(Inventory.product_id == returned.c.product_id, Inventory.track_inventory.is_(True))
+        .values(qty=Inventory.qty + returned.c.qty, updated_at=func.now())
+        .returning(Inventory.product_id)
+    )
+    return list(db.scalars(stmt))
+
+
+def transition_orders(
+    db: Session,
+    target: OrderStatus,
+    *,
+    ids: Optional[Iterable[int]] = None,
+    where: Optional[AdminOrderFilter] = None,
+) -> dict[str, Any]:
+    """Перевести заказы в статус `target` одним UPDATE ... WHERE status IN (допустимые) RETURNING id.
+
+    Заказы выбираются списком `ids` или фильтром `where` (не больше `where.limit`, по возрастанию id).
+    Заказы в недопустимом для перехода статусе не трогаются и попадают в `skipped`
+    (для списка ids — вместе с текущим статусом; `status: None` — заказа нет).
+    При отмене остатки отслеживаемых товаров возвращаются одним UPDATE по inventory.
+    Коммит — на вызывающем.
+    """
+    allowed = ORDER_TRANSITIONS[target]
+    requested: list[int] = sorted(set(ids)) if ids is not None else []
+    if ids is not None:
+        selector = Order.id.in_(requested)
+    else:
+        conditions = []
+        if where.status is not None:
+            conditions.append(Order.status == where.status)
+        if where.user_id is not None:
+            conditions.append(Order.user_id == where.user_id)
+        if where.created_before is not None:
+            conditions.append(Order.created_at < where.created_before)
+        if where.created_after is not None:
+            conditions.append(Order.created_at >= where.created_after)
+        # в фильтр сразу входит допустимый исходный статус: лимит не тратится на то, что всё равно пропустим
+        selector = Order.id.in_(
+            select(Order.id).where(*conditions, Order.status.in_(allowed)).order_by(Order.id).limit(where.limit)
+        )
+
+    updated: list[int] = []
+    if allowed and (ids is None or requested):
+        stmt = (
+            update(Order)
+            .where(selector, Order.status.in_(allowed))
+            # updated_at явно: bulk UPDATE минует onupdate ORM, а роллапы продаж идут по нему
+            .values(status=target, updated_at=func.now())
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        updated = sorted(db.scalars(stmt))
+
+    skipped: list[dict[str, Any]] = []
+    if ids is not None and len(updated) < len(requested):
+        done = set(updated)
+        missed = [i for i in requested if i not in done]
+        current = dict(db.execute(select(Order.id, Order.status).where(Order.id.in_(missed))).all())
+        skipped = [{"id": i, "status": current.get(i)} for i in missed]
+
+    if target == OrderStatus.CANCELED and updated:
+        restocked = _restock(db, updated)
+        if restocked:
+            # остаток виден в карточке товара
+            events.catalog_changed(db, product_ids=restocked, listings=False)
+
+    return {"status": target, "updated": updated, "skipped": skipped}
+
+
+def order_transition_error(order_id: int, current: OrderStatus, target: OrderStatus) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Order {order_id} cannot change status from {current.value} to {target.value}.",
+    )
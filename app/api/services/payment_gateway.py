@@ -0,0 +1,217 @@
+"""Платёжные провайдеры.
+
+`PaymentGateway.create_charge` — асинхронный вызов провайдера: запрос `POST /orders/{id}/pay`
+ждёт его в event loop и не держит слот threadpool всё время ответа провайдера.
+Итог платежа приходит вебхуком (`POST /payments/webhook`); подпись одна для всех
+провайдеров: `X-Signature: sha256=<hex hmac(PAYMENT_WEBHOOK_SECRET, "<timestamp>.<body>")>`
+и `X-Signature-Timestamp: <unix seconds>`.
+
+* `test` — без сети, одобряет платёж сразу (демо и тесты);
+* `http` — HTTP API провайдера (`PAYMENT_API_URL`; локально — `benchmarks/payment_stub.py`):
+  общий пул соединений на event loop, таймауты и повторы с тем же `Idempotency-Key`.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+import weakref
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+from uuid import uuid4
+
+import httpx
+import orjson
+
+from app.core.config import Settings, settings
+from app.models.payment import PaymentStatus
+
+logger = logging.getLogger("app.payments")
+
+# повторяем только то, что могло не дойти до провайдера или временно недоступно
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# отказ провайдера по самому платежу (карта, сумма): списания нет, платёж можно провалить.
+# Прочие 4xx (401/403/404/409...) — скорее наша конфигурация: платёж остаётся PENDING
+DECLINE_STATUSES = {402, 422}
+
+
+class PaymentGatewayError(Exception):
+    """Провайдер недоступен после всех повторов: списание могло пройти, итог — вебхуком."""
+
+
+class PaymentDeclined(PaymentGatewayError):
+    """Провайдер отклонил платёж (`DECLINE_STATUSES`): списания не было."""
+
+
+class InvalidWebhook(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Charge:
+    provider_payment_id: str
+    # PENDING — ждём вебхук; PAID/FAILED — провайдер ответил окончательно сразу
+    status: PaymentStatus
+
+
+@dataclass(frozen=True)
+class WebhookEvent:
+    event_id: str
+    provider_payment_id: str
+    status: PaymentStatus
+    # наш payment.id: вебхук может прийти раньше, чем мы сохранили provider_payment_id
+    reference: Optional[int] = None
+
+
+def sign_webhook(body: bytes, timestamp: int, secret: str) -> str:
+    digest = hmac.new(secret.encode(), str(timestamp).encode() + b"." + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def parse_webhook(body: bytes, headers: Mapping[str, str]) -> WebhookEvent:
+    """Проверить подпись и свежесть вебхука и разобрать его тело."""
+    try:
+        timestamp = int(headers.get("x-signature-timestamp", ""))
+    except ValueError:
+        raise InvalidWebhook("missing timestamp") from None
+    if abs(time.time() - timestamp) > settings.payment_webhook_tolerance:
+        raise InvalidWebhook("stale timestamp")
+    expected = sign_webhook(body, timestamp, settings.payment_webhook_secret)
+    if not hmac.compare_digest(expected, headers.get("x-signature", "")):
+        raise InvalidWebhook("bad signature")
+
+    try:
+        data = orjson.loads(body)
+        status = {"payment.succeeded": PaymentStatus.PAID, "payment.failed": PaymentStatus.FAILED}[data["type"]]
+        reference = data.get("reference")
+        return WebhookEvent(
+            event_id=str(data["id"]),
+            provider_payment_id=str(data["payment_id"]),
+            status=status,
+            reference=int(reference) if reference is not None else None,
+        )
+    except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+        raise InvalidWebhook("malformed payload") from None
+
+
+class PaymentGateway(ABC):
+    name: str
+
+    @abstractmethod
+    async def create_charge(self, *, reference: int, amount_cents: int) -> Charge:
+        """Создать списание; повтор с тем же `reference` не должен списать второй раз."""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class DemoPaymentGateway(PaymentGateway):
+    """Демо-провайдер: платёж одобрен сразу, без вебхука."""
+
+    name = "test"
+
+    async def create_charge(self, *, reference: int, amount_cents: int) -> Charge:
+        return Charge(provider_payment_id=f"test-{uuid4()}", status=PaymentStatus.PAID)
+
+
+class HttpPaymentGateway(PaymentGateway):
+    """`POST {base_url}/v1/charges` → `{"id": "...", "status": "pending|succeeded|failed"}`."""
+
+    name = "http"
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = "",
+        *,
+        timeout: float = 10.0,
+        connect_timeout: float = 2.0,
+        retries: int = 2,
+        max_connections: int = 100,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.retries = retries
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._transport = transport
+        # соединения AsyncClient привязаны к event loop — свой пул на каждый loop
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self._timeout,
+                limits=self._limits,
+                transport=self._transport,
+                headers={"Authorization": f"Bearer {self.api_key}"} if self.api_key else None,
+            )
+        return client
+
+    async def _post(self, path: str, payload: dict[str, Any], idempotency_key: str) -> dict[str, Any]:
+        client = self._client()
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                r = await client.post(path, json=payload, headers={"Idempotency-Key": idempotency_key})
+            except httpx.TransportError as exc:
+                if last:
+                    raise PaymentGatewayError(f"provider unavailable: {exc!r}") from exc
+            else:
+                if r.status_code < 400:
+                    return r.json()
+                if r.status_code in DECLINE_STATUSES:
+                    raise PaymentDeclined(f"provider returned {r.status_code}: {r.text[:200]}")
+                if r.status_code not in RETRY_STATUSES or last:
+                    raise PaymentGatewayError(f"provider returned {r.status_code}: {r.text[:200]}")
+            logger.warning("payment provider: attempt %d failed, retrying", attempt + 1)
+            await asyncio.sleep(0.1 * 2**attempt)
+        raise AssertionError("unreachable")
+
+    async def create_charge(self, *, reference: int, amount_cents: int) -> Charge:
+        # один ключ на наш платёж: повтор после таймаута не создаст второе списание
+        data = await self._post(
+            "/v1/charges",
+            {"amount_cents": amount_cents, "reference": str(reference)},
+            idempotency_key=f"payment-{reference}",
+        )
+        status = {"succeeded": PaymentStatus.PAID, "failed": PaymentStatus.FAILED}.get(
+            data.get("status"), PaymentStatus.PENDING
+        )
+        return Charge(provider_payment_id=str(data["id"]), status=status)
+
+    async def aclose(self) -> None:
+        try:
+            client = self._clients.pop(asyncio.get_running_loop())
+        except KeyError:
+            return
+        await client.aclose()
+
+
+@lru_cache(maxsize=1)
+def get_gateway() -> PaymentGateway:
+    """Провайдер из настроек; вызывается и при старте приложения, чтобы ошибка конфигурации не ждала первого платежа."""
+    if settings.payment_provider == "http":
+        if settings.payment_webhook_secret == Settings.model_fields["payment_webhook_secret"].default:
+            # с общеизвестным секретом подписать «успешный платёж» может кто угодно
+            raise ValueError("PAYMENT_WEBHOOK_SECRET must be set when PAYMENT_PROVIDER=http")
+        return HttpPaymentGateway(
+            settings.payment_api_url,
+            settings.payment_api_key,
+            timeout=settings.payment_timeout,
+            connect_timeout=settings.payment_connect_timeout,
+            retries=settings.payment_retries,
+            max_connections=settings.payment_max_connections,
+        )
+    if settings.payment_provider == "test":
+        return DemoPaymentGateway()
+    raise ValueError(f"Unknown PAYMENT_PROVIDER: {settings.payment_provider!r}")
@@ -1,18 +1,55 @@
-from uuid import uuid4
+"""Оплата заказов.
+
+`POST /orders/{id}/pay`:
+
+1. (threadpool) заказ блокируется FOR UPDATE, создаётся платёж `PENDING`, commit;
+2. (event loop) `create_charge` у провайдера — ожидание его ответа не занимает поток;
+3. (threadpool) сохраняется `provider_payment_id`; если провайдер уже ответил
+   окончательно (демо-провайдер `test`), платёж сразу завершается.
+
+Иначе итог приходит вебхуком: `apply_webhook` находит платёж по
+`(provider, provider_payment_id)` (или по нашему `reference`, если вебхук обогнал шаг 3)
+и завершает его. Повторная доставка того же вебхука ничего не меняет: завершается
+только платёж в статусе `PENDING`, строка платежа при этом заблокирована.
+
+`FAILED` без вебхука — только если провайдер отклонил сам платёж (`DECLINE_STATUSES`: 402, 422).
+Если он не ответил (таймаут, 5xx после повторов), списание могло пройти: платёж
+остаётся `PENDING` до вебхука, а повторный `POST /orders/{id}/pay` отправляет тот же
+платёж ещё раз (с тем же `Idempotency-Key` — второго списания не будет).
+"""
+
+import logging
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from app.api.services import events
+from app.api.services.orders import transition_orders
+from app.api.services.payment_gateway import Charge, PaymentDeclined, PaymentGatewayError, WebhookEvent, get_gateway
 from app.models.order import Order, OrderStatus
 from app.models.payment import Payment, PaymentStatus
+from app.models.user import User
 
+logger = logging.getLogger("app.payments")
 
-def pay_order_for_user(
-    db: Session,
-    user_id: int,
-    order_id: int,
-) -> Payment:
-    order: Order | None = db.query(Order).filter(Order.id == order_id, Order.user_id == user_id).first()
+
+def start_payment(db: Session, email: str, order_id: int, provider: str) -> tuple[int, int]:
+    """Создать PENDING-платёж; вернуть `(payment.id, amount_cents)`.
+
+    Пользователь проверяется здесь же, а не в `get_current_user`: иначе его сессия держала
+    бы соединение из пула, пока запрос ждёт свободный поток threadpool.
+    """
+    user_id = db.query(User.id).filter(User.email == email, User.is_active.is_(True)).scalar()
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    order: Order | None = (
+        db.query(Order).filter(Order.id == order_id, Order.user_id == user_id).with_for_update().first()
+    )
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -22,39 +59,133 @@ def pay_order_for_user(
     if order.status != OrderStatus.NEW:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Order total must be greater than 0.",
+            detail="Only new orders can be paid.",
         )
 
-    existing_paid = (
-        db.query(Payment)
+    # заказ заблокирован — параллельный запрос оплаты увидит этот платёж после commit
+    active = (
+        db.query(Payment.id, Payment.status, Payment.amount_cents, Payment.provider_payment_id)
         .filter(
             Payment.order_id == order.id,
-            Payment.status == PaymentStatus.PAID,
+            Payment.status.in_((PaymentStatus.PENDING, PaymentStatus.PAID)),
         )
         .first()
     )
-    if existing_paid:
+    if active and active.status == PaymentStatus.PAID:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Order is already paid.",
         )
-
-    provider = "test"
-    provider_payment_id = f"test-{uuid4()}"
+    if active and active.provider_payment_id is None:
+        # провайдер не ответил на прошлую попытку — отправляем тот же платёж повторно
+        result = active.id, active.amount_cents
+        db.commit()
+        return result
+    if active:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Payment for this order is already in progress.",
+        )
 
     payment = Payment(
         order_id=order.id,
         amount_cents=order.total_cents,
         provider=provider,
-        provider_payment_id=provider_payment_id,
-        status=PaymentStatus.PAID,
+        status=PaymentStatus.PENDING,
     )
+    db.add(payment)
+    db.flush()
+    result = payment.id, payment.amount_cents
+    # без refresh: соединение должно вернуться в пул до ответа провайдера
+    db.commit()
+    return result
 
-    order.status = OrderStatus.CONFIRMED
 
-    db.add(payment)
+def _complete(db: Session, payment: Payment, result: PaymentStatus) -> None:
+    """Перевести PENDING-платёж в PAID/FAILED; вызывать под блокировкой строки платежа."""
+    payment.status = result
+    if result != PaymentStatus.PAID:
+        return
+    order = payment.order
+    if not transition_orders(db, OrderStatus.CONFIRMED, ids=[order.id])["updated"]:
+        # например, заказ отменили, пока провайдер проводил оплату
+        logger.warning(
+            "payment %s succeeded for order %s in status %s: refund needed", payment.id, order.id, order.status
+        )
+    events.enqueue_order_paid(db, order, payment)
+
+
+def record_charge(db: Session, payment_id: int, charge: Charge) -> Payment:
+    payment = db.query(Payment).filter(Payment.id == payment_id).with_for_update().one()
+    payment.provider_payment_id = charge.provider_payment_id
+    # вебхук мог успеть раньше — тогда платёж уже не PENDING
+    if payment.status == PaymentStatus.PENDING and charge.status != PaymentStatus.PENDING:
+        _complete(db, payment, charge.status)
     db.commit()
     db.refresh(payment)
-    db.refresh(order)
-
     return payment
+
+
+def fail_payment(db: Session, payment_id: int) -> None:
+    payment = db.query(Payment).filter(Payment.id == payment_id).with_for_update().one()
+    if payment.status == PaymentStatus.PENDING:
+        payment.status = PaymentStatus.FAILED
+    db.commit()
+
+
+async def pay_order_for_user(
+    db: Session,
+    email: str,
+    order_id: int,
+) -> Payment:
+    gateway = get_gateway()
+    payment_id, amount_cents = await run_in_threadpool(start_payment, db, email, order_id, gateway.name)
+    try:
+        charge = await gateway.create_charge(reference=payment_id, amount_cents=amount_cents)
+    except PaymentDeclined:
+        logger.exception("payment %s: provider declined the charge", payment_id)
+        await run_in_threadpool(fail_payment, db, payment_id)
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail="Payment was declined by the provider.",
+        ) from None
+    except PaymentGatewayError:
+        # итог неизвестен: платёж остаётся PENDING, его завершит вебхук или повтор оплаты
+        logger.exception("payment %s: provider call failed", payment_id)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Payment provider is unavailable, try again later.",
+        ) from None
+    return await run_in_threadpool(record_charge, db, payment_id, charge)
+
+
+def apply_webhook(db: Session, provider: str, event: WebhookEvent) -> bool:
+    """Применить итог платежа из вебхука; False — платёж уже завершён (повторная доставка)."""
+    payment = (
+        db.query(Payment)
+        .filter(Payment.provider == provider, Payment.provider_payment_id == event.provider_payment_id)
+        .with_for_update()
+        .first()
+    )
+    if payment is None and event.reference is not None:
+        payment = (
+            db.query(Payment)
+            .filter(Payment.id == event.reference, Payment.provider == provider, Payment.provider_payment_id.is_(None))
+            .with_for_update()
+            .first()
+        )
+        if payment is not None:
+            payment.provider_payment_id = event.provider_payment_id
+    if payment is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payment not found.")
+
+    if payment.status != PaymentStatus.PENDING:
+        current, payment_id = payment.status, payment.id
+        db.rollback()
+        if current != event.status:
+            logger.warning("webhook %s: payment %s is already %s", event.event_id, payment_id, current.value)
+        return False
+
+    _complete(db, payment, event.status)
+    db.commit()
+    return True
@@ -0,0 +1,227 @@
+"""Отчёты по продажам из дневных роллапов (`sales_daily`).
+
+Роллапы пересчитывает батч-джоба (`scripts/rollup_sales.py`, например раз в несколько
+минут по cron): берёт заказы, изменённые после водяного знака (`orders.updated_at`),
+и пересчитывает их дни целиком — одним INSERT ... SELECT с GROUPING SETS по товару,
+категории, бренду и итогу дня. Пересчёт дня идемпотентен, поэтому окно с перекрытием
+(`REPORTS_ROLLUP_OVERLAP_SECONDS`) безопасно ловит транзакции, закоммиченные позже
+начала прошлого прогона. Отменённые заказы в продажи не входят: отмена меняет
+`updated_at`, и день пересчитывается без них.
+
+Пересчёт читает и архив заказов (`orders_archive`): продажи дня не зависят от того,
+перенесена ли часть его заказов. Отчёт читает только `sales_daily` — запросы по
+`orders`/`order_items` не конкурируют с оформлением заказов.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import case, delete, func, insert, literal, select, tuple_, union, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.archive import OrderArchive, OrderItemArchive
+from app.models.catalog import Brand, Category, Product
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.report import (
+    SALES_BRAND,
+    SALES_CATEGORY,
+    SALES_PRODUCT,
+    SALES_TOTAL,
+    RollupWatermark,
+    SalesDaily,
+)
+
+SALES_WATERMARK = "sales_daily"
+# дней на один DELETE + INSERT ... SELECT
+DAYS_PER_BATCH = 31
+
+GROUP_BY = {
+    "day": SALES_TOTAL,
+    "product": SALES_PRODUCT,
+    "category": SALES_CATEGORY,
+    "brand": SALES_BRAND,
+}
+_NAMES = {SALES_PRODUCT: Product, SALES_CATEGORY: Category, SALES_BRAND: Brand}
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _order_day(order=Order):
+    return func.date(func.timezone("UTC", order.created_at))
+
+
+def _sales_rows(days: list[date]):
+    """Позиции неотменённых заказов за `days` — из рабочих таблиц и из архива.
+
+    Архив (`app.api.services.archive`) забирает только закрытые заказы, а день может
+    пересчитываться и после этого (в нём остались незакрытые заказы) — без архива
+    его продажи потерялись бы.
+    """
+    lo = datetime.combine(min(days), datetime.min.time(), timezone.utc)
+    hi = datetime.combine(max(days) + timedelta(days=1), datetime.min.time(), timezone.utc)
+
+    def part(order, item):
+        day = _order_day(order)
+        return (
+            select(day.label("day"), item.order_id, item.product_id, item.quantity, item.price_cents)
+            .join_from(item, order, order.id == item.order_id)
+            .where(
+                order.status != OrderStatus.CANCELED,
+                # диапазон по created_at — для индекса, точный список дней — условием ниже
+                order.created_at >= lo,
+                order.created_at < hi,
+                day.in_(days),
+            )
+        )
+
+    return union_all(part(Order, OrderItem), part(OrderArchive, OrderItemArchive)).subquery("sales_rows")
+
+
+def _rollup_select(days: list[date]):
+    rows = _sales_rows(days)
+    g_product = func.grouping(rows.c.product_id)
+    g_category = func.grouping(Product.category_id)
+    g_brand = func.grouping(Product.brand_id)
+    return (
+        select(
+            case(
+                (g_product == 0, SALES_PRODUCT),
+                (g_category == 0, SALES_CATEGORY),
+                (g_brand == 0, SALES_BRAND),
+                else_=SALES_TOTAL,
+            ),
+            rows.c.day,
+            # колонки вне текущего набора группировки — NULL, так что coalesce берёт ключ набора;
+            # 0 — итог дня и товары без категории/бренда
+            func.coalesce(rows.c.product_id, Product.category_id, Product.brand_id, 0),
+            func.sum(rows.c.quantity),
+            func.sum(rows.c.price_cents * rows.c.quantity),
+            func.count(rows.c.order_id.distinct()),
+        )
+        .select_from(rows)
+        .join(Product, Product.id == rows.c.product_id)
+        .group_by(
+            func.grouping_sets(
+                tuple_(rows.c.day, rows.c.product_id),
+                tuple_(rows.c.day, Product.category_id),
+                tuple_(rows.c.day, Product.brand_id),
+                tuple_(rows.c.day),
+            )
+        )
+    )
+
+
+def _rebuild_days(db: Session, days: list[date]) -> None:
+    db.execute(delete(SalesDaily).where(SalesDaily.day.in_(days)))
+    db.execute(
+        insert(SalesDaily).from_select(
+            ["dimension", "day", "key_id", "units", "revenue_cents", "orders"],
+            _rollup_select(days),
+        )
+    )
+
+
+def refresh_sales_rollups(db: Session, *, full: bool = False) -> int:
+    """Пересчитать дни с изменёнными заказами (или все, если `full`); возвращает число дней.
+
+    Строка водяного знака берётся FOR UPDATE — параллельные прогоны выполняются по очереди.
+    """
+    db.execute(
+        pg_insert(RollupWatermark)
+        .values(name=SALES_WATERMARK, processed_until=EPOCH)
+        .on_conflict_do_nothing(index_elements=[RollupWatermark.name])
+    )
+    mark = db.scalars(select(RollupWatermark).where(RollupWatermark.name == SALES_WATERMARK).with_for_update()).one()
+    started_at = db.scalar(select(func.now()))
+
+    changed = select(_order_day()).distinct()
+    if full:
+        db.execute(delete(SalesDaily))
+        # архивные заказы не меняются — их дни нужны только при полной пересборке
+        changed = union(changed, select(_order_day(OrderArchive)).distinct())
+    else:
+        since = mark.processed_until - timedelta(seconds=settings.reports_rollup_overlap_seconds)
+        changed = changed.where(Order.updated_at > since)
+    days = sorted(db.scalars(changed))
+
+    for i in range(0, len(days), DAYS_PER_BATCH):
+        _rebuild_days(db, days[i : i + DAYS_PER_BATCH])
+
+    mark.processed_until = started_at
+    db.commit()
+    return len(days)
+
+
+def sales_report(
+    db: Session,
+    *,
+    date_from: date,
+    date_to: date,
+    group_by: str,
+    limit: int,
+) -> dict[str, Any]:
+    dimension = GROUP_BY[group_by]
+    in_range = (
+        SalesDaily.dimension == dimension,
+        SalesDaily.day >= date_from,
+        SalesDaily.day <= date_to,
+    )
+    units = func.sum(SalesDaily.units).label("units")
+    revenue = func.sum(SalesDaily.revenue_cents).label("revenue_cents")
+    orders = func.sum(SalesDaily.orders).label("orders")
+
+    if dimension == SALES_TOTAL:
+        stmt = (
+            select(SalesDaily.day, literal(None).label("id"), literal(None).label("name"), units, revenue, orders)
+            .where(*in_range)
+            .group_by(SalesDaily.day)
+            .order_by(SalesDaily.day)
+        )
+    else:
+        # сначала топ по выручке, потом имена — join только для `limit` строк
+        top = (
+            select(SalesDaily.key_id, units, revenue, orders)
+            .where(*in_range)
+            .group_by(SalesDaily.key_id)
+            .order_by(revenue.desc(), SalesDaily.key_id)
+            .limit(limit)
+            .subquery()
+        )
+        model = _NAMES[dimension]
+        stmt = (
+            select(
+                literal(None).label("day"),
+                top.c.key_id.label("id"),
+                model.name,
+                top.c.units,
+                top.c.revenue_cents,
+                top.c.orders,
+            )
+            .outerjoin(model, model.id == top.c.key_id)
+            .order_by(top.c.revenue_cents.desc(), top.c.key_id)
+        )
+
+    rows = [
+        {
+            "day": r.day,
+            # key_id = 0 — товары без категории/бренда
+            "id": r.id or None,
+            "name": r.name,
+            "units": r.units,
+            "revenue_cents": r.revenue_cents,
+            "orders": r.orders,
+        }
+        for r in db.execute(stmt)
+    ]
+    as_of: Optional[datetime] = db.scalar(
+        select(RollupWatermark.processed_until).where(RollupWatermark.name == SALES_WATERMARK)
+    )
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "group_by": group_by,
+        "as_of": as_of,
+        "rows": rows,
+    }
@@ -0,0 +1,226 @@
+"""Прогрев кэша каталога после инвалидации.
+
+Смена поколения каталога делает холодными сразу все листинги, и первая волна
+запросов идёт в Postgres одновременно. Поэтому API считает обращения к листингам
+и карточкам (sorted set'ы `warm:listings` / `warm:products` в Redis; счётчики
+копятся в памяти процесса и сбрасываются раз в `WARMER_FLUSH_INTERVAL` секунд
+одним pipeline), а outbox-воркер после инвалидации заново строит самые
+популярные ключи:
+
+* листинги — `WARMER_TOP_LISTINGS` самых частых наборов параметров, в фоновом
+  потоке, не больше `WARMER_CONCURRENCY` запросов к БД одновременно; вместе со
+  страницей пишутся её ETag и gzip-копия (`http_cache.store_page`);
+* карточки — только сброшенные, если товар входит в `WARMER_TOP_PRODUCTS`.
+
+При каждом прогреве счётчики листингов делятся пополам, так что «популярность»
+отражает недавний трафик. Прогрев — best effort: ошибки только логируются.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+from app.api.services.catalog import (
+    ListingParams,
+    build_listing,
+    listing_body,
+    load_product_details,
+    store_listing,
+)
+from app.core import http_cache
+from app.core.cache import (
+    CATALOG_CARDS_VERSION_KEY,
+    PRODUCT_DETAIL_TTL,
+    PRODUCTS_LIST_TTL,
+    catalog_generation,
+    get_redis,
+    product_detail_key,
+)
+from app.core.config import settings
+from app.db import SessionLocal
+
+logger = logging.getLogger("app.warmer")
+
+LISTING_HITS_KEY = "warm:listings"
+PRODUCT_HITS_KEY = "warm:products"
+
+
+class _HitBuffer:
+    """Счётчики обращений в памяти процесса: вместо ZINCRBY на каждый запрос."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._flushed_at = time.monotonic()
+
+    def add(self, member: bytes | str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._counts[member] += 1
+            if now - self._flushed_at < settings.warmer_flush_interval:
+                return
+            counts, self._counts = self._counts, Counter()
+            self._flushed_at = now
+        self._write(counts)
+
+    def flush(self) -> None:
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._flushed_at = time.monotonic()
+        self._write(counts)
+
+    def _write(self, counts: Counter) -> None:
+        if not counts:
+            return
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for member, n in counts.items():
+                pipe.zincrby(self.key, n, member)
+            # храним только самые частые ключи
+            pipe.zremrangebyrank(self.key, 0, -settings.warmer_max_tracked - 1)
+            pipe.execute()
+        except Exception:
+            pass
+
+
+_listing_hits = _HitBuffer(LISTING_HITS_KEY)
+_product_hits = _HitBuffer(PRODUCT_HITS_KEY)
+
+
+def record_listing_hit(params: ListingParams) -> None:
+    if settings.warmer_enabled:
+        _listing_hits.add(params.dumps())
+
+
+def record_product_hit(prod_id: int) -> None:
+    if settings.warmer_enabled:
+        _product_hits.add(str(prod_id))
+
+
+def flush_hits() -> None:
+    _listing_hits.flush()
+    _product_hits.flush()
+
+
+def is_popular_listing(params: ListingParams) -> bool:
+    """Входит ли листинг в `WARMER_TOP_LISTINGS` — таким страницам кэш держит gzip-копию."""
+    try:
+        rank = get_redis().zrevrank(LISTING_HITS_KEY, params.dumps())
+    except Exception:
+        return False
+    return rank is not None and rank < settings.warmer_top_listings
+
+
+def warm_listings() -> int:
+    """Построить отсутствующие в кэше популярные листинги текущего поколения; возвращает число построенных."""
+    r = get_redis()
+    members = r.zrevrange(LISTING_HITS_KEY, 0, settings.warmer_top_listings - 1)
+    generation = catalog_generation()
+
+    todo: list[tuple[ListingParams, str]] = []
+    for member in members:
+        try:
+            params = ListingParams.loads(member)
+        except Exception:
+            r.zrem(LISTING_HITS_KEY, member)  # устаревший формат
+            continue
+        todo.append((params, params.cache_key(generation)))
+    if not todo:
+        return 0
+
+    # уже закэшированное (например, запрос пользователя успел раньше) не пересобираем
+    pipe = r.pipeline(transaction=False)
+    for _, key in todo:
+        pipe.exists(key)
+    todo = [item for item, present in zip(todo, pipe.execute()) if not present]
+    # версия элементов — до сборки (см. http_cache.lookup_page)
+    version = r.get(CATALOG_CARDS_VERSION_KEY) or b"0"
+
+    def warm(item: tuple[ListingParams, str]) -> bool:
+        params, key = item
+        db = SessionLocal()
+        try:
+            total, cards = build_listing(db, params)
+            store_listing(key, total, cards, cards)
+            # ETag и gzip-копия — чтобы и 304, и горячие попадания обходились без сборки
+            body = listing_body(params, total, cards.values())
+            http_cache.store_page(key, version, body, PRODUCTS_LIST_TTL, precompress=True)
+            return True
+        except Exception:
+            # один сломанный листинг не должен срывать прогрев остальных
+            logger.exception("warmer: listing %s failed", key)
+            return False
+        finally:
+            db.close()
+
+    try:
+        with ThreadPoolExecutor(max_workers=settings.warmer_concurrency, thread_name_prefix="warmer") as pool:
+            warmed = sum(pool.map(warm, todo))
+    finally:
+        # затухание: следующий прогрев больше опирается на свежий трафик
+        r.zunionstore(LISTING_HITS_KEY, {LISTING_HITS_KEY: 0.5})
+    return warmed
+
+
+def warm_products(prod_ids: Iterable[int]) -> int:
+    """Пересобрать сброшенные карточки популярных товаров; возвращает их число."""
+    ids = list(prod_ids)
+    if not settings.warmer_enabled or not ids:
+        return 0
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for pid in ids:
+            pipe.zrevrank(PRODUCT_HITS_KEY, str(pid))
+        ranks = pipe.execute()
+        popular = [pid for pid, rank in zip(ids, ranks) if rank is not None and rank < settings.warmer_top_products]
+        if not popular:
+            return 0
+        db = SessionLocal()
+        try:
+            bodies = load_product_details(db, popular)
+        finally:
+            db.close()
+        http_cache.store_many({product_detail_key(pid): body for pid, body in bodies.items()}, PRODUCT_DETAIL_TTL)
+        return len(bodies)
+    except Exception:
+        logger.exception("warmer: product cards failed")
+        return 0
+
+
+_state_lock = threading.Lock()
+_pending = threading.Event()
+_running = False
+
+
+def _warm_loop() -> None:
+    global _running
+    while True:
+        _pending.clear()
+        try:
+            start = time.perf_counter()
+            n = warm_listings()
+            logger.info("warmer: %d listings in %.0f ms", n, (time.perf_counter() - start) * 1000)
+        except Exception:
+            logger.exception("warmer: listings failed")
+        with _state_lock:
+            # инвалидация во время прогрева — ещё один проход по новому поколению
+            if not _pending.is_set():
+                _running = False
+                return
+
+
+def schedule_listings_warm() -> None:
+    """Запустить прогрев листингов в фоне; повторные вызовы во время прогрева схлопываются в один."""
+    global _running
+    if not settings.warmer_enabled:
+        return
+    with _state_lock:
+        _pending.set()
+        if _running:
+            return
+        _running = True
+    threading.Thread(target=_warm_loop, name="listings-warmer", daemon=True).start()
@@ -1,9 +1,111 @@
+import threading
+import time
+from typing import Optional
+
 import redis
 
 from app.core.config import settings
+from app.core.metrics import REDIS_LATENCY
+
+
+class InstrumentedRedis(redis.Redis):
+    """Клиент Redis, который пишет латентность каждой команды в метрики."""
+
+    def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            REDIS_LATENCY.labels(str(args[0]).upper()).observe(time.perf_counter() - start)
+
+
+# клиент создаётся при первом обращении (см. get_redis)
+_redis: Optional[InstrumentedRedis] = None
+_redis_lock = threading.Lock()
+
+PRODUCT_DETAIL_TTL = 120
+PRODUCTS_LIST_TTL = 120
+# элементы листинга сбрасываются точечно при правке товара; TTL длиннее, чем у страниц:
+# одна запись товара служит всем листингам, где он есть
+PRODUCT_CARD_TTL = 600
 
-_redis = redis.from_url(settings.redis_url, decode_responses=True)
+# Поколение каталога входит в ключи листингов: инвалидация — один INCR вместо SCAN+DEL,
+# старые записи просто доживают свой TTL.
+CATALOG_GENERATION_KEY = "catalog:generation"
+# Версия элементов листингов: INCR при каждом их сбросе. ETag страницы листинга хранится
+# вместе с версией, при которой посчитан, и с другой версией недействителен.
+CATALOG_CARDS_VERSION_KEY = "catalog:cards"
 
 
 def get_redis() -> redis.Redis:
+    global _redis
+    if _redis is None:
+        with _redis_lock:
+            if _redis is None:
+                # bytes без декодирования: закэшированный JSON отдаётся клиенту как есть
+                _redis = InstrumentedRedis.from_url(settings.redis_url)
     return _redis
+
+
+def reset_redis() -> None:
+    """Закрыть соединения клиента; следующий get_redis() создаст новый (shutdown, после fork)."""
+    global _redis
+    with _redis_lock:
+        client, _redis = _redis, None
+    if client is not None:
+        client.connection_pool.disconnect()
+
+
+def product_detail_key(prod_id: int) -> str:
+    return f"product:{prod_id}"
+
+
+def product_card_key(prod_id: int) -> str:
+    """Элемент листинга (JSON `ProductRead`): общий для всех страниц, где есть товар."""
+    return f"product:{prod_id}:card"
+
+
+def etag_key(cache_key: str) -> str:
+    return f"{cache_key}:etag"
+
+
+def gzip_key(cache_key: str) -> str:
+    return f"{cache_key}:gz"
+
+
+def catalog_generation() -> int:
+    try:
+        raw = get_redis().get(CATALOG_GENERATION_KEY)
+        return int(raw) if raw is not None else 0
+    except Exception:
+        return 0
+
+
+# Инвалидация вызывается из обработчиков outbox: ошибки Redis не глотаем, событие повторится.
+
+
+def bump_catalog_generation() -> None:
+    """Сделать неактуальными все закэшированные листинги (products:{gen}:*): состав и порядок страниц."""
+    get_redis().incr(CATALOG_GENERATION_KEY)
+
+
+def invalidate_product_detail(*prod_ids: int) -> None:
+    """Сбросить закэшированные карточки только указанных товаров."""
+    if not prod_ids:
+        return
+    keys = [product_detail_key(pid) for pid in prod_ids]
+    get_redis().delete(*keys, *(etag_key(k) for k in keys))
+
+
+def invalidate_product_cards(*prod_ids: int) -> None:
+    """Сбросить элементы листингов указанных товаров; сами страницы (списки id) остаются.
+
+    Вместе с ними меняется версия элементов: ETag и сжатые копии страниц перестают
+    совпадать и пересчитываются при следующем запросе каждой страницы.
+    """
+    if not prod_ids:
+        return
+    pipe = get_redis().pipeline()
+    pipe.delete(*(product_card_key(pid) for pid in prod_ids))
+    pipe.incr(CATALOG_CARDS_VERSION_KEY)
+    pipe.execute()
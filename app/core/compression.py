@@ -0,0 +1,160 @@
+"""Сжатие ответов: brotli (если установлен пакет `brotli`) или gzip.
+
+* сжимаются только текстовые типы (JSON, text/*) от `COMPRESSION_MIN_SIZE` байт;
+* ответы, у которых уже есть `Content-Encoding`, проходят как есть — повторно
+  ничего не сжимается;
+* стриминговые ответы (несколько body-сообщений) сжимаются потоково;
+* strong ETag сжатого ответа ослабляется до `W/"..."`: байты gzip/br и несжатого
+  тела разные, а strong-валидатор у разных представлений общим быть не может
+  (RFC 9110, 8.8.3). If-None-Match сравнивается слабо, так что 304 работают как прежде;
+  в 304 ETag ослабляется, если клиент прислал его слабую форму.
+"""
+
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+try:  # опциональная зависимость
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Кодировки из Accept-Encoding без явно запрещённых (q=0)."""
+    result = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        name = name.strip()
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            result.add(name)
+    return result
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def _is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _weaken_etag(headers: MutableHeaders) -> None:
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = "W/" + etag
+
+
+def _holds_weak(if_none_match: str, etag: Optional[str]) -> bool:
+    return bool(etag) and "W/" + etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+class _Encoder:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=settings.brotli_quality)
+            self._compress, self._flush = self._obj.process, self._obj.finish
+        else:
+            self._obj = zlib.compressobj(settings.gzip_level, zlib.DEFLATED, 31)
+            self._compress, self._flush = self._obj.compress, self._obj.flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._flush()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self._minimum_size = minimum_size
+
+    @property
+    def minimum_size(self) -> int:
+        # порог и уровни читаются из настроек на каждый запрос, а не один раз при сборке приложения
+        return settings.compression_min_size if self._minimum_size is None else self._minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        if_none_match = request_headers.get("if-none-match", "")
+        minimum_size = self.minimum_size
+        start_message = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough
+
+            if message["type"] == "http.response.start":
+                # заголовки решаем по первому куску тела
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            if encoder is not None:
+                body = encoder.compress(message.get("body", b""))
+                if not message.get("more_body", False):
+                    body += encoder.finish()
+                await send({**message, "body": body})
+                return
+
+            headers = MutableHeaders(raw=list(start_message.get("headers", [])))
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            compressible = _is_compressible(headers.get("content-type", ""))
+            if compressible:
+                # представление зависит от Accept-Encoding — важно для CDN
+                headers.add_vary_header("Accept-Encoding")
+
+            if start_message["status"] == 304 and _holds_weak(if_none_match, headers.get("etag")):
+                # у клиента сжатая копия с W/"..." — подтверждаем тем же валидатором
+                _weaken_etag(headers)
+
+            if (
+                encoding is None
+                or not compressible
+                or "content-encoding" in headers
+                or (not more_body and len(body) < minimum_size)
+            ):
+                passthrough = True
+                await send({**start_message, "headers": headers.raw})
+                await send(message)
+                return
+
+            encoder = _Encoder(encoding)
+            headers["Content-Encoding"] = encoding
+            _weaken_etag(headers)
+            body = encoder.compress(body)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body += encoder.finish()
+                headers["Content-Length"] = str(len(body))
+            await send({**start_message, "headers": headers.raw})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -5,6 +5,9 @@ class Settings(BaseSettings):
     app_env: str = "dev"
     app_host: str = "0.0.0.0"
     app_port: int = 8000
+    # gunicorn.conf.py: число воркеров (0 — по числу CPU) и время на дозавершение запросов при SIGTERM
+    web_concurrency: int = 0
+    graceful_timeout: int = 30
 
     postgres_db: str = "ecom"
     postgres_user: str = "ecom"
@@ -12,6 +15,11 @@ class Settings(BaseSettings):
     postgres_host: str = "db"
     postgres_port: int = 5432
     database_url: str = "postgresql+psycopg://ecom:ecom@db:5432/ecom"
+    # Реплики для чтений каталога, через запятую; пусто — всё читается с primary
+    database_replica_urls: str = ""
+    database_replica_max_lag: float = 5.0
+    database_replica_check_interval: float = 5.0
+    database_replica_retry_interval: float = 30.0
 
     redis_url: str = "redis://redis:6379/0"
 
@@ -20,6 +28,69 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 24  # 1 day
 
+    # HTTP-кэш каталога (Cache-Control: public, max-age=...)
+    catalog_cache_max_age: int = 30
+    # как часто воркер сверяет версию дерева категорий в Redis, сек
+    category_tree_check_interval: float = 1.0
+
+    # Корзина в Redis: срок жизни и возраст снимка цены/остатка, после которого он обновляется
+    cart_ttl_seconds: int = 60 * 60 * 24 * 30
+    cart_snapshot_max_age: int = 300
+
+    # Outbox-воркер: размер пачки, опрос без NOTIFY (нужен для повторов), повторы с backoff
+    outbox_batch_size: int = 100
+    outbox_poll_interval: float = 5.0
+    outbox_max_attempts: int = 10
+    outbox_retry_base: float = 1.0
+    outbox_retry_max: float = 300.0
+
+    # Платёжный провайдер: "test" — одобряет сразу (демо), "http" — внешний API (или benchmarks/payment_stub.py).
+    # Результат платежа приходит вебхуком POST /payments/webhook с HMAC-подписью PAYMENT_WEBHOOK_SECRET.
+    payment_provider: str = "test"
+    payment_api_url: str = "http://127.0.0.1:8090"
+    payment_api_key: str = ""
+    payment_webhook_secret: str = "change_me"
+    payment_webhook_tolerance: int = 300
+    payment_timeout: float = 10.0
+    payment_connect_timeout: float = 2.0
+    payment_retries: int = 2
+    payment_max_connections: int = 100
+
+    # Роллапы продаж: изменения заказов, закоммиченные позже начала прошлого прогона, ловим перекрытием окна
+    reports_rollup_overlap_seconds: int = 300
+
+    # Архив заказов: закрытые заказы старше N месяцев переносятся в *_archive пачками
+    orders_archive_after_months: int = 12
+    orders_archive_batch_size: int = 5000
+
+    # Прогрев кэша после инвалидации: сколько популярных ключей и в сколько потоков
+    warmer_enabled: bool = True
+    warmer_top_listings: int = 50
+    warmer_top_products: int = 200
+    warmer_concurrency: int = 4
+    warmer_max_tracked: int = 1000
+    warmer_flush_interval: float = 1.0
+
+    # Rate limit: "<запросов>/<секунд>" на класс маршрута и пользователя/IP
+    rate_limit_enabled: bool = True
+    rate_limit_auth: str = "10/60"
+    rate_limit_search: str = "60/60"
+    rate_limit_catalog: str = "600/60"
+    rate_limit_write: str = "120/60"
+    rate_limit_default: str = "300/60"
+    # запросов в работе на процесс; сверх — 503 (держите порядка pool_size + max_overflow пула БД и потоков)
+    max_in_flight: int = 64
+
+    # Сжатие ответов (gzip / brotli)
+    compression_min_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 4
+
+    # SQL profiling
+    slow_query_ms: float = 200.0
+    n_plus_one_threshold: int = 5
+    server_timing: bool = False
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", case_sensitive=False)
 
 
@@ -0,0 +1,190 @@
+"""Условные GET для каталога: strong ETag, 304 по If-None-Match, заголовки для CDN.
+
+ETag — хэш тела ответа. Он лежит в Redis рядом с закэшированным payload
+(`<key>:etag`), поэтому при If-None-Match сверяется короткая строка: ни Postgres,
+ни чтения/парсинга самого payload. Ключи листингов содержат поколение каталога,
+так что после правки каталога ETag меняется вместе с телом.
+
+Листинг `GET /products` целиком в Redis не лежит: тело собирается из списка id и
+элементов товаров (`app.api.services.catalog.listing_page`). Его ETag считается по
+собранным байтам и кладётся в `<key>:etag` вместе с версией элементов
+(`<версия> <ETag>`, см. `CATALOG_CARDS_VERSION_KEY`): пока версия та же, условный
+запрос получает 304 по одному MGET — без разбора списка id, MGET элементов и
+Postgres (`lookup_page` / `store_page`). Смена поколения каталога меняет сам ключ.
+Популярным страницам рядом кладётся gzip-копия (`<key>:gz`, с ETag в начале):
+клиенту с `Accept-Encoding: gzip` она отдаётся без сборки и сжатия.
+
+`Surrogate-Key` — теги для purge на CDN: `products` (листинги, похожие товары)
+и `product-{id}` (карточка).
+"""
+
+import gzip
+import hashlib
+from typing import Iterable, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+from app.core.cache import etag_key, get_redis, gzip_key
+from app.core.compression import accepted_encodings
+from app.core.config import settings
+from app.core.responses import RawJSONResponse
+
+
+class Stored(NamedTuple):
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # для If-None-Match сравнение слабое (RFC 9110, 13.1.2): W/"x" совпадает с "x"
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def cache_headers(etag: str, surrogate_keys: Iterable[str]) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.catalog_cache_max_age}",
+        "Surrogate-Key": " ".join(surrogate_keys),
+    }
+
+
+def not_modified(etag: str, surrogate_keys: Iterable[str]) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, surrogate_keys))
+
+
+def _json_response(body: bytes, etag: str, surrogate_keys: Iterable[str]) -> Response:
+    return RawJSONResponse(body, headers=cache_headers(etag, surrogate_keys))
+
+
+def _gzip_response(body: bytes, etag: str, surrogate_keys: Iterable[str]) -> Response:
+    headers = cache_headers("W/" + etag, surrogate_keys)
+    # CompressionMiddleware пропускает ответы с Content-Encoding как есть (Vary добавит сам)
+    headers["Content-Encoding"] = "gzip"
+    return RawJSONResponse(body, headers=headers)
+
+
+def lookup(request: Request, key: str, surrogate_keys: Iterable[str]) -> tuple[Optional[Response], str]:
+    """Ответ из Redis: 304, если ETag клиента актуален, иначе закэшированное тело.
+
+    Второй элемент — результат для метрик: hit / miss / error.
+    """
+    r = get_redis()
+    if r is None:
+        return None, "miss"
+
+    inm = request.headers.get("if-none-match")
+    try:
+        if inm:
+            etag = r.get(etag_key(key))
+            if etag is not None and etag_matches(inm, etag.decode()):
+                return not_modified(etag.decode(), surrogate_keys), "hit"
+        body, etag = r.mget(key, etag_key(key))
+    except Exception:
+        return None, "error"
+
+    if body is None or etag is None:
+        return None, "miss"
+    # bytes из Redis уходят клиенту без парсинга и повторного кодирования
+    return _json_response(body, etag.decode(), surrogate_keys), "hit"
+
+
+def store(key: str, body: bytes, ttl: int) -> Stored:
+    """Положить тело и его ETag в Redis — атомарно, один round-trip."""
+    etag = make_etag(body)
+
+    r = get_redis()
+    if r is not None:
+        try:
+            pipe = r.pipeline()
+            pipe.setex(key, ttl, body)
+            pipe.setex(etag_key(key), ttl, etag)
+            pipe.execute()
+        except Exception:
+            pass
+    return Stored(etag)
+
+
+def store_many(bodies: dict[str, bytes], ttl: int) -> None:
+    """Пакетная запись тел и ETag одним pipeline."""
+    r = get_redis()
+    if r is None or not bodies:
+        return
+    try:
+        pipe = r.pipeline(transaction=False)
+        for key, body in bodies.items():
+            pipe.setex(key, ttl, body)
+            pipe.setex(etag_key(key), ttl, make_etag(body))
+        pipe.execute()
+    except Exception:
+        pass
+
+
+class PageLookup(NamedTuple):
+    # готовый ответ (304 или gzip-копия) — тогда тело собирать не нужно
+    response: Optional[Response]
+    # версия частей тела на момент проверки; None — Redis недоступен
+    version: Optional[bytes]
+    # действительный ETag страницы, если он уже лежит в Redis
+    etag: Optional[str]
+
+
+def lookup_page(request: Request, key: str, version_key: str, surrogate_keys: Iterable[str]) -> PageLookup:
+    """Проверка ETag страницы, собираемой из частей, до её сборки.
+
+    `<key>:etag` хранит `<версия> <ETag>` и действителен, пока значение `version_key`
+    не изменилось. Версия читается до сборки: если части поменяются во время сборки,
+    ETag запишется со старой версией и следующий запрос его просто пересчитает.
+    """
+    r = get_redis()
+    if r is None:
+        return PageLookup(None, None, None)
+    gzipped = "gzip" in accepted_encodings(request.headers.get("accept-encoding", ""))
+    try:
+        stored, version, *gz = r.mget(etag_key(key), version_key, *([gzip_key(key)] if gzipped else []))
+    except Exception:
+        return PageLookup(None, None, None)
+
+    version = version or b"0"
+    stored_version, _, etag = (stored or b"").partition(b" ")
+    if stored is None or stored_version != version:
+        return PageLookup(None, version, None)
+    etag = etag.decode()
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return PageLookup(not_modified(etag, surrogate_keys), version, etag)
+    if gz and gz[0] is not None:
+        gz_etag, _, body = gz[0].partition(b"\n")
+        if gz_etag.decode() == etag:
+            return PageLookup(_gzip_response(body, etag, surrogate_keys), version, etag)
+    return PageLookup(None, version, etag)
+
+
+def store_page(key: str, version: bytes, body: bytes, ttl: int, *, precompress: bool = False) -> Stored:
+    """Записать ETag собранной страницы с версией её частей и, для популярных, gzip-копию."""
+    etag = make_etag(body)
+    r = get_redis()
+    if r is not None:
+        try:
+            pipe = r.pipeline(transaction=False)
+            pipe.setex(etag_key(key), ttl, version + b" " + etag.encode())
+            if precompress and len(body) >= settings.compression_min_size:
+                # ETag в начале копии: после пересборки страницы старая копия не подойдёт
+                gzipped = gzip.compress(body, settings.gzip_level, mtime=0)
+                pipe.setex(gzip_key(key), ttl, etag.encode() + b"\n" + gzipped)
+            pipe.execute()
+        except Exception:
+            pass
+    return Stored(etag)
+
+
+def respond(request: Request, body: bytes, stored: Stored, surrogate_keys: Iterable[str]) -> Response:
+    """Ответ на промах кэша: 304 тоже возможен — у клиента может быть та же версия."""
+    if etag_matches(request.headers.get("if-none-match"), stored.etag):
+        return not_modified(stored.etag, surrogate_keys)
+    return _json_response(body, stored.etag, surrogate_keys)
@@ -0,0 +1,148 @@
+"""Prometheus-метрики API.
+
+При запуске в несколько процессов (uvicorn --workers / gunicorn) нужно задать
+`PROMETHEUS_MULTIPROC_DIR` — пустой каталог, общий для всех воркеров. Тогда
+prometheus_client пишет значения в mmap-файлы, а `/metrics` агрегирует их
+по всем процессам. Без переменной используется обычный in-process registry.
+"""
+
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from app.core import sqlstats
+from app.core.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code.",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being processed.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+PRODUCTS_CACHE = Counter(
+    "products_cache_requests_total",
+    "Product listing cache lookups by result (hit, miss, error).",
+    ["result"],
+)
+RATE_LIMITED = Counter(
+    "http_requests_rejected_total",
+    "Requests rejected by the rate limiter (by route class) or the in-flight cap (in_flight).",
+    ["reason"],
+)
+REDIS_LATENCY = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency as seen by the client.",
+    ["command"],
+    buckets=FAST_BUCKETS,
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool.",
+    buckets=FAST_BUCKETS,
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Number of SQL statements executed per HTTP request.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_query_duration_per_request_seconds",
+    "Total SQL execution time per HTTP request.",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_REPEATED_STATEMENTS = Counter(
+    "db_repeated_statements_total",
+    "Requests where one statement shape ran at least N_PLUS_ONE_THRESHOLD times (likely N+1).",
+    ["route"],
+)
+
+
+def _route_label(scope) -> str:
+    # шаблон пути (/products/{prod_id}), а не сырой путь — иначе кардинальность не ограничена
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: латентность, статусы, in-flight и SQL-статистика на запрос.
+
+    С `SERVER_TIMING=true` добавляет заголовок `Server-Timing` (время в БД / всего).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        stats, token = sqlstats.begin()
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.server_timing:
+                    value = sqlstats.server_timing(stats, time.perf_counter() - start)
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", value.encode("latin-1"))]
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            sqlstats.end(token)
+
+            route = _route_label(scope)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.total_time)
+            if stats.repeated(settings.n_plus_one_threshold):
+                DB_REPEATED_STATEMENTS.labels(route).inc()
+                sqlstats.report(stats, route)
+
+
+def render() -> tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,113 @@
+"""Transactional outbox: побочные эффекты после commit — в отдельном воркере.
+
+Запись бизнес-данных и события (`enqueue`) идут в одной транзакции: событие
+не потеряется, если процесс упадёт сразу после commit, и не появится, если
+транзакция откатится. На commit сессия отправляет `NOTIFY outbox`, воркер
+(`python -m app.worker`) просыпается и разбирает события пачками через
+`SELECT ... FOR UPDATE SKIP LOCKED` — несколько воркеров не мешают друг другу.
+
+Доставка «хотя бы один раз»: обработчики должны быть идемпотентными.
+Исключение в обработчике — повтор с экспоненциальной задержкой.
+"""
+
+import logging
+from typing import Any, Callable
+
+from sqlalchemy import delete, event, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger("app.outbox")
+
+CHANNEL = "outbox"
+_NOTIFY_FLAG = "outbox_notify"
+
+Handler = Callable[[dict[str, Any]], None]
+_handlers: dict[str, Handler] = {}
+
+
+def handler(topic: str) -> Callable[[Handler], Handler]:
+    """Регистрация обработчика топика: `@outbox.handler("order.created")`."""
+
+    def register(fn: Handler) -> Handler:
+        _handlers[topic] = fn
+        return fn
+
+    return register
+
+
+def enqueue(db: Session, topic: str, payload: dict[str, Any]) -> None:
+    """Добавить событие в текущую транзакцию (уйдёт воркеру после commit)."""
+    db.add(OutboxEvent(topic=topic, payload=payload))
+    db.info[_NOTIFY_FLAG] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_on_commit(session: Session) -> None:
+    # NOTIFY транзакционный: доставляется только после успешного COMMIT, повторы в одной транзакции схлопываются
+    if session.info.pop(_NOTIFY_FLAG, False):
+        session.execute(text(f"NOTIFY {CHANNEL}"))
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_notify(session: Session) -> None:
+    session.info.pop(_NOTIFY_FLAG, None)
+
+
+def _retry_delay(attempts: int) -> float:
+    return min(settings.outbox_retry_base * 2 ** (attempts - 1), settings.outbox_retry_max)
+
+
+def process_batch(db: Session, batch_size: int | None = None) -> int:
+    """Забрать и обработать одну пачку готовых событий; возвращает размер пачки.
+
+    Строки заблокированы до commit, поэтому параллельный воркер пропустит их
+    (SKIP LOCKED) и возьмёт следующую пачку.
+    """
+    stmt = (
+        select(OutboxEvent.id, OutboxEvent.topic, OutboxEvent.payload, OutboxEvent.attempts)
+        .where(
+            OutboxEvent.available_at <= text("now()"),
+            OutboxEvent.attempts < settings.outbox_max_attempts,
+        )
+        .order_by(OutboxEvent.id)
+        .limit(batch_size or settings.outbox_batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.execute(stmt).all()
+    done: list[int] = []
+    for row in rows:
+        fn = _handlers.get(row.topic)
+        try:
+            if fn is None:
+                logger.warning("outbox: no handler for topic %r, event %d dropped", row.topic, row.id)
+            else:
+                fn(row.payload)
+        except Exception as exc:
+            attempts = row.attempts + 1
+            logger.warning("outbox: %s #%d failed (attempt %d): %r", row.topic, row.id, attempts, exc)
+            db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id == row.id)
+                .values(
+                    attempts=attempts,
+                    last_error=repr(exc)[:2000],
+                    available_at=text(f"now() + interval '{_retry_delay(attempts):.3f} seconds'"),
+                )
+            )
+        else:
+            done.append(row.id)
+    if done:
+        db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(done)))
+    db.commit()
+    return len(rows)
+
+
+def drain(db: Session, batch_size: int | None = None) -> int:
+    """Обработать все готовые события (отложенные повторы не ждём); возвращает их число."""
+    total = 0
+    while n := process_batch(db, batch_size):
+        total += n
+    return total
@@ -0,0 +1,195 @@
+"""Ограничение частоты запросов (token bucket в Redis) и общего числа запросов в работе.
+
+* Лимиты задаются на класс маршрута (`auth`, `search`, `catalog`, `write`,
+  `default`) строкой `"<запросов>/<секунд>"`: ёмкость ведра и скорость его
+  пополнения. Ключ ведра — класс + пользователь (`sub` из валидного JWT) или IP.
+* Проверка — один атомарный Lua-скрипт в Redis (общий лимит для всех
+  процессов и инстансов); время берётся из Redis, а не с часов воркеров.
+  Если Redis недоступен, работает такое же ведро в памяти процесса.
+* Превышение — `429 Too Many Requests` с `Retry-After`.
+* `MAX_IN_FLIGHT` — предел одновременных запросов в процессе: лишние сразу
+  получают `503` вместо ожидания соединения из исчерпанного пула БД.
+"""
+
+import asyncio
+import math
+import time
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from urllib.parse import parse_qs
+
+import redis.asyncio as aioredis
+from jose import JWTError, jwt
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+from app.core.metrics import RATE_LIMITED
+
+# вебхуки провайдера приходят с его IP и подписаны — не лимитируем
+EXEMPT_PATHS = ("/healthz", "/metrics", "/docs", "/redoc", "/openapi.json", "/payments/webhook")
+
+# KEYS[1] — ведро; ARGV: ёмкость, пополнение (токенов в мс). Ответ: {разрешено, осталось, повторить через мс}
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(b[1]) or capacity
+local ts = tonumber(b[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry = math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate) + 1000)
+return {allowed, math.floor(tokens), retry}
+"""
+
+
+class Rule(NamedTuple):
+    capacity: int
+    per_ms: float  # токенов в миллисекунду
+
+    @classmethod
+    @lru_cache(maxsize=32)
+    def parse(cls, spec: str) -> "Rule":
+        count, _, seconds = spec.partition("/")
+        return cls(int(count), int(count) / (float(seconds or 1) * 1000))
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after_ms: int
+
+
+def route_class(method: str, path: str, query_string: bytes) -> str:
+    if path.startswith("/auth/"):
+        return "auth"
+    if method in ("GET", "HEAD"):
+        if path == "/products" and parse_qs(query_string.decode("latin-1")).get("q"):
+            # поиск с произвольной строкой обходит кэш листинга; пустой q= — обычный листинг
+            return "search"
+        if path.startswith(("/products", "/categories", "/brands")):
+            return "catalog"
+        return "default"
+    return "write"
+
+
+def _rule(cls: str) -> Rule:
+    return Rule.parse(getattr(settings, f"rate_limit_{cls}"))
+
+
+def _identity(scope, cls: str) -> str:
+    if cls != "auth":
+        auth = Headers(scope=scope).get("authorization", "")
+        if auth[:7].lower() == "bearer ":
+            try:
+                payload = jwt.decode(auth[7:], settings.secret_key, algorithms=[settings.jwt_algorithm])
+            except JWTError:
+                payload = {}
+            if payload.get("sub"):
+                return f"u:{payload['sub']}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class LocalBuckets:
+    """То же ведро в памяти процесса (фолбэк при недоступном Redis)."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def hit(self, key: str, rule: Rule) -> Decision:
+        now = time.monotonic() * 1000
+        tokens, ts = self._buckets.pop(key, (rule.capacity, now))
+        tokens = min(rule.capacity, tokens + max(0.0, now - ts) * rule.per_ms)
+        if tokens >= 1:
+            decision = Decision(True, math.floor(tokens - 1), 0)
+            tokens -= 1
+        else:
+            decision = Decision(False, 0, math.ceil((1 - tokens) / rule.per_ms))
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return decision
+
+
+class RateLimiter:
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self.local = LocalBuckets()
+        # у asyncio-клиента соединения привязаны к event loop — клиент на каждый loop
+        self._scripts: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+
+    def _script(self):
+        loop = asyncio.get_running_loop()
+        script = self._scripts.get(loop)
+        if script is None:
+            client = aioredis.from_url(self.redis_url, socket_timeout=0.05, socket_connect_timeout=0.05)
+            script = self._scripts[loop] = client.register_script(TOKEN_BUCKET_LUA)
+        return script
+
+    async def hit(self, key: str, rule: Rule) -> Decision:
+        try:
+            allowed, remaining, retry = await self._script()(keys=[key], args=[rule.capacity, rule.per_ms])
+        except Exception:
+            return self.local.hit(key, rule)
+        return Decision(bool(allowed), int(remaining), int(retry))
+
+
+class RateLimitMiddleware:
+    """Pure ASGI: лимит на класс маршрута и пользователя/IP + предел запросов в работе."""
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or RateLimiter(settings.redis_url)
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.rate_limit_enabled or scope["path"].startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        # счётчик без блокировок: проверка и инкремент в одном шаге event loop, до первого await
+        if self.in_flight >= settings.max_in_flight:
+            RATE_LIMITED.labels("in_flight").inc()
+            await _reject(send, 503, "Server is busy, retry later.", 1)
+            return
+
+        self.in_flight += 1
+        try:
+            cls = route_class(scope["method"], scope["path"], scope.get("query_string", b""))
+            decision = await self.limiter.hit(f"rl:{cls}:{_identity(scope, cls)}", _rule(cls))
+            if not decision.allowed:
+                RATE_LIMITED.labels(cls).inc()
+                await _reject(send, 429, "Too many requests.", math.ceil(decision.retry_after_ms / 1000))
+                return
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+
+async def _reject(send, status: int, detail: str, retry_after: int) -> None:
+    body = b'{"detail":"' + detail.encode() + b'"}'
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, retry_after)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,12 @@
+from fastapi import Response
+from fastapi.responses import ORJSONResponse as ORJSONResponse  # noqa: F401
+
+
+class RawJSONResponse(Response):
+    """Уже сериализованный JSON (bytes из кэша или TypeAdapter.dump_json).
+
+    Эндпоинт, возвращающий Response, минует валидацию по response_model и
+    повторное кодирование — тело уходит клиенту как есть.
+    """
+
+    media_type = "application/json"
@@ -0,0 +1,135 @@
+"""SQL-профилирование на уровне запроса.
+
+* количество запросов, суммарное время и «формы» (нормализованный SQL) на HTTP-запрос;
+* лог медленных запросов (`SLOW_QUERY_MS`) без значений параметров;
+* детектор N+1: одна и та же форма выполнена >= `N_PLUS_ONE_THRESHOLD` раз за запрос;
+* `capture()` — перехват всех запросов движка (для тестов с бюджетом запросов).
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Iterator, Optional
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("app.sql")
+
+_WS_RE = re.compile(r"\s+")
+# "IN (%(id_1_1)s, %(id_1_2)s, ...)" → одна форма независимо от длины списка
+_PARAM_LIST_RE = re.compile(r"%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+")
+
+
+@dataclass
+class QueryStats:
+    """Счётчики SQL в рамках одного HTTP-запроса."""
+
+    count: int = 0
+    total_time: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+# Объект мутируется по месту, поэтому изменения из threadpool (sync-эндпоинты
+# выполняются в копии контекста) видны middleware, которая его создала.
+_current: ContextVar[Optional[QueryStats]] = ContextVar("sql_query_stats", default=None)
+_captures: list[list[str]] = []
+
+
+def begin() -> tuple[QueryStats, Token]:
+    stats = QueryStats()
+    return stats, _current.set(stats)
+
+
+def end(token: Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def statement_shape(statement: str) -> str:
+    return _PARAM_LIST_RE.sub("%(...)s", _WS_RE.sub(" ", statement).strip())
+
+
+def redact(parameters: Any) -> Any:
+    """Имена/количество параметров без значений — в логах не должно быть пользовательских данных."""
+    if isinstance(parameters, dict):
+        return {k: "?" for k in parameters}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} parameter sets>"
+        return ["?"] * len(parameters)
+    return parameters
+
+
+@contextmanager
+def capture() -> Iterator[list[str]]:
+    """Собрать SQL всех запросов движка внутри блока (в т.ч. из других потоков)."""
+    captured: list[str] = []
+    _captures.append(captured)
+    try:
+        yield captured
+    finally:
+        _captures.remove(captured)
+
+
+def report(stats: QueryStats, route: str) -> None:
+    for shape, n in stats.repeated(settings.n_plus_one_threshold):
+        logger.warning("possible N+1 on %s: %d x %s", route, n, shape[:500])
+
+
+def server_timing(stats: QueryStats, total: float) -> str:
+    return f'db;dur={stats.total_time * 1000:.1f};desc="{stats.count} queries", app;dur={total * 1000:.1f}'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total_time += elapsed
+        stats.shapes[statement_shape(statement)] += 1
+
+    for captured in _captures:
+        captured.append(statement)
+
+    if elapsed * 1000 >= settings.slow_query_ms:
+        logger.warning(
+            "slow query %.1fms: %s params=%s",
+            elapsed * 1000,
+            statement_shape(statement),
+            redact(parameters),
+        )
+
+
+def _handle_error(context) -> None:
+    # упавший запрос не доходит до after_cursor_execute — снимаем его время со стека,
+    # иначе следующий запрос на этом соединении получит чужое время начала
+    conn = context.connection
+    if conn is not None and context.execution_context is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def install(engine: "Engine") -> None:
+    # sqlalchemy — только здесь: метрики (и всё, что их импортирует) не тянут его при импорте
+    from sqlalchemy import event
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
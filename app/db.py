@@ -1,19 +1,162 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
 
+from sqlalchemy import Connection, Engine, create_engine, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.core import sqlstats
 from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKOUT_WAIT
+
+logger = logging.getLogger("app.db")
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    future=True,
-)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
+class TimedQueuePool(QueuePool):
+    """QueuePool, который пишет время ожидания свободного соединения в метрики."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def make_engine(url: str) -> Engine:
+    engine = create_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_pre_ping=True,
+        future=True,
+    )
+    sqlstats.install(engine)
+    return engine
+
+
+# Движки создаются при первом обращении, а не при импорте: скрипты и тесты, которым
+# не нужна БД, не платят за загрузку диалекта, а воркеры gunicorn не наследуют
+# пул мастера (preload_app).
+_engine: Optional[Engine] = None
+_read_router: Optional["ReplicaRouter"] = None
+_init_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _init_lock:
+            if _engine is None:
+                _engine = make_engine(settings.database_url)
+    return _engine
+
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker, который привязывается к движку при создании первой сессии."""
+
+    def __call__(self, **local_kw) -> Session:
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False, future=True)
+
+
+@dataclass
+class _Replica:
+    engine: Engine
+    down_until: float = 0.0
+    lag_checked_at: float = 0.0
+
+
+class ReplicaRouter:
+    """Round-robin по репликам для чтений каталога, с откатом на primary.
+
+    Реплика пропускается на `DATABASE_REPLICA_RETRY_INTERVAL` секунд, если к ней
+    не удалось подключиться (pool_pre_ping проверяет соединение при выдаче из пула)
+    или её отставание (`now() - pg_last_xact_replay_timestamp()`, проверяется не чаще
+    раза в `DATABASE_REPLICA_CHECK_INTERVAL`) больше `DATABASE_REPLICA_MAX_LAG`.
+    Если живых реплик нет — читаем с primary.
+    """
+
+    def __init__(self, replicas: list[Engine], primary: Engine):
+        self.primary = primary
+        self.replicas = [_Replica(e) for e in replicas]
+        self._rr = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+        self._lock = threading.Lock()
+
+    def _next(self) -> _Replica:
+        with self._lock:
+            return self.replicas[next(self._rr)]
+
+    def _mark_down(self, replica: _Replica, reason: str) -> None:
+        replica.down_until = time.monotonic() + settings.database_replica_retry_interval
+        logger.warning("replica %s is out of rotation: %s", replica.engine.url.render_as_string(), reason)
+
+    def _lagging(self, replica: _Replica, conn: Connection) -> Optional[float]:
+        now = time.monotonic()
+        if now - replica.lag_checked_at < settings.database_replica_check_interval:
+            return None
+        replica.lag_checked_at = now
+        # NULL на primary / не-реплике — отставания нет
+        lag = conn.scalar(text("SELECT extract(epoch FROM now() - pg_last_xact_replay_timestamp())"))
+        conn.rollback()
+        return float(lag) if lag is not None and lag > settings.database_replica_max_lag else None
+
+    def connect(self) -> Connection:
+        for _ in range(len(self.replicas)):
+            replica = self._next()
+            if replica.down_until > time.monotonic():
+                continue
+            try:
+                conn = replica.engine.connect()
+            except DBAPIError as exc:
+                self._mark_down(replica, f"connect failed: {exc.orig!r}")
+                continue
+            try:
+                lag = self._lagging(replica, conn)
+            except DBAPIError as exc:
+                conn.close()
+                self._mark_down(replica, f"health check failed: {exc.orig!r}")
+                continue
+            if lag is not None:
+                conn.close()
+                self._mark_down(replica, f"lag {lag:.1f}s")
+                continue
+            return conn
+        return self.primary.connect()
+
+
+def get_read_router() -> ReplicaRouter:
+    global _read_router
+    if _read_router is None:
+        primary = get_engine()
+        with _init_lock:
+            if _read_router is None:
+                _read_router = ReplicaRouter(
+                    [make_engine(url.strip()) for url in settings.database_replica_urls.split(",") if url.strip()],
+                    primary,
+                )
+    return _read_router
+
+
+def dispose_engines(close: bool = True) -> None:
+    """Закрыть пулы уже созданных движков (shutdown) или, с close=False, забыть унаследованные после fork."""
+    if _engine is not None:
+        _engine.dispose(close=close)
+    if _read_router is not None:
+        for replica in _read_router.replicas:
+            replica.engine.dispose(close=close)
 
 
 # Dependency
@@ -23,3 +166,22 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Сессия для чтений, которым допустимо небольшое отставание (публичный каталог).
+
+    Без `DATABASE_REPLICA_URLS` — та же сессия primary, что и `get_db`. Записи и
+    чтение-после-записи (заказы, корзина, админка) должны оставаться на `get_db`.
+    """
+    router = get_read_router()
+    if not router.replicas:
+        yield from get_db()
+        return
+    conn = router.connect()
+    db = Session(bind=conn, autoflush=False)
+    try:
+        yield db
+    finally:
+        db.close()
+        conn.close()
@@ -1,38 +1,127 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-
-from app.api.routers.admin_catalog import router as admin_catalog_router
-from app.api.routers.admin_orders import router as admin_orders_router
-from app.api.routers.auth import router as auth_router
-from app.api.routers.health import router as health_router
-from app.api.routers.orders import router as orders_router
-from app.api.routers.products import router as products_router
-from app.api.routers.users import router as users_router
-
-app = FastAPI(
-    title="E-commerce Core API",
-    version="0.1.0",
-    docs_url="/docs",
-    redoc_url="/redoc",
-)
-
-# CORS: временно максимально открыто — потом сузим
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(health_router)
-app.include_router(auth_router)
-app.include_router(users_router)
-app.include_router(products_router)
-app.include_router(admin_catalog_router)
-app.include_router(admin_orders_router)
-app.include_router(orders_router)
-
-
-@app.get("/")
-def root():
-    return {"name": "E-commerce Core API", "docs": "/docs"}
+"""Точка входа ASGI.
+
+`create_app()` собирает приложение; `app.main:app` (uvicorn, gunicorn,
+тесты) создаётся при первом обращении к атрибуту. Конфигурация одна —
+`app.core.config.settings` (переменные окружения): её же читают движок БД,
+клиент Redis и middleware. Роутеры, FastAPI и остальное
+тяжёлое импортируется внутри фабрики, а пул БД, клиент Redis и bcrypt
+поднимаются лениво — при первом использовании или в lifespan. Поэтому
+`import app.main` и скрипты, которым нужна только модель или сессия, стартуют
+быстро (бюджет проверяет tests/api/test_import_budget.py).
+"""
+
+import logging
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+logger = logging.getLogger("app")
+
+
+def _warm_up() -> None:
+    from app.api.services.catalog_tree import get_brand_list, get_category_tree
+    from app.db import SessionLocal
+
+    # первое соединение пула и снимки справочников — до первого запроса, а не в нём
+    db = SessionLocal()
+    try:
+        get_category_tree(db)
+        get_brand_list(db)
+    except Exception:
+        logger.warning("startup warm-up failed", exc_info=True)
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: "FastAPI"):
+    from starlette.concurrency import run_in_threadpool
+
+    from app.api.services import warmer
+    from app.api.services.payment_gateway import get_gateway
+    from app.core.cache import reset_redis
+    from app.db import dispose_engines
+
+    # неверная конфигурация платёжного провайдера — отказ при старте, а не на первом платеже
+    get_gateway()
+    await run_in_threadpool(_warm_up)
+    yield
+    # SIGTERM: сервер уже дождался текущих запросов — сбрасываем буферы и закрываем пулы
+    warmer.flush_hits()
+    await get_gateway().aclose()
+    dispose_engines()
+    reset_redis()
+
+
+def create_app() -> "FastAPI":
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+
+    from app.api.routers.admin_catalog import router as admin_catalog_router
+    from app.api.routers.admin_orders import router as admin_orders_router
+    from app.api.routers.admin_reports import router as admin_reports_router
+    from app.api.routers.auth import router as auth_router
+    from app.api.routers.brands import router as brands_router
+    from app.api.routers.cart import router as cart_router
+    from app.api.routers.categories import router as categories_router
+    from app.api.routers.health import router as health_router
+    from app.api.routers.orders import router as orders_router
+    from app.api.routers.payments import router as payments_router
+    from app.api.routers.products import router as products_router
+    from app.api.routers.users import router as users_router
+    from app.core.compression import CompressionMiddleware
+    from app.core.config import settings
+    from app.core.metrics import MetricsMiddleware
+    from app.core.ratelimit import RateLimiter, RateLimitMiddleware
+    from app.core.responses import ORJSONResponse
+
+    app = FastAPI(
+        title="E-commerce Core API",
+        version="0.1.0",
+        docs_url="/docs",
+        redoc_url="/redoc",
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
+    )
+
+    # CORS: временно максимально открыто — потом сузим
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    # сжатие внутри метрик: латентность в /metrics включает стоимость gzip/brotli
+    app.add_middleware(CompressionMiddleware)
+    # отказы 429/503 — до сжатия и до роутинга, но внутри метрик (видны в /metrics)
+    app.add_middleware(RateLimitMiddleware, limiter=RateLimiter(settings.redis_url))
+    app.add_middleware(MetricsMiddleware)
+
+    app.include_router(health_router)
+    app.include_router(auth_router)
+    app.include_router(users_router)
+    app.include_router(products_router)
+    app.include_router(categories_router)
+    app.include_router(brands_router)
+    app.include_router(admin_catalog_router)
+    app.include_router(admin_orders_router)
+    app.include_router(admin_reports_router)
+    app.include_router(orders_router)
+    app.include_router(payments_router)
+    app.include_router(cart_router)
+
+    @app.get("/")
+    def root():
+        return {"name": "E-commerce Core API", "docs": "/docs"}
+
+    return app
+
+
+def __getattr__(name: str):
+    # `app.main:app` для серверов и `from app.main import app` в тестах — одно приложение на процесс
+    if name == "app":
+        globals()["app"] = application = create_app()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
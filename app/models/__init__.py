@@ -1,10 +1,34 @@
+from .archive import OrderArchive as OrderArchive
+from .archive import OrderItemArchive as OrderItemArchive
+from .archive import PaymentArchive as PaymentArchive
 from .catalog import Brand as Brand
 from .catalog import Category as Category
+from .catalog import CategoryClosure as CategoryClosure
 from .catalog import Product as Product
 from .order import Order as Order  # noqa:F401
 from .order import OrderItem as OrderItem
 from .order import OrderStatus as OrderStatus
+from .outbox import OutboxEvent as OutboxEvent
 from .payment import Payment, PaymentStatus  # noqa:F401
+from .report import RollupWatermark as RollupWatermark
+from .report import SalesDaily as SalesDaily
 from .user import User as User
 
-__all__ = ["User", "Brand", "Category", "Product", "Order", "OrderItem", "OrderStatus", "Payment", "PaymentStatus"]
+__all__ = [
+    "User",
+    "Brand",
+    "Category",
+    "CategoryClosure",
+    "Product",
+    "Order",
+    "OrderItem",
+    "OrderStatus",
+    "OrderArchive",
+    "OrderItemArchive",
+    "PaymentArchive",
+    "OutboxEvent",
+    "Payment",
+    "PaymentStatus",
+    "RollupWatermark",
+    "SalesDaily",
+]
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, Enum, Index, Integer, String, func
+
+from app.db import Base
+from app.models.order import OrderStatus
+from app.models.payment import PaymentStatus
+
+
+class OrderArchive(Base):
+    """Закрытые заказы старше `ORDERS_ARCHIVE_AFTER_MONTHS` (`app.api.services.archive`).
+
+    Те же колонки, что у `orders`, плюс `archived_at`; без внешних ключей — строки
+    только читаются (история заказов, роллапы продаж) и больше не меняются.
+    """
+
+    __tablename__ = "orders_archive"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    status = Column(Enum(OrderStatus, name="order_status"), nullable=False)
+    total_cents = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_orders_archive_user_created", "user_id", "created_at", "id"),
+        Index("ix_orders_archive_created_at", "created_at"),
+    )
+
+
+class OrderItemArchive(Base):
+    __tablename__ = "order_items_archive"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, nullable=False, index=True)
+    product_id = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    price_cents = Column(Integer, nullable=False)
+
+
+class PaymentArchive(Base):
+    __tablename__ = "payments_archive"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, nullable=False, index=True)
+    amount_cents = Column(Integer, nullable=False)
+    provider = Column(String, nullable=False)
+    provider_payment_id = Column(String, nullable=True)
+    status = Column(Enum(PaymentStatus, name="payment_status"), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
@@ -12,6 +12,9 @@ from sqlalchemy import (
     Integer,
     String,
     UniqueConstraint,
+    event,
+    inspect,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -30,6 +33,70 @@ class Category(Base):
     __table_args__ = (Index("ix_categories_parent", "parent_id"),)
 
 
+class CategoryClosure(Base):
+    """Транзитивное замыкание дерева категорий: все пары (предок, потомок).
+
+    Включает строку (id, id, 0) для каждой категории, поэтому «категория и все
+    её потомки» — это `descendant_id WHERE ancestor_id = :id` по первичному ключу.
+    Поддерживается ORM-событиями Category ниже.
+    """
+
+    __tablename__ = "category_closure"
+
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (Index("ix_category_closure_descendant", "descendant_id", "depth"),)
+
+
+_CLOSURE_INSERT = text(
+    """
+    INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+    SELECT ancestor_id, :id, depth + 1 FROM category_closure WHERE descendant_id = :parent_id
+    UNION ALL
+    SELECT :id, :id, 0
+    """
+)
+# поддерево :id отрывается от прежних предков и подвешивается к :parent_id
+_CLOSURE_DETACH = text(
+    """
+    DELETE FROM category_closure
+    WHERE descendant_id IN (SELECT descendant_id FROM category_closure WHERE ancestor_id = :id)
+      AND ancestor_id NOT IN (SELECT descendant_id FROM category_closure WHERE ancestor_id = :id)
+    """
+)
+_CLOSURE_ATTACH = text(
+    """
+    INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+    SELECT p.ancestor_id, s.descendant_id, p.depth + s.depth + 1
+    FROM category_closure p
+    JOIN category_closure s ON s.ancestor_id = :id
+    WHERE p.descendant_id = :parent_id
+    """
+)
+
+
+@event.listens_for(Category, "after_insert")
+def _closure_after_insert(mapper, connection, target: Category) -> None:
+    connection.execute(_CLOSURE_INSERT, {"id": target.id, "parent_id": target.parent_id})
+
+
+@event.listens_for(Category, "after_update")
+def _closure_after_update(mapper, connection, target: Category) -> None:
+    if not inspect(target).attrs.parent_id.history.has_changes():
+        return
+    connection.execute(_CLOSURE_DETACH, {"id": target.id})
+    if target.parent_id is not None:
+        connection.execute(_CLOSURE_ATTACH, {"id": target.id, "parent_id": target.parent_id})
+
+
+@event.listens_for(Category, "before_delete")
+def _closure_before_delete(mapper, connection, target: Category) -> None:
+    # дети становятся корнями (ORM обнуляет их parent_id); свои строки удалит ON DELETE CASCADE
+    connection.execute(_CLOSURE_DETACH, {"id": target.id})
+
+
 class Brand(Base):
     __tablename__ = "brands"
 
@@ -56,7 +123,10 @@ class Product(Base):
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
 
-    __table_args__ = (UniqueConstraint("slug", name="uq_products_slug"),)
+    __table_args__ = (
+        UniqueConstraint("slug", name="uq_products_slug"),
+        Index("ix_products_category", "category_id"),
+    )
 
     # отношения
     images: Mapped[list["ProductImage"]] = relationship(
@@ -82,6 +152,16 @@ class ProductImage(Base):
 
     product: Mapped["Product"] = relationship(back_populates="images")
 
+    # не больше одного primary-изображения на товар
+    __table_args__ = (
+        Index(
+            "uq_product_images_primary",
+            "product_id",
+            unique=True,
+            postgresql_where=text("is_primary"),
+        ),
+    )
+
 
 class Inventory(Base):
     __tablename__ = "inventory"
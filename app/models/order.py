@@ -8,6 +8,7 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
 )
 from sqlalchemy.orm import relationship
@@ -55,12 +56,21 @@ class Order(Base):
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        # роллапы продаж: изменённые заказы и пересчёт их дней
+        Index("ix_orders_updated_at", "updated_at"),
+        Index("ix_orders_created_at", "created_at"),
+        # история пользователя и фильтр админки по статусу: ORDER BY created_at DESC, id DESC по индексу
+        Index("ix_orders_user_created", "user_id", "created_at", "id"),
+        Index("ix_orders_status_created", "status", "created_at", "id"),
+    )
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
 
     quantity = Column(Integer, nullable=False)
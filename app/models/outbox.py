@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.db import Base
+
+
+class OutboxEvent(Base):
+    """Событие для воркера, записанное в той же транзакции, что и изменение данных.
+
+    Успешно доставленные события удаляются; после `OUTBOX_MAX_ATTEMPTS` неудач
+    строка остаётся в таблице с `last_error` для разбора вручную.
+    """
+
+    __tablename__ = "outbox_events"
+
+    id = Column(BigInteger, primary_key=True)
+    topic = Column(String(64), nullable=False)
+    payload = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+
+    attempts = Column(Integer, nullable=False, server_default=text("0"))
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # не раньше этого момента (отложенный повтор после ошибки)
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (Index("ix_outbox_events_available", "available_at", "id"),)
@@ -8,8 +8,11 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
+    UniqueConstraint,
+    text,
 )
 from sqlalchemy.orm import relationship
 
@@ -26,12 +29,13 @@ class Payment(Base):
     __tablename__ = "payments"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
 
     amount_cents = Column(Integer, nullable=False)
 
     provider = Column(String, nullable=False, default="test")
-    provider_payment_id = Column(String, nullable=False)
+    # NULL, пока провайдер не ответил на create_charge
+    provider_payment_id = Column(String, nullable=True)
 
     status = Column(
         Enum(PaymentStatus, name="payment_status"),
@@ -48,3 +52,14 @@ class Payment(Base):
     )
 
     order = relationship("Order", back_populates="payments")
+
+    __table_args__ = (
+        # вебхук находит платёж по id у провайдера
+        UniqueConstraint("provider", "provider_payment_id", name="uq_payments_provider_payment_id"),
+        # незавершённые платежи: архивация заказов их пропускает
+        Index(
+            "ix_payments_pending_order",
+            "order_id",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+    )
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, Date, DateTime, Integer, String, func
+
+from app.db import Base
+
+# значения SalesDaily.dimension
+SALES_TOTAL = "total"
+SALES_PRODUCT = "product"
+SALES_CATEGORY = "category"
+SALES_BRAND = "brand"
+
+
+class SalesDaily(Base):
+    """Дневные продажи по товару, категории, бренду и итогом за день.
+
+    Строится батч-джобой (`app.api.services.reports.refresh_sales_rollups`) из
+    неотменённых заказов; день — дата `orders.created_at` в UTC. `key_id` — id
+    товара/категории/бренда, `0` — итог дня или товары без категории/бренда.
+    """
+
+    __tablename__ = "sales_daily"
+
+    dimension = Column(String(16), primary_key=True)
+    day = Column(Date, primary_key=True)
+    key_id = Column(Integer, primary_key=True)
+
+    units = Column(BigInteger, nullable=False)
+    revenue_cents = Column(BigInteger, nullable=False)
+    orders = Column(Integer, nullable=False)
+
+
+class RollupWatermark(Base):
+    """До какого `orders.updated_at` изменения уже учтены в роллапах."""
+
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(64), primary_key=True)
+    processed_until = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
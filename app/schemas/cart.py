@@ -0,0 +1,32 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+
+class CartItemAdd(BaseModel):
+    product_id: int
+    quantity: int = Field(1, gt=0)
+
+
+class CartItemUpdate(BaseModel):
+    quantity: int = Field(gt=0)
+
+
+class CartLine(BaseModel):
+    product_id: int
+    quantity: int
+    # снимок товара на момент snapshot_at; цена при оформлении берётся из БД
+    name: Optional[str] = None
+    price_cents: Optional[int] = None
+    stock: Optional[int] = None  # None — остаток не отслеживается
+    line_total_cents: int = 0
+    snapshot_at: Optional[float] = None
+    stale: bool = False
+
+
+class CartRead(BaseModel):
+    items: list[CartLine]
+    total_cents: int
+
+
+CartReadAdapter = TypeAdapter(CartRead)
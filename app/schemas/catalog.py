@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict, HttpUrl
+from pydantic import BaseModel, ConfigDict, HttpUrl, TypeAdapter
 
 
 # --- Category ---
@@ -29,6 +29,15 @@ class CategoryRead(CategoryBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CategoryTreeNode(BaseModel):
+    """Узел публичного дерева категорий."""
+
+    id: int
+    name: str
+    slug: str
+    children: list[CategoryTreeNode] = []
+
+
 # --- Brand ---
 class BrandBase(BaseModel):
     name: str
@@ -108,6 +117,15 @@ class ProductImageOut(ProductImageIn):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ProductImageSetItem(ProductImageIn):
+    """Элемент галереи для PUT: с `id` — существующее изображение, без `id` — новое.
+
+    Если `position` не передан, берётся индекс элемента в списке.
+    """
+
+    id: Optional[int] = None
+
+
 class InventoryOut(BaseModel):
     product_id: int
     qty: int
@@ -119,3 +137,32 @@ class ProductDetail(ProductRead):
     images: list[ProductImageOut] = []
     inventory_qty: int | None = None
     in_stock: bool = False
+
+
+# --- Фасеты листинга ---
+class FacetCount(BaseModel):
+    id: Optional[int] = None
+    count: int
+
+
+class PriceBucketCount(BaseModel):
+    min_cents: int
+    max_cents: Optional[int] = None  # None — верхний открытый диапазон
+    count: int
+
+
+class Facets(BaseModel):
+    total: int
+    brands: list[FacetCount]
+    categories: list[FacetCount]
+    price: list[PriceBucketCount]
+
+
+# --- Предкомпилированные сериализаторы ответов ---
+CategoryReadListAdapter = TypeAdapter(list[CategoryRead])
+CategoryTreeListAdapter = TypeAdapter(list[CategoryTreeNode])
+BrandReadListAdapter = TypeAdapter(list[BrandRead])
+ProductReadAdapter = TypeAdapter(ProductRead)
+ProductReadListAdapter = TypeAdapter(list[ProductRead])
+ProductDetailAdapter = TypeAdapter(ProductDetail)
+FacetsAdapter = TypeAdapter(Facets)
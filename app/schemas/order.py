@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, model_validator
 
 from app.models.order import OrderStatus
 
@@ -21,8 +21,7 @@ class OrderItemRead(BaseModel):
     quantity: int
     price_cents: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class OrderRead(BaseModel):
@@ -31,13 +30,52 @@ class OrderRead(BaseModel):
     total_cents: int
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AdminOrderUpdate(BaseModel):
     status: OrderStatus
-    items: Optional[List[OrderItemRead]]
+    items: Optional[List[OrderItemRead]] = None
+
+
+class AdminOrderFilter(BaseModel):
+    status: Optional[OrderStatus] = None
+    user_id: Optional[int] = None
+    created_before: Optional[datetime] = None
+    created_after: Optional[datetime] = None
+    limit: int = Field(default=10_000, ge=1, le=10_000, description="Не больше заказов за запрос")
+
+    @model_validator(mode="after")
+    def _not_empty(self) -> "AdminOrderFilter":
+        # пустой фильтр — «все заказы»: такое только явным списком ids
+        if all(v is None for v in (self.status, self.user_id, self.created_before, self.created_after)):
+            raise ValueError("Filter needs at least one of status, user_id, created_before, created_after")
+        return self
+
+
+class AdminOrderBulkUpdate(BaseModel):
+    """Новый статус для списка заказов (`ids`) или для заказов по фильтру (`filter`)."""
+
+    status: OrderStatus
+    ids: Optional[List[int]] = Field(default=None, min_length=1, max_length=10_000)
+    filter: Optional[AdminOrderFilter] = None
+
+    @model_validator(mode="after")
+    def _one_selector(self) -> "AdminOrderBulkUpdate":
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Exactly one of 'ids' and 'filter' is required")
+        return self
+
+
+class SkippedOrder(BaseModel):
+    id: int
+    status: Optional[OrderStatus] = Field(description="Текущий статус; null — заказа нет")
+
+
+class AdminOrderBulkResult(BaseModel):
+    status: OrderStatus
+    updated: List[int]
+    skipped: List[SkippedOrder]
 
 
 class AdminOrderRead(BaseModel):
@@ -48,5 +86,9 @@ class AdminOrderRead(BaseModel):
     created_at: datetime
     items: list[OrderItemRead]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+# --- Предкомпилированные сериализаторы ответов ---
+OrderReadListAdapter = TypeAdapter(list[OrderRead])
+AdminOrderReadListAdapter = TypeAdapter(list[AdminOrderRead])
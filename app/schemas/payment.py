@@ -1,6 +1,7 @@
 from datetime import datetime
+from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from app.models.payment import PaymentStatus
 
@@ -10,9 +11,13 @@ class PaymentRead(BaseModel):
     order_id: int
     amount_cents: int
     provider: str
-    provider_payment_id: str
+    provider_payment_id: Optional[str]
     status: PaymentStatus
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WebhookAck(BaseModel):
+    # False — повторная доставка: платёж уже был завершён
+    applied: bool
@@ -0,0 +1,23 @@
+from datetime import date, datetime
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+ReportGroupBy = Literal["day", "product", "category", "brand"]
+
+
+class SalesReportRow(BaseModel):
+    day: Optional[date] = Field(default=None, description="Для group_by=day")
+    id: Optional[int] = Field(default=None, description="id товара/категории/бренда; null — без категории/бренда")
+    name: Optional[str] = None
+    units: int
+    revenue_cents: int
+    orders: int
+
+
+class SalesReport(BaseModel):
+    date_from: date
+    date_to: date
+    group_by: ReportGroupBy
+    as_of: Optional[datetime] = Field(default=None, description="Изменения заказов учтены до этого момента")
+    rows: List[SalesReportRow]
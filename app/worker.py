@@ -0,0 +1,61 @@
+"""Outbox-воркер: побочные эффекты записей после commit (инвалидация кэшей и т.п.).
+
+    python -m app.worker
+
+Ждёт `NOTIFY outbox` на отдельном соединении и сразу разбирает готовые события
+пачками (см. `app.core.outbox.process_batch`). Если уведомлений нет, всё равно
+проверяет таблицу раз в `OUTBOX_POLL_INTERVAL` секунд — так подхватываются
+отложенные повторы и события, записанные, пока воркер был остановлен.
+Воркеров можно запускать несколько: пачки разбираются через SKIP LOCKED.
+"""
+
+import logging
+import signal
+import threading
+
+import psycopg
+
+import app.api.services.events  # noqa: F401  (регистрирует обработчики топиков)
+from app.core import outbox
+from app.core.config import settings
+from app.db import SessionLocal, get_engine
+
+logger = logging.getLogger("app.worker")
+
+
+def _listen_dsn() -> str:
+    # то же подключение, что у приложения, но без драйвера SQLAlchemy в схеме URL
+    return get_engine().url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def run(stop: threading.Event) -> None:
+    with psycopg.connect(_listen_dsn(), autocommit=True) as conn:
+        conn.execute(f"LISTEN {outbox.CHANNEL}")
+        logger.info("outbox worker started (batch=%d)", settings.outbox_batch_size)
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                n = outbox.drain(db)
+            except Exception:
+                logger.exception("outbox: batch failed")
+                db.rollback()
+                n = 0
+            finally:
+                db.close()
+            if n:
+                logger.debug("outbox: %d events processed", n)
+            # уведомления, пришедшие во время drain, тоже разбудят сразу
+            for _ in conn.notifies(timeout=settings.outbox_poll_interval, stop_after=1):
+                pass
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    run(stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Страница админских заказов: ORM-гидрация против колоночной проекции.
+
+Нужна БД с заказами (scripts/generate_synthetic_data.py --orders ...).
+
+    python -m benchmarks.admin_orders --page-size 1000 --iterations 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy.orm import selectinload
+
+from app.api.services.orders import get_order_rows
+from app.db import SessionLocal
+from app.models.order import Order
+from app.schemas.order import AdminOrderReadListAdapter
+
+
+def orm_page(db, limit: int, offset: int) -> bytes:
+    orders = (
+        db.query(Order)
+        .options(selectinload(Order.items))
+        .order_by(Order.created_at.desc(), Order.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return AdminOrderReadListAdapter.dump_json(AdminOrderReadListAdapter.validate_python(orders, from_attributes=True))
+
+
+def projection_page(db, limit: int, offset: int) -> bytes:
+    rows = get_order_rows(db, limit=limit, offset=offset, with_items=True)
+    return AdminOrderReadListAdapter.dump_json(AdminOrderReadListAdapter.validate_python(rows))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'path':<12} {'p50 ms':>9} {'p95 ms':>9} {'cpu ms':>9}")
+    for name, fn in (("orm", orm_page), ("projection", projection_page)):
+        wall, cpu = [], []
+        for i in range(args.iterations + 2):
+            db = SessionLocal()
+            try:
+                w, c = time.perf_counter(), time.process_time()
+                fn(db, args.page_size, (i % 5) * args.page_size)
+                if i >= 2:  # прогрев
+                    wall.append((time.perf_counter() - w) * 1000)
+                    cpu.append((time.process_time() - c) * 1000)
+            finally:
+                db.close()
+        wall.sort()
+        p95 = wall[max(0, int(len(wall) * 0.95) - 1)]
+        print(f"{name:<12} {statistics.median(wall):>9.1f} {p95:>9.1f} {statistics.median(cpu):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""История заказов и списки админки до и после переноса старых заказов в архив.
+
+Замеряет `get_order_rows` (тот же код, что у `/orders/me` и `/admin/orders`):
+
+* `user history` — вся история случайного пользователя;
+* `admin status` — страница из 50 заказов `status=new` со смещением до `--max-offset`, с позициями;
+* `admin page` — первая страница из 50 заказов без фильтра, с позициями;
+
+и размер `orders` / `order_items` / `payments` вместе с индексами. Затем (без `--measure-only`)
+переносит закрытые заказы старше `--months` месяцев в архив, печатает скорость переноса,
+делает VACUUM ANALYZE (`--vacuum-full` — VACUUM FULL) и замеряет снова.
+Перенос настоящий — запускайте на копии для бенчмарков:
+
+    python scripts/generate_synthetic_data.py --users 200000 --orders 3000000 --days 1095 --now now
+    python -m benchmarks.archive --months 12 --vacuum-full
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, text
+
+from app.api.services.archive import archive_cutoff, archive_orders
+from app.api.services.orders import get_order_rows
+from app.core.config import settings
+from app.db import SessionLocal, get_engine
+from app.models.order import Order, OrderStatus
+from benchmarks.harness import percentile
+
+TABLES = ("orders", "order_items", "payments")
+
+
+def _time(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)
+
+
+def _measure(args: argparse.Namespace, label: str) -> None:
+    db = SessionLocal()
+    try:
+        sizes = {t: db.scalar(text("SELECT pg_total_relation_size(CAST(:t AS regclass))"), {"t": t}) for t in TABLES}
+        lo, hi = db.execute(select(func.min(Order.user_id), func.max(Order.user_id))).one()
+        count = db.scalar(select(func.count()).select_from(Order))
+        rng = random.Random(42)
+
+        cases = {
+            "user history": lambda: get_order_rows(db, user_id=rng.randint(lo, hi)),
+            "admin status": lambda: get_order_rows(
+                db,
+                order_status=OrderStatus.NEW,
+                limit=50,
+                offset=rng.randrange(args.max_offset + 1),
+                with_items=True,
+            ),
+            "admin page": lambda: get_order_rows(db, limit=50, with_items=True),
+        }
+        print(f"\n{label}: {count} orders, " + ", ".join(f"{t} {sizes[t] / 2**20:.0f} MB" for t in TABLES))
+        print(f"{'query':<14} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, fn in cases.items():
+            samples = _time(fn, args.repeat)
+            print(f"{name:<14} {percentile(samples, 50):>8.2f} {percentile(samples, 95):>8.2f}")
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months", type=int, default=settings.orders_archive_after_months)
+    parser.add_argument("--batch-size", type=int, default=settings.orders_archive_batch_size)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--max-offset", type=int, default=1000)
+    parser.add_argument("--measure-only", action="store_true", help="Только замеры, без переноса")
+    parser.add_argument("--vacuum-full", action="store_true", help="VACUUM FULL вместо VACUUM: вернуть место ОС")
+    args = parser.parse_args()
+    settings.slow_query_ms = 10**9
+
+    _measure(args, "before")
+    if args.measure_only:
+        return
+
+    before = archive_cutoff(datetime.now(timezone.utc), args.months)
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        moved = archive_orders(db, before=before, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+    print(
+        f"\narchived {moved} orders created before {before:%Y-%m-%d} in {elapsed:.1f}s "
+        f"({moved / elapsed:.0f} orders/s, batch {args.batch_size})"
+    )
+
+    # VACUUM только помечает место удалённых строк для новых (в проде — autovacuum);
+    # файлы таблиц и индексов сжимает VACUUM FULL / pg_repack
+    vacuum = "VACUUM FULL ANALYZE" if args.vacuum_full else "VACUUM ANALYZE"
+    with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for t in TABLES:
+            conn.execute(text(f"{vacuum} {t}"))
+    _measure(args, "after")
+
+
+if __name__ == "__main__":
+    main()
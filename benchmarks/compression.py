@@ -0,0 +1,76 @@
+"""Микробенчмарк сжатия ответов: CPU на запрос против сэкономленных байт.
+
+Полезная нагрузка — страница листинга (по умолчанию 100 товаров) и страница
+админских заказов. Для каждого кодека/уровня печатает размер, коэффициент
+сжатия и CPU на одно сжатие.
+
+    python -m benchmarks.compression --iterations 500 --page-size 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable
+
+from app.schemas.order import AdminOrderReadListAdapter
+from benchmarks.serialization import PageAdapter, _cpu_us, _product
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+def _orders(n: int) -> list[dict]:
+    created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": i,
+            "user_id": i % 97,
+            "status": "confirmed",
+            "total_cents": 1999 * (i % 5 + 1),
+            "created_at": created,
+            "items": [
+                SimpleNamespace(id=i * 3 + k, product_id=i * 7 + k, quantity=k + 1, price_cents=1999) for k in range(3)
+            ],
+        }
+        for i in range(n)
+    ]
+
+
+def _codecs() -> list[tuple[str, Callable[[bytes], bytes]]]:
+    codecs = [(f"gzip-{level}", lambda b, level=level: gzip.compress(b, level, mtime=0)) for level in (1, 6, 9)]
+    if brotli is not None:
+        codecs += [(f"br-{q}", lambda b, q=q: brotli.compress(b, quality=q)) for q in (1, 4, 6)]
+    return codecs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--orders", type=int, default=1000, help="размер админской страницы заказов")
+    args = parser.parse_args()
+
+    items = [_product(i) for i in range(args.page_size)]
+    page = {"total": 10_000, "limit": args.page_size, "offset": 0, "items": items}
+    listing = PageAdapter.dump_json(PageAdapter.validate_python(page, from_attributes=True))
+    orders = AdminOrderReadListAdapter.dump_json(
+        AdminOrderReadListAdapter.validate_python(_orders(args.orders), from_attributes=True)
+    )
+
+    print(f"{'payload':<14} {'codec':<12} {'bytes':>9} {'ratio':>7} {'cpu us/req':>11} {'saved KB/ms cpu':>16}")
+    for name, payload in (("listing", listing), ("admin orders", orders)):
+        print(f"{name:<14} {'identity':<12} {len(payload):>9} {1.0:>7.2f} {0.0:>11.1f} {'-':>16}")
+        for codec, fn in _codecs():
+            size = len(fn(payload))
+            cpu = _cpu_us(lambda: fn(payload), args.iterations)
+            saved_kb_per_ms = (len(payload) - size) / 1024 / max(cpu / 1000, 1e-6)
+            print(f"{name:<14} {codec:<12} {size:>9} {len(payload) / size:>7.2f} {cpu:>11.1f} {saved_kb_per_ms:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Фасеты листинга: один GROUPING SETS против отдельных запросов.
+
+* `grouping_sets` — то, что выполняет `GET /products/facets`;
+* `three_group_by` — три отдельных GROUP BY (бренды, категории, цены) + count(*);
+* `count_per_value` — «как раньше»: count(*) с фильтром на каждое значение фасета
+  (по `--values` самых частых брендов и категорий и по каждому ценовому диапазону).
+
+Фильтры — случайные наборы из тех же параметров, что у листинга. Каталог
+на 1M товаров:
+
+    python scripts/generate_synthetic_data.py --products 1000000 --workers 8
+    python -m benchmarks.facets --iterations 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from typing import Callable
+
+from sqlalchemy import func, select
+
+from app.api.services.catalog import PRICE_BUCKETS, listing_filters, product_facets
+from app.db import SessionLocal
+from app.models.catalog import Product
+from benchmarks.harness import percentile
+
+
+def three_group_by(db, filters: list) -> None:
+    bucket = func.width_bucket(Product.price_cents, list(PRICE_BUCKETS))
+    for column in (Product.brand_id, Product.category_id, bucket):
+        db.execute(select(column, func.count()).where(*filters).group_by(column)).all()
+    db.scalar(select(func.count()).select_from(select(Product.id).where(*filters).subquery()))
+
+
+def count_per_value(db, filters: list, brand_ids: list[int], category_ids: list[int]) -> None:
+    def count(*extra) -> int:
+        return db.scalar(select(func.count()).select_from(select(Product.id).where(*filters, *extra).subquery()))
+
+    count()
+    for bid in brand_ids:
+        count(Product.brand_id == bid)
+    for cid in category_ids:
+        count(Product.category_id == cid)
+    edges = (*PRICE_BUCKETS, None)
+    for lo, hi in zip(edges, edges[1:]):
+        count(Product.price_cents >= lo, *((Product.price_cents < hi,) if hi is not None else ()))
+
+
+def _top(db, column, n: int) -> list[int]:
+    stmt = select(column).where(column.is_not(None)).group_by(column).order_by(func.count().desc()).limit(n)
+    return list(db.scalars(stmt))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--values", type=int, default=20, help="значений фасета для count_per_value")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        n_products = db.scalar(select(func.count()).select_from(Product))
+        brand_ids = _top(db, Product.brand_id, args.values)
+        category_ids = _top(db, Product.category_id, args.values)
+        rng = random.Random(args.seed)
+
+        def random_filters() -> list:
+            return listing_filters(
+                q=rng.choice((None, None, "a", "pro")),
+                category_id=rng.choice((None, *category_ids[:5])),
+                brand_id=rng.choice((None, None, *brand_ids[:5])),
+                min_price=rng.choice((None, 1_000)),
+                max_price=rng.choice((None, 50_000)),
+            )
+
+        paths: list[tuple[str, Callable[[list], object]]] = [
+            ("grouping_sets", lambda f: product_facets(db, f)),
+            ("three_group_by", lambda f: three_group_by(db, f)),
+            ("count_per_value", lambda f: count_per_value(db, f, brand_ids, category_ids)),
+        ]
+        print(f"products: {n_products}")
+        print(f"{'path':<16} {'p50 ms':>9} {'p95 ms':>9}")
+        for name, fn in paths:
+            rng.seed(args.seed)  # одинаковые наборы фильтров для всех вариантов
+            fn(random_filters())  # прогрев
+            wall = []
+            for _ in range(args.iterations):
+                filters = random_filters()
+                start = time.perf_counter()
+                fn(filters)
+                wall.append((time.perf_counter() - start) * 1000)
+            wall.sort()
+            print(f"{name:<16} {statistics.median(wall):>9.1f} {percentile(wall, 95):>9.1f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Нагрузочный раннер: асинхронные воркеры поверх httpx, сбор латентностей и сравнение с baseline."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import platform
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+# (method, url, kwargs для httpx.AsyncClient.request)
+RequestSpec = tuple[str, str, dict[str, Any]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[Any, random.Random], RequestSpec]
+    # Необязательная подготовка перед каждым запросом (не входит в замер),
+    # например создание заказа, который потом оплачивается.
+    prepare: Optional[Callable[[httpx.AsyncClient, Any, random.Random], Awaitable[dict[str, Any]]]] = None
+    expected: tuple[int, ...] = (200,)
+    tags: tuple[str, ...] = ()
+
+
+@dataclass
+class Result:
+    name: str
+    requests: int
+    errors: int
+    duration_s: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    cpu_ms_per_req: Optional[float] = None
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank перцентиль по уже отсортированному списку."""
+    if not sorted_values:
+        return 0.0
+    # rank = ceil(p * n / 100): round() ошибался на 1, когда p * n / 100 — нечётное целое (банковское округление)
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct * len(sorted_values) / 100) - 1))
+    return sorted_values[k]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    ctx: Any,
+    *,
+    concurrency: int,
+    duration: float,
+    max_requests: Optional[int],
+    warmup: int,
+    seed: int,
+    measure_cpu: bool,
+) -> Result:
+    rng = random.Random(f"{seed}:{scenario.name}")
+
+    async def one(timed: bool, latencies: list[float]) -> bool:
+        method, url, kwargs = scenario.build(ctx, rng)
+        if scenario.prepare is not None:
+            kwargs = {**kwargs, **await scenario.prepare(client, ctx, rng)}
+            url = url.format(**kwargs.pop("path_params", {}))
+        start = time.perf_counter()
+        resp = await client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+        if timed:
+            latencies.append(elapsed)
+        return resp.status_code in scenario.expected
+
+    for _ in range(warmup):
+        await one(False, [])
+
+    latencies: list[float] = []
+    errors = 0
+    issued = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        nonlocal errors, issued
+        while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+            issued += 1
+            if not await one(True, latencies):
+                errors += 1
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    ordered = sorted(latencies)
+    n = len(ordered)
+    return Result(
+        name=scenario.name,
+        requests=n,
+        errors=errors,
+        duration_s=round(wall, 3),
+        rps=round(n / wall, 2) if wall else 0.0,
+        p50_ms=round(percentile(ordered, 50) * 1000, 3),
+        p95_ms=round(percentile(ordered, 95) * 1000, 3),
+        p99_ms=round(percentile(ordered, 99) * 1000, 3),
+        max_ms=round((ordered[-1] if ordered else 0.0) * 1000, 3),
+        # CPU процесса имеет смысл только в in-process режиме (сервер в том же процессе)
+        cpu_ms_per_req=round(cpu / n * 1000, 3) if measure_cpu and n else None,
+    )
+
+
+def print_table(results: list[Result]) -> None:
+    header = f"{'scenario':<32} {'req':>7} {'err':>5} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'cpu/req':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        cpu = f"{r.cpu_ms_per_req:.3f}" if r.cpu_ms_per_req is not None else "-"
+        print(
+            f"{r.name:<32} {r.requests:>7} {r.errors:>5} {r.rps:>9.1f} "
+            f"{r.p50_ms:>9.2f} {r.p95_ms:>9.2f} {r.p99_ms:>9.2f} {cpu:>9}"
+        )
+
+
+def save_results(path: Path, results: list[Result], meta: dict[str, Any]) -> None:
+    payload = {
+        "meta": {
+            **meta,
+            "created_at": datetime.now(tz=timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": {r.name: asdict(r) for r in results},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n")
+
+
+def compare(results: list[Result], baseline_path: Path, threshold: float) -> list[str]:
+    """Регрессии относительно baseline: p95 выросла или rps упал больше, чем на threshold."""
+    baseline = json.loads(baseline_path.read_text())["results"]
+    problems = []
+    for r in results:
+        base = baseline.get(r.name)
+        if not base:
+            continue
+        if base["p95_ms"] and r.p95_ms > base["p95_ms"] * (1 + threshold):
+            problems.append(f"{r.name}: p95 {r.p95_ms:.2f}ms > baseline {base['p95_ms']:.2f}ms (+{threshold:.0%})")
+        if base["rps"] and r.rps < base["rps"] * (1 - threshold):
+            problems.append(f"{r.name}: rps {r.rps:.1f} < baseline {base['rps']:.1f} (-{threshold:.0%})")
+        if r.errors and not base.get("errors"):
+            problems.append(f"{r.name}: {r.errors} errors (baseline had none)")
+    return problems
@@ -0,0 +1,173 @@
+"""Память Redis под кэш листингов: целые страницы против списков id + элементов товаров.
+
+Строит `--keys` разных страниц листинга (категории/бренды/сортировки/смещения/размеры
+страниц, как у реального трафика) по данным из Postgres и кладёт их в Redis двумя способами:
+
+* `pages` — как раньше: JSON всей страницы, его ETag и gzip-копия на каждый ключ;
+* `ids+cards` — `{"total", "ids"}` и ETag с версией элементов на ключ, по одному элементу
+  на товар (`product:{id}:card`), общему для всех страниц, и gzip-копии только у
+  `--hot` процентов страниц (популярные листинги).
+
+Память — сумма `MEMORY USAGE` по ключам. Затем замеряет горячее попадание: GET тела
+и ETag против GET списка id + MGET элементов + склейки тела, и условный запрос
+(`lookup_page`: один MGET). Ключи за собой удаляет.
+
+    python -m benchmarks.listing_cache --keys 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import random
+import time
+
+from sqlalchemy import func, select
+from starlette.requests import Request
+
+from app.api.services.catalog import (
+    LISTING_ORDER,
+    ListingParams,
+    build_listing,
+    listing_body,
+    listing_page,
+    store_listing,
+)
+from app.core.cache import (
+    CATALOG_CARDS_VERSION_KEY,
+    PRODUCTS_LIST_TTL,
+    etag_key,
+    get_redis,
+    gzip_key,
+    product_card_key,
+)
+from app.core.config import settings
+from app.core.http_cache import lookup_page, make_etag, store_page
+from app.db import SessionLocal
+from app.models.catalog import Product
+from benchmarks.harness import percentile
+
+PREFIX = "bench:listing"
+
+
+def _params(db, n: int, seed: int) -> list[ListingParams]:
+    def top(column) -> list[int]:
+        return list(db.scalars(select(column).group_by(column).order_by(func.count().desc()).limit(50)))
+
+    categories, brands = top(Product.category_id), top(Product.brand_id)
+    rng = random.Random(seed)
+    params: set[ListingParams] = set()
+    while len(params) < n:
+        limit = rng.choice((20, 20, 20, 50, 100))
+        # в основном один фильтр: категория, бренд или весь каталог; оба сразу — реже
+        kind = rng.choices(("category", "brand", "none", "both"), weights=(4, 3, 2, 1))[0]
+        params.add(
+            ListingParams(
+                category_id=rng.choice(categories) if kind in ("category", "both") else None,
+                brand_id=rng.choice(brands) if kind in ("brand", "both") else None,
+                sort=rng.choice(tuple(LISTING_ORDER)),
+                limit=limit,
+                offset=limit * rng.choice((0, 0, 0, 1, 2, 3)),
+            )
+        )
+    return sorted(params, key=repr)
+
+
+def _memory(r, keys: list[str]) -> int:
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.memory_usage(key, samples=0)
+    return sum(n or 0 for n in pipe.execute())
+
+
+def _time(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--hot", type=float, default=5, help="Процент страниц с gzip-копией (популярные)")
+    args = parser.parse_args()
+    settings.slow_query_ms = 10**9
+
+    r = get_redis()
+    db = SessionLocal()
+    old_keys: list[str] = []
+    new_keys: list[str] = []
+    card_keys: list[str] = []
+    try:
+        params = _params(db, args.keys, args.seed)
+        pages = {f"{PREFIX}:{i}": (p, *build_listing(db, p)) for i, p in enumerate(params)}
+
+        # как раньше: тело, ETag и gzip-копия (от COMPRESSION_MIN_SIZE байт) на каждый ключ
+        pipe = r.pipeline(transaction=False)
+        for key, (p, total, cards) in pages.items():
+            body = listing_body(p, total, cards.values())
+            old = f"{key}:page"
+            pipe.setex(old, PRODUCTS_LIST_TTL, body)
+            pipe.setex(etag_key(old), PRODUCTS_LIST_TTL, make_etag(body))
+            old_keys += [old, etag_key(old)]
+            if len(body) >= settings.compression_min_size:
+                pipe.setex(f"{old}:gz", PRODUCTS_LIST_TTL, gzip.compress(body, settings.gzip_level, mtime=0))
+                old_keys.append(f"{old}:gz")
+        pipe.execute()
+
+        # сейчас: total + id и ETag на ключ, элементы — по одному на товар, gzip — у популярных
+        version = r.get(CATALOG_CARDS_VERSION_KEY) or b"0"
+        hot = set(random.Random(args.seed).sample(list(pages), int(len(pages) * args.hot / 100)))
+        etags: dict[str, str] = {}
+        product_ids: set[int] = set()
+        for key, (p, total, cards) in pages.items():
+            store_listing(key, total, cards, cards)
+            body = listing_body(p, total, cards.values())
+            etags[key] = store_page(key, version, body, PRODUCTS_LIST_TTL, precompress=key in hot).etag
+            new_keys += [key, etag_key(key)]
+            if key in hot and len(body) >= settings.compression_min_size:
+                new_keys.append(gzip_key(key))
+            product_ids.update(cards)
+        card_keys = [product_card_key(pid) for pid in product_ids]
+
+        items = sum(len(cards) for _, _, cards in pages.values())
+        old_mem = _memory(r, old_keys)
+        new_mem = _memory(r, new_keys) + _memory(r, card_keys)
+        print(f"{len(pages)} listing keys, {items} items, {len(product_ids)} distinct products")
+        print(f"{'layout':<10} {'redis keys':>10} {'memory MB':>10} {'bytes/key':>10}")
+        print(f"{'pages':<10} {len(old_keys):>10} {old_mem / 2**20:>10.1f} {old_mem / len(pages):>10.0f}")
+        print(
+            f"{'ids+cards':<10} {len(new_keys) + len(card_keys):>10} {new_mem / 2**20:>10.1f} "
+            f"{new_mem / len(pages):>10.0f}"
+        )
+
+        rng = random.Random(args.seed)
+        keys = list(pages)
+
+        def conditional(key: str):
+            scope = {"type": "http", "headers": [(b"if-none-match", etags[key].encode())]}
+            return lookup_page(Request(scope), key, CATALOG_CARDS_VERSION_KEY, ()).response
+
+        cases = {
+            "pages": lambda: r.mget(f"{(key := rng.choice(keys))}:page", etag_key(f"{key}:page")),
+            "ids+cards": lambda: make_etag(listing_page(db, pages[(key := rng.choice(keys))][0], key)[0]),
+            "304": lambda: conditional(rng.choice(keys)),
+        }
+        print(f"\n{'hot hit':<10} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, fn in cases.items():
+            samples = _time(fn, args.repeat)
+            print(f"{name:<10} {percentile(samples, 50):>8.3f} {percentile(samples, 95):>8.3f}")
+    finally:
+        db.close()
+        for batch in (old_keys, new_keys, card_keys):
+            for i in range(0, len(batch), 1000):
+                r.delete(*batch[i : i + 1000])
+
+
+if __name__ == "__main__":
+    main()
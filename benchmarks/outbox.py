@@ -0,0 +1,101 @@
+"""Пропускная способность outbox-воркера, событий/сек.
+
+Кладёт `--events` событий в `outbox_events` и разбирает их `outbox.drain`
+в `--workers` потоков (каждый со своей сессией — как несколько процессов
+`app.worker`, SKIP LOCKED делит пачки между ними) для каждого размера пачки.
+
+* `noop` — обработчик ничего не делает: стоимость самой очереди (SELECT ... FOR UPDATE
+  SKIP LOCKED + DELETE пачкой);
+* `cache.invalidate` — реальный обработчик инвалидации кэша каталога (запросы в Redis).
+
+    python -m benchmarks.outbox --events 20000 --batch-sizes 1 10 100 500 --workers 1 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+
+from sqlalchemy import delete, insert
+
+import app.api.services.events as events
+from app.core import outbox
+from app.db import SessionLocal
+from app.models.outbox import OutboxEvent
+
+NOOP_TOPIC = "bench.noop"
+
+
+@outbox.handler(NOOP_TOPIC)
+def _noop(payload: dict) -> None:
+    pass
+
+
+def _fill(topic: str, n: int) -> None:
+    payload = (
+        {"listings": False, "product_ids": [1], "categories": False, "brands": False}
+        if topic == events.CACHE_INVALIDATE
+        else {}
+    )
+    db = SessionLocal()
+    try:
+        for start in range(0, n, 5_000):
+            db.execute(insert(OutboxEvent), [{"topic": topic, "payload": payload}] * min(5_000, n - start))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _run(workers: int, batch_size: int) -> float:
+    def work() -> None:
+        db = SessionLocal()
+        try:
+            outbox.drain(db, batch_size)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--topics", nargs="+", default=[NOOP_TOPIC, events.CACHE_INVALIDATE])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        # чужие события не должны попасть в замер (и не должны быть потеряны — только предупреждаем)
+        pending = db.query(OutboxEvent).count()
+    finally:
+        db.close()
+    if pending:
+        print(f"warning: {pending} events already in outbox_events, they will be processed too")
+
+    print(f"{'topic':<18} {'workers':>7} {'batch':>6} {'events/s':>10}")
+    for topic in args.topics:
+        for workers in args.workers:
+            for batch_size in args.batch_sizes:
+                _fill(topic, args.events)
+                elapsed = _run(workers, batch_size)
+                print(f"{topic:<18} {workers:>7} {batch_size:>6} {args.events / elapsed:>10.0f}")
+
+    db = SessionLocal()
+    try:
+        db.execute(delete(OutboxEvent).where(OutboxEvent.topic == NOOP_TOPIC))
+        db.commit()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
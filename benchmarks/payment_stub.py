@@ -0,0 +1,107 @@
+"""Локальная заглушка платёжного провайдера для нагрузочных тестов (`PAYMENT_PROVIDER=http`).
+
+* `POST /v1/charges` — отвечает через `--latency-ms` (± `--jitter-ms`) статусом `pending`;
+  повтор с тем же `Idempotency-Key` возвращает тот же платёж; с вероятностью
+  `--error-rate` отвечает 503 (проверка повторов клиента);
+* через `--webhook-delay-ms` шлёт подписанный вебхук на `--webhook-url`
+  (`payment.succeeded`, с вероятностью `--fail-rate` — `payment.failed`),
+  с вероятностью `--duplicate-rate` — дважды (проверка идемпотентности).
+
+    export PAYMENT_WEBHOOK_SECRET=local-secret  # с PAYMENT_PROVIDER=http значение по умолчанию API не примет
+    python -m benchmarks.payment_stub --port 8090 --latency-ms 300 \\
+        --webhook-url http://127.0.0.1:8000/payments/webhook
+    PAYMENT_PROVIDER=http PAYMENT_API_URL=http://127.0.0.1:8090 make run
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from uuid import uuid4
+
+import httpx
+import orjson
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.api.services.payment_gateway import sign_webhook
+from app.core.config import settings
+
+
+def build_app(args: argparse.Namespace) -> Starlette:
+    charges: dict[str, dict] = {}
+    tasks: set[asyncio.Task] = set()
+    client = httpx.AsyncClient(timeout=10)
+
+    async def deliver(charge: dict, reference: str) -> None:
+        await asyncio.sleep(args.webhook_delay_ms / 1000)
+        failed = random.random() < args.fail_rate
+        body = orjson.dumps(
+            {
+                "id": f"evt_{uuid4().hex}",
+                "type": "payment.failed" if failed else "payment.succeeded",
+                "payment_id": charge["id"],
+                "reference": reference,
+            }
+        )
+        copies = 2 if random.random() < args.duplicate_rate else 1
+        for _ in range(copies):
+            for attempt in range(5):
+                ts = int(time.time())
+                headers = {
+                    "content-type": "application/json",
+                    "x-signature-timestamp": str(ts),
+                    "x-signature": sign_webhook(body, ts, args.webhook_secret),
+                }
+                try:
+                    r = await client.post(args.webhook_url, content=body, headers=headers)
+                    if r.status_code < 500:
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.5 * 2**attempt)
+
+    async def create_charge(request: Request) -> JSONResponse:
+        await asyncio.sleep(max(0.0, args.latency_ms + random.uniform(-args.jitter_ms, args.jitter_ms)) / 1000)
+        if random.random() < args.error_rate:
+            return JSONResponse({"error": "temporarily unavailable"}, status_code=503)
+
+        key = request.headers.get("idempotency-key") or uuid4().hex
+        if key in charges:
+            return JSONResponse(charges[key])
+        payload = await request.json()
+        charge = charges[key] = {"id": f"stub_{uuid4().hex}", "status": "pending"}
+        if args.webhook_url:
+            task = asyncio.create_task(deliver(charge, payload.get("reference")))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        return JSONResponse(charge, status_code=201)
+
+    return Starlette(routes=[Route("/v1/charges", create_charge, methods=["POST"])])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--webhook-url", default="", help="Пусто — вебхуки не отправляются")
+    parser.add_argument(
+        "--webhook-secret", default=settings.payment_webhook_secret, help="Тот же, что PAYMENT_WEBHOOK_SECRET у API"
+    )
+    parser.add_argument("--webhook-delay-ms", type=float, default=500)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(build_app(args), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Пропускная способность `POST /orders/{id}/pay` при медленном провайдере.
+
+Поднимает `benchmarks.payment_stub` с задержкой `--latency-ms` и оплачивает `--orders`
+заказов с `--concurrency` одновременно (in-process, httpx.ASGITransport):
+
+* `async` — `HttpPaymentGateway`: ответ провайдера ждём в event loop;
+* `blocking` — тот же вызов синхронным httpx.Client в threadpool, как если бы весь
+  эндпоинт оставался sync: каждый платёж держит поток (по умолчанию их 40) всё время
+  ответа провайдера, так что пропускная способность упирается в 40 / latency.
+
+    python -m benchmarks.payments --latency-ms 3000 --orders 300 --concurrency 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+import httpx
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+
+import app.api.services.payments as payments
+from app.api.services.payment_gateway import Charge, HttpPaymentGateway, PaymentStatus
+from app.core.config import settings
+from app.db import SessionLocal
+from app.main import app
+from app.models.order import Order, OrderStatus
+from app.models.user import User
+from benchmarks.harness import percentile
+from benchmarks.run import _free_port
+from benchmarks.scenarios import setup_context
+
+
+class BlockingGateway(HttpPaymentGateway):
+    def __init__(self, base_url: str):
+        super().__init__(base_url)
+        self._sync = httpx.Client(base_url=base_url, timeout=10, limits=self._limits)
+
+    async def create_charge(self, *, reference: int, amount_cents: int) -> Charge:
+        def call() -> dict:
+            r = self._sync.post(
+                "/v1/charges",
+                json={"amount_cents": amount_cents, "reference": str(reference)},
+                headers={"Idempotency-Key": f"payment-{reference}"},
+            )
+            r.raise_for_status()
+            return r.json()
+
+        data = await run_in_threadpool(call)
+        return Charge(provider_payment_id=data["id"], status=PaymentStatus.PENDING)
+
+
+def _make_orders(email: str, n: int) -> list[int]:
+    db = SessionLocal()
+    try:
+        user_id = db.query(User.id).filter_by(email=email).scalar()
+        rows = [{"user_id": user_id, "status": OrderStatus.NEW, "total_cents": 1000}] * n
+        ids = list(db.scalars(insert(Order).returning(Order.id), rows))
+        db.commit()
+        return ids
+    finally:
+        db.close()
+
+
+async def _run(mode: str, stub_url: str, args: argparse.Namespace) -> None:
+    if mode == "async":
+        gateway = HttpPaymentGateway(stub_url, max_connections=args.concurrency)
+    else:
+        gateway = BlockingGateway(stub_url)
+    payments.get_gateway = lambda: gateway
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", limits=limits) as c:
+        ctx = await setup_context(c)
+        queue = _make_orders(ctx.email, args.orders)
+        latencies: list[float] = []
+        errors = 0
+
+        async def worker() -> None:
+            nonlocal errors
+            while queue:
+                order_id = queue.pop()
+                start = time.perf_counter()
+                r = await c.post(f"/orders/{order_id}/pay", headers=ctx.auth)
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += r.status_code != 201
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        wall = time.perf_counter() - start
+    latencies.sort()
+    print(
+        f"{mode:<9} {args.orders / wall:>8.1f} {percentile(latencies, 50):>9.0f}"
+        f" {percentile(latencies, 99):>9.0f} {errors:>7}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--orders", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--modes", nargs="+", default=["async", "blocking"])
+    args = parser.parse_args()
+    settings.rate_limit_enabled = False
+    settings.slow_query_ms = 10**9
+
+    port = _free_port()
+    stub = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.payment_stub",
+            "--port",
+            str(port),
+            "--latency-ms",
+            str(args.latency_ms),
+            "--jitter-ms",
+            "0",
+        ]
+    )
+    try:
+        stub_url = f"http://127.0.0.1:{port}"
+        for _ in range(100):
+            try:
+                httpx.post(f"{stub_url}/v1/charges", json={})
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        print(f"provider latency {args.latency_ms:.0f} ms, {args.orders} orders, concurrency {args.concurrency}")
+        print(f"{'mode':<9} {'pays/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for mode in args.modes:
+            asyncio.run(_run(mode, stub_url, args))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Накладные расходы rate limiter'а.
+
+* `local` — ведро в памяти процесса (фолбэк);
+* `redis` — Lua-скрипт в Redis, последовательно и `--concurrency` проверок одновременно;
+* `GET /` — весь стек приложения in-process (httpx.ASGITransport) с лимитером и без
+  (лимиты заведомо не срабатывают — меряется только стоимость проверки).
+
+    python -m benchmarks.ratelimit --iterations 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.core.ratelimit import LocalBuckets, RateLimiter, Rule
+from app.main import app
+
+
+async def _redis(limiter: RateLimiter, rule: Rule, n: int, concurrency: int) -> float:
+    keys = [f"rl:bench:{i}" for i in range(concurrency)]
+
+    async def worker(key: str) -> None:
+        for _ in range(n // concurrency):
+            await limiter.hit(key, rule)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(k) for k in keys))
+    return (time.perf_counter() - start) / n * 1e6
+
+
+async def _app(n: int) -> float:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await client.get("/")
+        start = time.perf_counter()
+        for _ in range(n):
+            await client.get("/")
+        return (time.perf_counter() - start) / n * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    n = args.iterations
+    rule = Rule.parse(f"{n * 10}/1")
+
+    buckets = LocalBuckets()
+    start = time.perf_counter()
+    for _ in range(n):
+        buckets.hit("bench", rule)
+    local_us = (time.perf_counter() - start) / n * 1e6
+
+    limiter = RateLimiter(settings.redis_url)
+    print(f"{'path':<28} {'us/check':>9}")
+    print(f"{'local bucket':<28} {local_us:>9.1f}")
+    print(f"{'redis lua, sequential':<28} {asyncio.run(_redis(limiter, rule, n, 1)):>9.1f}")
+    label = f"redis lua, {args.concurrency} concurrent"
+    print(f"{label:<28} {asyncio.run(_redis(limiter, rule, n, args.concurrency)):>9.1f}")
+
+    settings.rate_limit_default = f"{n * 10}/1"
+    for enabled in (False, True):
+        settings.rate_limit_enabled = enabled
+        label = f"GET / limiter {'on' if enabled else 'off'}"
+        print(f"{label:<28} {asyncio.run(_app(n)):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
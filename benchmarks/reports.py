@@ -0,0 +1,101 @@
+"""Отчёт по продажам: ad hoc агрегация по orders/order_items против дневных роллапов.
+
+Сначала полностью пересобирает `sales_daily` (время печатается), затем для каждого
+`--days` и группировки сравнивает:
+
+* `ad hoc` — тот же GROUP BY по `order_items ⋈ orders ⋈ products` за период (как без роллапов);
+* `rollup` — `reports.sales_report` (только `sales_daily`);
+
+и время инкрементального прогона, когда изменился один заказ.
+
+    python -m benchmarks.reports --days 30 365 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, update
+
+from app.api.services.reports import refresh_sales_rollups, sales_report
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models.catalog import Product
+from app.models.order import Order, OrderItem, OrderStatus
+from benchmarks.harness import percentile
+
+KEYS = {"product": OrderItem.product_id, "category": Product.category_id, "brand": Product.brand_id}
+
+
+def _adhoc(db, date_from, date_to, group_by: str):
+    key = KEYS[group_by]
+    revenue = func.sum(OrderItem.price_cents * OrderItem.quantity)
+    stmt = (
+        select(key, func.sum(OrderItem.quantity), revenue, func.count(OrderItem.order_id.distinct()))
+        .join(Order, Order.id == OrderItem.order_id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(
+            Order.status != OrderStatus.CANCELED,
+            Order.created_at >= datetime.combine(date_from, datetime.min.time(), timezone.utc),
+            Order.created_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time(), timezone.utc),
+        )
+        .group_by(key)
+        .order_by(revenue.desc())
+        .limit(100)
+    )
+    return db.execute(stmt).all()
+
+
+def _time(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 365])
+    parser.add_argument("--group-by", nargs="+", default=["product", "brand"])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    settings.slow_query_ms = 10**9  # ad hoc запросы заведомо медленные — не засоряем вывод
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        days = refresh_sales_rollups(db, full=True)
+        print(f"full rebuild: {days} days in {time.perf_counter() - start:.2f}s")
+
+        # один «изменённый» заказ — инкрементальный прогон пересчитывает только его день
+        order_id = db.scalar(select(func.max(Order.id)))
+        db.execute(update(Order).where(Order.id == order_id).values(updated_at=func.now()))
+        db.commit()
+        start = time.perf_counter()
+        days = refresh_sales_rollups(db)
+        print(f"incremental:  {days} day(s) in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+        today = datetime.now(timezone.utc).date()
+        print(f"{'days':>5} {'group_by':<9} {'ad hoc p50':>11} {'p95':>8} {'rollup p50':>11} {'p95':>8}")
+        for n in args.days:
+            date_from = today - timedelta(days=n - 1)
+            for group_by in args.group_by:
+                adhoc = _time(lambda: _adhoc(db, date_from, today, group_by), args.repeat)
+                rollup = _time(
+                    lambda: sales_report(db, date_from=date_from, date_to=today, group_by=group_by, limit=100),
+                    args.repeat,
+                )
+                print(
+                    f"{n:>5} {group_by:<9} {percentile(adhoc, 50):>11.1f} {percentile(adhoc, 95):>8.1f}"
+                    f" {percentile(rollup, 50):>11.1f} {percentile(rollup, 95):>8.1f}"
+                )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""CLI бенчмарков.
+
+Примеры:
+    # ASGI-приложение в том же процессе (без сети), все сценарии
+    python -m benchmarks.run --mode inprocess
+
+    # настоящий uvicorn (поднимается раннером), только листинги, сохранить baseline
+    python -m benchmarks.run --mode server --only products --save benchmarks/baselines/server.json
+
+    # уже запущенный сервер + проверка регрессий (exit 1, если хуже baseline больше чем на 15%)
+    python -m benchmarks.run --mode server --url http://localhost:8000 \
+        --baseline benchmarks/baselines/server.json --threshold 0.15
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from benchmarks.harness import Result, compare, print_table, run_scenario, save_results
+from benchmarks.scenarios import build_scenarios, setup_context
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def _server(workers: int, extra_args: list[str], server: str = "uvicorn"):
+    port = _free_port()
+    if server == "gunicorn":
+        # тот же конфиг, что и в продакшене (preload, post_fork), только порт и число воркеров свои
+        cmd = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "gunicorn.conf.py",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            *extra_args,
+            "app.main:app",
+        ]
+    else:
+        cmd = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+            *extra_args,
+        ]
+    # нагрузка идёт с одного IP — лимиты запросов в бенчмарке выключены
+    env = {**os.environ, "PYTHONPATH": os.getcwd(), "RATE_LIMIT_ENABLED": "false"}
+    proc = subprocess.Popen(cmd, env=env)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{url}/healthz", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if proc.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"{server} did not start")
+            time.sleep(0.2)
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+@contextlib.asynccontextmanager
+async def _client(args: argparse.Namespace) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.mode == "inprocess":
+        from app.core.config import settings
+        from app.main import app
+
+        settings.rate_limit_enabled = False
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            yield client
+    elif args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+            yield client
+    else:
+        with _server(args.workers, args.uvicorn_arg, args.server) as url:
+            async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+                yield client
+
+
+async def _main(args: argparse.Namespace) -> list[Result]:
+    scenarios = build_scenarios()
+    if args.only:
+        scenarios = [s for s in scenarios if any(o == s.name or o in s.tags for o in args.only)]
+
+    results = []
+    async with _client(args) as client:
+        ctx = await setup_context(client)
+        for scenario in scenarios:
+            result = await run_scenario(
+                client,
+                scenario,
+                ctx,
+                concurrency=args.concurrency,
+                duration=args.duration,
+                max_requests=args.requests,
+                warmup=args.warmup,
+                seed=args.seed,
+                measure_cpu=args.mode == "inprocess",
+            )
+            results.append(result)
+            if args.verbose:
+                print(f"{result.name}: {result.rps:.1f} rps, p95 {result.p95_ms:.2f}ms")
+    return results
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("inprocess", "server"), default="inprocess")
+    parser.add_argument("--url", help="Бенчмаркать уже запущенный сервер вместо запуска uvicorn")
+    parser.add_argument("--server", choices=("uvicorn", "gunicorn"), default="uvicorn", help="Сервер (режим server)")
+    parser.add_argument("--workers", type=int, default=1, help="Число воркеров (режим server)")
+    parser.add_argument("--uvicorn-arg", action="append", default=[], help="Доп. аргумент для uvicorn/gunicorn")
+    parser.add_argument("--only", nargs="*", help="Имена сценариев или теги (products, detail, orders, ...)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0, help="Секунд на сценарий")
+    parser.add_argument("--requests", type=int, default=None, help="Лимит запросов на сценарий")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", type=Path, help="Сохранить результаты как JSON baseline")
+    parser.add_argument("--baseline", type=Path, help="Сравнить с сохранённым baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Допустимая деградация (доля)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(_main(args))
+    print_table(results)
+
+    if args.save:
+        save_results(
+            args.save,
+            results,
+            {
+                "mode": args.mode,
+                "server": args.server,
+                "workers": args.workers,
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+            },
+        )
+        print(f"saved: {args.save}")
+
+    if args.baseline:
+        problems = compare(results, args.baseline, args.threshold)
+        if problems:
+            print("\nRegressions:")
+            for p in problems:
+                print(f"  - {p}")
+            return 1
+        print(f"\nNo regressions vs {args.baseline} (threshold {args.threshold:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
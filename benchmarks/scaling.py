@@ -0,0 +1,68 @@
+"""Масштабирование пропускной способности по числу воркеров gunicorn.
+
+Для каждого `--workers` поднимает `gunicorn -c gunicorn.conf.py` (preload + UvicornWorker)
+и гоняет сценарии раннера с одинаковой конкуренцией. Нагрузку даёт один процесс
+на asyncio — на малом числе ядер он сам может стать узким местом, поэтому
+смотрите и на `client cpu %` (загрузку процесса-генератора).
+
+    python -m benchmarks.scaling --workers 1 2 4 8 --only products_hot product_detail --concurrency 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from benchmarks.harness import run_scenario
+from benchmarks.run import _server
+from benchmarks.scenarios import build_scenarios, setup_context
+
+
+async def _measure(url: str, names: list[str], concurrency: int, duration: float) -> list[tuple[str, float, float]]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        ctx = await setup_context(client)
+        rows = []
+        for scenario in (s for s in build_scenarios() if s.name in names):
+            wall, cpu = time.perf_counter(), time.process_time()
+            result = await run_scenario(
+                client,
+                scenario,
+                ctx,
+                concurrency=concurrency,
+                duration=duration,
+                max_requests=None,
+                warmup=50,
+                seed=1,
+                measure_cpu=False,
+            )
+            client_cpu = (time.process_time() - cpu) / (time.perf_counter() - wall) * 100
+            rows.append((scenario.name, result.rps, result.p95_ms, client_cpu))
+        return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--only", nargs="+", default=["products_hot", "product_detail"])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"cpu count: {os.cpu_count()}")
+    print(f"{'scenario':<18} {'workers':>7} {'rps':>9} {'x1':>6} {'p95 ms':>8} {'client cpu %':>13}")
+    base: dict[str, float] = {}
+    for workers in args.workers:
+        with _server(workers, [], "gunicorn") as url:
+            rows = asyncio.run(_measure(url, args.only, args.concurrency, args.duration))
+        for name, rps, p95, client_cpu in rows:
+            base.setdefault(name, rps)
+            print(f"{name:<18} {workers:>7} {rps:>9.0f} {rps / base[name]:>6.2f} {p95:>8.1f} {client_cpu:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
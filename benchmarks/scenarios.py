@@ -0,0 +1,200 @@
+"""Сценарии для горячих эндпоинтов API и подготовка данных под них."""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, field
+from typing import Any
+from uuid import uuid4
+
+import httpx
+
+from benchmarks.harness import RequestSpec, Scenario
+
+SORTS = ("created_desc", "created_asc", "price_asc", "price_desc")
+BENCH_PASSWORD = "bench-password"
+
+
+@dataclass
+class BenchContext:
+    token: str
+    email: str
+    product_ids: list[int]
+    brand_ids: list[int]
+    category_ids: list[int]
+    search_terms: list[str]
+    order_product_id: int
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def auth(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+async def setup_context(client: httpx.AsyncClient) -> BenchContext:
+    """Пользователь-суперюзер, выборка товаров и товар без учёта остатков для заказов."""
+    from app.db import SessionLocal
+    from app.models.user import User
+
+    email = f"bench_{uuid4().hex[:8]}@example.com"
+    r = await client.post("/auth/register", json={"email": email, "password": BENCH_PASSWORD})
+    r.raise_for_status()
+
+    db = SessionLocal()
+    try:
+        db.query(User).filter_by(email=email).update({"is_superuser": True})
+        db.commit()
+    finally:
+        db.close()
+
+    r = await client.post("/auth/login", data={"username": email, "password": BENCH_PASSWORD})
+    r.raise_for_status()
+    token = r.json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+
+    # товар для /orders: без строки inventory, чтобы нагрузка не упиралась в остатки
+    sfx = uuid4().hex[:8]
+    r = await client.post(
+        "/admin/products",
+        json={"sku": f"BENCH-{sfx}", "name": f"Bench {sfx}", "slug": f"bench-{sfx}", "price_cents": 1000},
+        headers=auth,
+    )
+    r.raise_for_status()
+    order_product_id = r.json()["id"]
+
+    r = await client.get("/products", params={"limit": 100})
+    r.raise_for_status()
+    items = r.json()["items"]
+    if not items:
+        raise RuntimeError("No active products: load data first (scripts/generate_synthetic_data.py)")
+
+    words = {w.lower() for p in items for w in p["name"].split() if len(w) >= 3 and not w.isdigit()}
+    return BenchContext(
+        token=token,
+        email=email,
+        product_ids=[p["id"] for p in items],
+        brand_ids=sorted({p["brand_id"] for p in items if p["brand_id"]}) or [0],
+        category_ids=sorted({p["category_id"] for p in items if p["category_id"]}) or [0],
+        search_terms=sorted(words) or ["a"],
+        order_product_id=order_product_id,
+    )
+
+
+def _get(path: str, **params: Any) -> RequestSpec:
+    return "GET", path, {"params": {k: v for k, v in params.items() if v is not None}}
+
+
+async def _create_order(client: httpx.AsyncClient, ctx: BenchContext, rng: random.Random) -> dict[str, Any]:
+    r = await client.post(
+        "/orders",
+        json={"items": [{"product_id": ctx.order_product_id, "quantity": 1}]},
+        headers=ctx.auth,
+    )
+    r.raise_for_status()
+    return {"path_params": {"order_id": r.json()["id"]}, "headers": ctx.auth}
+
+
+def build_scenarios() -> list[Scenario]:
+    scenarios = [
+        # горячий кэш: одни и те же параметры
+        Scenario("products_hot", lambda ctx, rng: _get("/products"), tags=("products", "cache")),
+        # холодный кэш: каждый запрос — новый ключ (случайный min_price)
+        Scenario(
+            "products_cold",
+            lambda ctx, rng: _get("/products", min_price=rng.randrange(1_000_000)),
+            tags=("products", "cache"),
+        ),
+        Scenario(
+            "products_search",
+            lambda ctx, rng: _get("/products", q=rng.choice(ctx.search_terms)),
+            tags=("products",),
+        ),
+        Scenario(
+            "products_filters",
+            lambda ctx, rng: _get(
+                "/products",
+                brand_id=rng.choice(ctx.brand_ids),
+                category_id=rng.choice(ctx.category_ids),
+                min_price=rng.choice((None, 0, 1_000)),
+                max_price=rng.choice((None, 50_000, 500_000)),
+            ),
+            tags=("products",),
+        ),
+        # фасеты под теми же фильтрами, что и листинг (cold: случайный min_price)
+        Scenario(
+            "products_facets",
+            lambda ctx, rng: _get(
+                "/products/facets",
+                category_id=rng.choice(ctx.category_ids),
+                min_price=rng.randrange(1_000_000),
+            ),
+            tags=("products", "facets"),
+        ),
+        Scenario(
+            "product_detail",
+            lambda ctx, rng: _get(f"/products/{rng.choice(ctx.product_ids)}"),
+            tags=("detail",),
+        ),
+        # корзина на 20 позиций одним запросом
+        Scenario(
+            "products_batch",
+            lambda ctx, rng: _get("/products/batch", ids=",".join(map(str, rng.sample(ctx.product_ids, 20)))),
+            tags=("detail",),
+        ),
+        Scenario(
+            "product_similar",
+            lambda ctx, rng: _get(f"/products/{rng.choice(ctx.product_ids)}/similar"),
+            tags=("detail",),
+        ),
+        Scenario(
+            "orders_create",
+            lambda ctx, rng: (
+                "POST",
+                "/orders",
+                {"json": {"items": [{"product_id": ctx.order_product_id, "quantity": 1}]}, "headers": ctx.auth},
+            ),
+            expected=(201,),
+            tags=("orders",),
+        ),
+        Scenario(
+            "orders_pay",
+            lambda ctx, rng: ("POST", "/orders/{order_id}/pay", {}),
+            prepare=_create_order,
+            expected=(201,),
+            tags=("orders",),
+        ),
+        Scenario(
+            "orders_me",
+            lambda ctx, rng: ("GET", "/orders/me", {"headers": ctx.auth}),
+            tags=("orders",),
+        ),
+        # админская страница на 1000 заказов с позициями (колоночная проекция)
+        Scenario(
+            "admin_orders_page_1k",
+            lambda ctx, rng: (
+                "GET",
+                "/admin/orders",
+                {"params": {"limit": 1000, "offset": rng.randrange(0, 5) * 1000}, "headers": ctx.auth},
+            ),
+            tags=("orders", "admin"),
+        ),
+        Scenario(
+            "auth_login",
+            lambda ctx, rng: (
+                "POST",
+                "/auth/login",
+                {"data": {"username": ctx.email, "password": BENCH_PASSWORD}},
+            ),
+            tags=("auth",),
+        ),
+    ]
+    for sort in SORTS:
+        scenarios.append(
+            Scenario(
+                f"products_sort_{sort}",
+                # смещение варьируем, чтобы сортировка реально доходила до БД
+                lambda ctx, rng, sort=sort: _get("/products", sort=sort, offset=rng.randrange(0, 2_000, 20)),
+                tags=("products",),
+            )
+        )
+    return scenarios
@@ -0,0 +1,110 @@
+"""Микробенчмарк сериализации ответов каталога (без БД и сети).
+
+Сравнивает CPU на запрос для старого пути (response_model-валидация + json.dumps,
+на попадании в кэш ещё json.loads) и нового (TypeAdapter.dump_json / bytes из кэша как есть).
+
+    python -m benchmarks.serialization --iterations 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.schemas.catalog import Page, ProductDetail, ProductDetailAdapter
+
+# так листинг сериализовался до сборки страницы из закэшированных элементов
+PageAdapter = TypeAdapter(Page)
+
+
+def _product(i: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=i,
+        sku=f"SKU-{i}",
+        name=f"Product {i}",
+        slug=f"product-{i}",
+        brand_id=i % 50,
+        category_id=i % 200,
+        price_cents=1999 + i,
+        is_active=True,
+        created_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def _detail_payload(i: int) -> dict:
+    p = _product(i)
+    images = [
+        SimpleNamespace(id=i * 10 + k, url=f"https://picsum.photos/seed/{i}-{k}/600/400", is_primary=k == 0, position=k)
+        for k in range(4)
+    ]
+    return {**vars(p), "images": images, "inventory_qty": 7, "in_stock": True}
+
+
+def _cpu_us(fn: Callable[[], object], iterations: int) -> float:
+    for _ in range(min(100, iterations)):
+        fn()
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    items = [_product(i) for i in range(args.page_size)]
+    page_in = {"total": 10_000, "limit": args.page_size, "offset": 0, "items": items}
+    cached_page = PageAdapter.dump_json(PageAdapter.validate_python(page_in, from_attributes=True))
+    detail_in = _detail_payload(1)
+
+    def legacy_listing_miss():
+        page = Page.model_validate(page_in, from_attributes=True)
+        # FastAPI: повторная валидация по response_model + jsonable_encoder + json.dumps
+        revalidated = Page.model_validate(page.model_dump())
+        return json.dumps(jsonable_encoder(revalidated)).encode()
+
+    def legacy_listing_hit():
+        return json.dumps(jsonable_encoder(Page.model_validate(json.loads(cached_page)))).encode()
+
+    def fast_listing_miss():
+        return PageAdapter.dump_json(PageAdapter.validate_python(page_in, from_attributes=True))
+
+    def fast_listing_hit():
+        return cached_page
+
+    def legacy_detail():
+        base = {k: v for k, v in detail_in.items() if k not in ("images", "inventory_qty", "in_stock")}
+        d = ProductDetail(
+            **base,
+            images=detail_in["images"],
+            inventory_qty=detail_in["inventory_qty"],
+            in_stock=detail_in["in_stock"],
+        )
+        return json.dumps(jsonable_encoder(ProductDetail.model_validate(d.model_dump()))).encode()
+
+    def fast_detail():
+        return ProductDetailAdapter.dump_json(ProductDetailAdapter.validate_python(detail_in, from_attributes=True))
+
+    rows = [
+        ("listing miss", legacy_listing_miss, fast_listing_miss),
+        ("listing cache hit", legacy_listing_hit, fast_listing_hit),
+        ("detail", legacy_detail, fast_detail),
+    ]
+    print(f"{'case':<20} {'legacy us/req':>14} {'fast us/req':>12} {'speedup':>8}")
+    for name, legacy, fast in rows:
+        a, b = _cpu_us(legacy, args.iterations), _cpu_us(fast, args.iterations)
+        print(f"{name:<20} {a:>14.1f} {b:>12.1f} {a / max(b, 0.001):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Всплеск трафика сразу после инвалидации каталога: холодный кэш против прогретого.
+
+Берёт `--keys` популярных наборов параметров листинга (категории/бренды/сортировки),
+меняет поколение каталога и пускает `--requests` запросов по этим ключам
+с `--concurrency` одновременно (in-process, через httpx.ASGITransport):
+
+* `cold` — как раньше: первые запросы на каждый ключ идут в Postgres одновременно;
+* `warmed` — перед всплеском отработал `warmer.warm_listings()` (его время печатается отдельно).
+
+    python -m benchmarks.warmer --keys 50 --requests 2000 --concurrency 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+from sqlalchemy import func, select
+
+from app.api.services import warmer
+from app.api.services.catalog import LISTING_ORDER, ListingParams
+from app.core.cache import bump_catalog_generation, get_redis
+from app.core.config import settings
+from app.db import SessionLocal
+from app.main import app
+from app.models.catalog import Product
+from benchmarks.harness import percentile
+
+
+def _popular_params(n: int, seed: int) -> list[ListingParams]:
+    db = SessionLocal()
+    try:
+        categories = list(
+            db.scalars(
+                select(Product.category_id).group_by(Product.category_id).order_by(func.count().desc()).limit(20)
+            )
+        )
+        brands = list(
+            db.scalars(select(Product.brand_id).group_by(Product.brand_id).order_by(func.count().desc()).limit(20))
+        )
+    finally:
+        db.close()
+    rng = random.Random(seed)
+    params: set[ListingParams] = set()
+    while len(params) < n:
+        params.add(
+            ListingParams(
+                category_id=rng.choice((None, *categories)),
+                brand_id=rng.choice((None, None, *brands)),
+                sort=rng.choice(tuple(LISTING_ORDER)),
+                offset=rng.choice((0, 0, 20, 40)),
+            )
+        )
+    return sorted(params, key=repr)
+
+
+def _query(p: ListingParams) -> dict:
+    return {
+        k: v
+        for k, v in {
+            "category_id": p.category_id,
+            "brand_id": p.brand_id,
+            "sort": p.sort,
+            "limit": p.limit,
+            "offset": p.offset,
+        }.items()
+        if v is not None
+    }
+
+
+async def _burst(params: list[ListingParams], requests: int, concurrency: int, seed: int) -> list[float]:
+    rng = random.Random(seed)
+    # популярность по Ципфу: первые ключи запрашиваются чаще
+    weights = [1 / (i + 1) for i in range(len(params))]
+    queue = rng.choices(params, weights=weights, k=requests)
+    latencies: list[float] = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def worker() -> None:
+            while queue:
+                p = queue.pop()
+                start = time.perf_counter()
+                r = await client.get("/products", params=_query(p))
+                latencies.append((time.perf_counter() - start) * 1000)
+                r.raise_for_status()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    latencies.sort()
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    settings.warmer_top_listings = args.keys
+    settings.rate_limit_enabled = False  # весь всплеск идёт с одного «IP»
+    params = _popular_params(args.keys, args.seed)
+
+    # счётчики обращений — как если бы этот трафик уже приходил раньше
+    r = get_redis()
+    r.delete(warmer.LISTING_HITS_KEY)
+    r.zadd(warmer.LISTING_HITS_KEY, {p.dumps(): args.keys - i for i, p in enumerate(params)})
+
+    print(f"{'mode':<8} {'warm ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode in ("cold", "warmed"):
+        bump_catalog_generation()
+        warm_ms = 0.0
+        if mode == "warmed":
+            start = time.perf_counter()
+            warmer.warm_listings()
+            warm_ms = (time.perf_counter() - start) * 1000
+        lat = asyncio.run(_burst(params, args.requests, args.concurrency, args.seed))
+        print(f"{mode:<8} {warm_ms:>8.0f} {percentile(lat, 50):>8.1f} {percentile(lat, 99):>8.1f} {lat[-1]:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
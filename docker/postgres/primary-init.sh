@@ -0,0 +1,4 @@
+#!/bin/sh
+# Разрешить потоковую репликацию с реплики из docker-compose.replica.yml (только для локального стенда).
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,17 @@
+#!/bin/sh
+# Hot standby: при пустом томе снимаем базовую копию с primary (pg_basebackup -R пишет
+# standby.signal и primary_conninfo), дальше — обычный postgres в режиме реплики.
+set -e
+PGDATA=/var/lib/postgresql/data
+mkdir -p "$PGDATA"
+chown postgres:postgres "$PGDATA"
+chmod 700 "$PGDATA"
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+  until su-exec postgres pg_basebackup -h db -U "$POSTGRES_USER" -D "$PGDATA" -R -X stream; do
+    echo "waiting for primary..."
+    sleep 1
+  done
+fi
+
+exec su-exec postgres postgres -c hot_standby=on
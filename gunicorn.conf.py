@@ -0,0 +1,61 @@
+"""Production-сервер: gunicorn + UvicornWorker.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+* `WEB_CONCURRENCY` воркеров (по умолчанию — по числу CPU);
+* приложение импортируется один раз в мастере (`preload_app`), воркеры получают
+  его через fork — меньше памяти и быстрый рестарт. Пулы соединений, унаследованные
+  от мастера, в воркере сбрасываются (`post_fork`), иначе процессы делили бы сокеты;
+* SIGTERM: воркеры перестают принимать соединения, дорабатывают текущие запросы
+  (не дольше `GRACEFUL_TIMEOUT`), затем выполняют lifespan shutdown;
+* с `PROMETHEUS_MULTIPROC_DIR` каталог метрик очищается при старте, а метрики
+  завершившихся воркеров помечаются мёртвыми.
+"""
+
+import multiprocessing
+import os
+from pathlib import Path
+
+from app.core.config import settings
+
+bind = f"{settings.app_host}:{settings.app_port}"
+workers = settings.web_concurrency or multiprocessing.cpu_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+graceful_timeout = settings.graceful_timeout
+timeout = 60
+keepalive = 5
+# периодический перезапуск воркеров — страховка от утечек памяти
+max_requests = 20_000
+max_requests_jitter = 2_000
+
+accesslog = None
+errorlog = "-"
+loglevel = "info"
+
+
+def on_starting(server):
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        path = Path(multiproc_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        for f in path.glob("*.db"):
+            f.unlink()
+
+
+def post_fork(server, worker):
+    from app.core.cache import reset_redis
+    from app.db import dispose_engines
+
+    # движки и Redis создаются лениво, так что обычно мастер их не открывал;
+    # если открыл — close=False: не закрывать сокеты мастера, просто забыть их в этом процессе
+    dispose_engines(close=False)
+    reset_redis()
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,41 @@
+"""Перенос закрытых заказов старше ORDERS_ARCHIVE_AFTER_MONTHS месяцев в архивные таблицы.
+
+    python scripts/archive_orders.py                    # всё, что старше порога, пачками
+    python scripts/archive_orders.py --months 24 --max-batches 100 --pause 0.5
+
+Запускать по расписанию (cron, раз в сутки), после `rollup_sales.py`: заказы, изменённые
+после последнего прогона роллапов, не архивируются.
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from app.api.services.archive import archive_cutoff, archive_orders
+from app.core.config import settings
+from app.db import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months", type=int, default=settings.orders_archive_after_months)
+    parser.add_argument("--batch-size", type=int, default=settings.orders_archive_batch_size)
+    parser.add_argument("--max-batches", type=int, default=None, help="Остановиться после N пачек")
+    parser.add_argument("--pause", type=float, default=0.0, help="Пауза между пачками, сек (меньше нагрузка на WAL)")
+    args = parser.parse_args()
+
+    before = archive_cutoff(datetime.now(timezone.utc), args.months)
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        total = archive_orders(
+            db, before=before, batch_size=args.batch_size, max_batches=args.max_batches, pause=args.pause
+        )
+        elapsed = time.perf_counter() - start
+        print(f"orders_archive: {total} order(s) created before {before:%Y-%m-%d} moved in {elapsed:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""Генератор синтетических данных для нагрузочных/бенчмарк-окружений.
+
+Создаёт бренды, дерево категорий, товары (с изображениями и остатками),
+пользователей и заказы с реалистичным перекосом:
+
+* популярность товаров в заказах — распределение Ципфа;
+* цены — логнормальное распределение с «магазинными» окончаниями (...99);
+* статусы заказов / размер корзины — фиксированные веса.
+
+Данные грузятся через COPY параллельными чанками (по процессу на чанк).
+Каждый чанк генерируется из собственного `Random(seed, chunk)`, поэтому результат
+воспроизводим при одинаковом `--seed` и не зависит от `--workers`. От окружения он тоже
+не зависит: id начинаются с `--id-base` (а не с текущего MAX(id) в базе), «сейчас» —
+`--now`, по умолчанию фиксированная дата, выведенная из seed (`--now now` — часы системы).
+
+Пример:
+    python scripts/generate_synthetic_data.py --products 1000000 --users 100000 --orders 500000 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Sequence
+
+import psycopg
+
+from app.api.services.catalog_tree import CLOSURE_REBUILD_SQL
+from app.core.config import settings
+
+ORDER_STATUSES = ("NEW", "CONFIRMED", "CANCELED")
+ORDER_STATUS_WEIGHTS = (20, 70, 10)
+ITEMS_PER_ORDER_WEIGHTS = (45, 25, 15, 10, 5)  # 1..5 позиций
+SERIAL_TABLES = ("brands", "categories", "products", "product_images", "users", "orders", "order_items", "payments")
+# «сейчас» по умолчанию: эта дата + (seed mod 365) дней
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class Plan:
+    dsn: str
+    seed: int
+    zipf_s: float
+    images_per_product: int
+    max_qty: int
+    days: int
+    now: datetime
+    brand_ids: tuple[int, int]  # [first, last]
+    leaf_category_ids: tuple[int, ...]
+    product_ids: tuple[int, int]
+    user_ids: tuple[int, int]
+    first_image_id: int
+    first_order_id: int
+    first_order_item_id: int
+    first_payment_id: int
+    password_hash: str
+
+
+def _dsn(url: str) -> str:
+    # SQLAlchemy-URL → libpq conninfo
+    return url.replace("postgresql+psycopg://", "postgresql://", 1)
+
+
+def _rng(seed: int, stream: str, chunk: int) -> random.Random:
+    return random.Random(f"{seed}:{stream}:{chunk}")
+
+
+def _copy_value(v: Any) -> str:
+    if v is None:
+        return "\\N"
+    if v is True:
+        return "t"
+    if v is False:
+        return "f"
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return str(v)
+
+
+def _copy(cur: psycopg.Cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """COPY в текстовом формате, блоками — заметно быстрее, чем write_row() на каждую строку."""
+    n = 0
+    with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        buf: list[str] = []
+        for row in rows:
+            buf.append("\t".join(_copy_value(v) for v in row))
+            n += 1
+            if len(buf) >= 10_000:
+                copy.write("\n".join(buf) + "\n")
+                buf.clear()
+        if buf:
+            copy.write("\n".join(buf) + "\n")
+    return n
+
+
+def _price_cents(rng: random.Random) -> int:
+    # медиана ~ 30.00, длинный хвост дорогих товаров
+    raw = rng.lognormvariate(math.log(3_000), 1.0)
+    return max(99, int(round(raw / 100)) * 100 - 1)
+
+
+def _chunks(first: int, last: int, size: int) -> list[tuple[int, int, int]]:
+    """[(chunk_no, first_id, last_id), ...] по включительным диапазонам id."""
+    out = []
+    for no, start in enumerate(range(first, last + 1, size)):
+        out.append((no, start, min(start + size - 1, last)))
+    return out
+
+
+# ------- Каталог -------
+def _category_tree(first_id: int, depth: int, fanout: int) -> tuple[list[tuple], list[int]]:
+    rows: list[tuple] = []
+    level: list[int | None] = [None]
+    next_id = first_id
+    for _ in range(depth):
+        new_level: list[int] = []
+        for parent in level:
+            for _ in range(fanout):
+                cid = next_id
+                next_id += 1
+                rows.append((cid, f"Category {cid}", f"syn-category-{cid}", parent))
+                new_level.append(cid)
+        level = new_level
+    return rows, list(level)
+
+
+def _load_products(plan: Plan, chunk: tuple[int, int, int]) -> int:
+    no, first, last = chunk
+    rng = _rng(plan.seed, "products", no)
+    brand_first, brand_last = plan.brand_ids
+    n_brands = brand_last - brand_first + 1
+    # бренды тоже неравномерны: мягкий Ципф
+    brand_cum = list(itertools.accumulate(1.0 / (r**0.8) for r in range(1, n_brands + 1)))
+
+    products, images, inventory = [], [], []
+    image_id = plan.first_image_id + (first - plan.product_ids[0]) * plan.images_per_product
+    for pid in range(first, last + 1):
+        created = plan.now - timedelta(seconds=rng.randrange(plan.days * 86_400))
+        brand_id = brand_first + rng.choices(range(n_brands), cum_weights=brand_cum)[0]
+        products.append(
+            (
+                pid,
+                f"SYN-{pid}",
+                f"Product {pid}",
+                f"syn-product-{pid}",
+                brand_id,
+                rng.choice(plan.leaf_category_ids),
+                _price_cents(rng),
+                rng.random() > 0.03,
+                created,
+            )
+        )
+        for pos in range(plan.images_per_product):
+            images.append(
+                (image_id, pid, f"https://picsum.photos/seed/{pid}-{pos}/600/400", pos == 0, pos, created),
+            )
+            image_id += 1
+        tracked = rng.random() > 0.1
+        inventory.append((pid, rng.randrange(0, 500) if tracked else 0, tracked, created))
+
+    with psycopg.connect(plan.dsn) as conn, conn.cursor() as cur:
+        _copy(
+            cur,
+            "products",
+            ("id", "sku", "name", "slug", "brand_id", "category_id", "price_cents", "is_active", "created_at"),
+            products,
+        )
+        _copy(cur, "product_images", ("id", "product_id", "url", "is_primary", "position", "created_at"), images)
+        _copy(cur, "inventory", ("product_id", "qty", "track_inventory", "updated_at"), inventory)
+    return len(products)
+
+
+def _load_users(plan: Plan, chunk: tuple[int, int, int]) -> int:
+    no, first, last = chunk
+    rng = _rng(plan.seed, "users", no)
+    rows = (
+        (
+            uid,
+            f"user{uid}@synthetic.example.com",
+            plan.password_hash,
+            True,
+            False,
+            plan.now - timedelta(seconds=rng.randrange(plan.days * 86_400)),
+        )
+        for uid in range(first, last + 1)
+    )
+    with psycopg.connect(plan.dsn) as conn, conn.cursor() as cur:
+        return _copy(cur, "users", ("id", "email", "hashed_password", "is_active", "is_superuser", "created_at"), rows)
+
+
+# ------- Заказы -------
+_popularity: tuple[list[int], list[float]] | None = None
+_prices: dict[int, int] = {}
+
+
+def _init_orders_worker(plan: Plan) -> None:
+    """Один раз на процесс: ранги популярности (Ципф) и цены товаров."""
+    global _popularity, _prices
+    first, last = plan.product_ids
+    ranked = list(range(first, last + 1))
+    random.Random(f"{plan.seed}:popularity").shuffle(ranked)
+    cum = list(itertools.accumulate(1.0 / (r**plan.zipf_s) for r in range(1, len(ranked) + 1)))
+    _popularity = (ranked, cum)
+    with psycopg.connect(plan.dsn) as conn:
+        _prices = dict(
+            conn.execute("SELECT id, price_cents FROM products WHERE id BETWEEN %s AND %s", (first, last)).fetchall()
+        )
+
+
+def _load_orders(plan: Plan, chunk: tuple[int, int, int]) -> int:
+    no, first, last = chunk
+    assert _popularity is not None
+    ranked, cum = _popularity
+    rng = _rng(plan.seed, "orders", no)
+    user_first, user_last = plan.user_ids
+
+    # id позиций/платежей: у каждого чанка свой непересекающийся диапазон
+    item_id = plan.first_order_item_id + (first - plan.first_order_id) * len(ITEMS_PER_ORDER_WEIGHTS)
+    payment_id = plan.first_payment_id + (first - plan.first_order_id)
+
+    orders, items, payments = [], [], []
+    for oid in range(first, last + 1):
+        n_items = rng.choices(range(1, len(ITEMS_PER_ORDER_WEIGHTS) + 1), weights=ITEMS_PER_ORDER_WEIGHTS)[0]
+        pids = set(rng.choices(ranked, cum_weights=cum, k=n_items))
+        created = plan.now - timedelta(seconds=rng.randrange(plan.days * 86_400))
+        status = rng.choices(ORDER_STATUSES, weights=ORDER_STATUS_WEIGHTS)[0]
+
+        total = 0
+        for pid in pids:
+            qty = 1 + int(rng.expovariate(1.5)) % plan.max_qty
+            price = _prices[pid]
+            total += price * qty
+            items.append((item_id, oid, pid, qty, price))
+            item_id += 1
+
+        updated = created + timedelta(minutes=rng.randrange(1, 600)) if status != "NEW" else created
+        orders.append((oid, rng.randint(user_first, user_last), status, total, created, updated))
+        if status == "CONFIRMED":
+            payments.append((payment_id, oid, total, "test", f"syn-{oid}", "PAID", updated, updated))
+        payment_id += 1
+
+    with psycopg.connect(plan.dsn) as conn, conn.cursor() as cur:
+        _copy(cur, "orders", ("id", "user_id", "status", "total_cents", "created_at", "updated_at"), orders)
+        _copy(cur, "order_items", ("id", "order_id", "product_id", "quantity", "price_cents"), items)
+        _copy(
+            cur,
+            "payments",
+            (
+                "id",
+                "order_id",
+                "amount_cents",
+                "provider",
+                "provider_payment_id",
+                "status",
+                "created_at",
+                "updated_at",
+            ),
+            payments,
+        )
+    return len(orders)
+
+
+def _run_parallel(fn, plan: Plan, chunks, workers: int, initializer=None) -> int:
+    if not chunks:
+        return 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=initializer,
+        initargs=(plan,) if initializer else (),
+    ) as pool:
+        return sum(pool.map(fn, itertools.repeat(plan), chunks))
+
+
+def _parse_now(value: str) -> datetime:
+    if value == "now":
+        return datetime.now(timezone.utc).replace(microsecond=0)
+    now = datetime.fromisoformat(value)
+    return now if now.tzinfo else now.replace(tzinfo=timezone.utc)
+
+
+def _check_ids_free(conn: psycopg.Connection, id_base: int) -> None:
+    """id задаются явно от `id_base`: занятый диапазон — ошибка, а не сдвиг (иначе данные зависят от базы)."""
+    taken = {table: conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0] for table in SERIAL_TABLES}
+    busy = {table: max_id for table, max_id in taken.items() if max_id >= id_base}
+    if busy:
+        tables = ", ".join(f"{table} (max id {max_id})" for table, max_id in busy.items())
+        raise SystemExit(f"ids from {id_base} are taken in {tables}: pass --id-base {max(busy.values()) + 1}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--now",
+        type=_parse_now,
+        default=None,
+        help="Конец истории created_at (ISO-дата или now); по умолчанию 2025-01-01 + (seed mod 365) дней",
+    )
+    parser.add_argument("--id-base", type=int, default=1, help="Первый id во всех таблицах")
+    parser.add_argument("--brands", type=int, default=200)
+    parser.add_argument("--category-depth", type=int, default=3)
+    parser.add_argument("--category-fanout", type=int, default=8)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--images-per-product", type=int, default=3)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Показатель Ципфа для популярности товаров")
+    parser.add_argument("--max-qty", type=int, default=5)
+    parser.add_argument("--days", type=int, default=365, help="Глубина истории created_at, дней")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    dsn = _dsn(args.database_url)
+    started = time.monotonic()
+
+    # пароль у всех синтетических пользователей — "password"; bcrypt считаем один раз
+    from app.core.security import hash_password
+
+    password_hash = hash_password("password")
+
+    now = args.now or EPOCH + timedelta(days=args.seed % 365)
+    # во всех таблицах id начинаются с одного и того же --id-base
+    first = args.id_base
+
+    with psycopg.connect(dsn) as conn:
+        _check_ids_free(conn, args.id_base)
+
+        categories, leaves = _category_tree(first, args.category_depth, args.category_fanout)
+        with conn.cursor() as cur:
+            _copy(
+                cur,
+                "brands",
+                ("id", "name", "slug"),
+                ((bid, f"Brand {bid}", f"syn-brand-{bid}") for bid in range(first, first + args.brands)),
+            )
+            _copy(cur, "categories", ("id", "name", "slug", "parent_id"), categories)
+    print(f"brands={args.brands} categories={len(categories)} (leaves={len(leaves)})")
+
+    plan = Plan(
+        dsn=dsn,
+        seed=args.seed,
+        zipf_s=args.zipf,
+        images_per_product=args.images_per_product,
+        max_qty=args.max_qty,
+        days=args.days,
+        now=now,
+        brand_ids=(first, first + args.brands - 1),
+        leaf_category_ids=tuple(leaves),
+        product_ids=(first, first + args.products - 1),
+        user_ids=(first, first + args.users - 1),
+        first_image_id=first,
+        first_order_id=first,
+        first_order_item_id=first,
+        first_payment_id=first,
+        password_hash=password_hash,
+    )
+
+    t = time.monotonic()
+    n = _run_parallel(_load_products, plan, _chunks(*plan.product_ids, args.chunk_size), args.workers)
+    print(f"products={n} ({time.monotonic() - t:.1f}s)")
+
+    t = time.monotonic()
+    n = _run_parallel(_load_users, plan, _chunks(*plan.user_ids, args.chunk_size), args.workers)
+    print(f"users={n} ({time.monotonic() - t:.1f}s)")
+
+    if args.orders and args.products and args.users:
+        t = time.monotonic()
+        n = _run_parallel(
+            _load_orders,
+            plan,
+            _chunks(first, first + args.orders - 1, args.chunk_size),
+            args.workers,
+            initializer=_init_orders_worker,
+        )
+        print(f"orders={n} ({time.monotonic() - t:.1f}s)")
+
+    # id задавали явно — подтягиваем sequences и обновляем статистику планировщика;
+    # категории грузились мимо ORM, поэтому category_closure пересобираем целиком
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute(CLOSURE_REBUILD_SQL)
+        for table in SERIAL_TABLES:
+            conn.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), GREATEST((SELECT MAX(id) FROM {table}), 1))"
+            )
+        conn.execute("ANALYZE")
+
+    print(f"✅ Synthetic data loaded in {time.monotonic() - started:.1f}s (seed={args.seed}, now={now.isoformat()}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Пересчёт дневных роллапов продаж (sales_daily) по изменённым заказам.
+
+    python scripts/rollup_sales.py          # только дни с заказами, изменёнными после прошлого прогона
+    python scripts/rollup_sales.py --full   # пересобрать всё (после ручных правок в orders)
+
+Запускать по расписанию (cron, раз в несколько минут): отчёт /admin/reports/sales
+видит изменения заказов с этой задержкой.
+"""
+
+import argparse
+import time
+
+from app.api.services.reports import refresh_sales_rollups
+from app.db import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="Пересчитать все дни")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        days = refresh_sales_rollups(db, full=args.full)
+        print(f"sales_daily: {days} day(s) rebuilt in {time.perf_counter() - start:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
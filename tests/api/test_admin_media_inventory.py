@@ -99,3 +99,69 @@ def test_admin_requires_superuser_403(client):
     # без токена доступ к /admin/* закрыт
     res = client.post("/admin/brands", json={"name": "N", "slug": "n"})
     assert res.status_code in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN)
+
+
+def test_admin_replace_gallery(client, db, drain_outbox):
+    token = _make_admin_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    s = _sfx()
+
+    p = client.post(
+        "/admin/products",
+        json={"sku": f"GAL-{s}", "name": f"Gallery {s}", "slug": f"gallery-{s}", "price_cents": 500},
+        headers=headers,
+    )
+    assert p.status_code == 201, p.text
+    prod_id = p.json()["id"]
+
+    first = client.post(
+        f"/admin/products/{prod_id}/images",
+        json={"url": "https://picsum.photos/seed/a/600/400", "is_primary": True},
+        headers=headers,
+    ).json()
+    second = client.post(
+        f"/admin/products/{prod_id}/images",
+        json={"url": "https://picsum.photos/seed/b/600/400", "position": 1},
+        headers=headers,
+    ).json()
+    dropped = client.post(
+        f"/admin/products/{prod_id}/images",
+        json={"url": "https://picsum.photos/seed/c/600/400", "position": 2},
+        headers=headers,
+    ).json()
+
+    # карточка попадает в кэш до изменения галереи
+    assert len(client.get(f"/products/{prod_id}").json()["images"]) == 3
+
+    # меняем порядок, переносим primary, удаляем третье и добавляем новое
+    r = client.put(
+        f"/admin/products/{prod_id}/images",
+        json=[
+            {"id": second["id"], "url": second["url"], "is_primary": True},
+            {"id": first["id"], "url": first["url"]},
+            {"url": "https://picsum.photos/seed/d/600/400"},
+        ],
+        headers=headers,
+    )
+    assert r.status_code == 200, r.text
+    gallery = r.json()
+    assert [img["id"] for img in gallery[:2]] == [second["id"], first["id"]]
+    assert [img["position"] for img in gallery] == [0, 1, 2]
+    assert [img["is_primary"] for img in gallery] == [True, False, False]
+    assert dropped["id"] not in {img["id"] for img in gallery}
+
+    # закэшированную карточку сбрасывает outbox-воркер после commit
+    drain_outbox()
+    detail = client.get(f"/products/{prod_id}").json()
+    assert [img["id"] for img in detail["images"]] == [img["id"] for img in gallery]
+
+    # два primary в одной галерее — ошибка
+    r = client.put(
+        f"/admin/products/{prod_id}/images",
+        json=[
+            {"url": "https://picsum.photos/seed/e/600/400", "is_primary": True},
+            {"url": "https://picsum.photos/seed/f/600/400", "is_primary": True},
+        ],
+        headers=headers,
+    )
+    assert r.status_code == 400
@@ -0,0 +1,74 @@
+from http import HTTPStatus
+from uuid import uuid4
+
+from app.models.catalog import Inventory
+from tests.api.test_admin_media_inventory import _make_admin_token
+
+
+def _setup(client, n_orders: int):
+    h = {"Authorization": f"Bearer {_make_admin_token(client)}"}
+    s = uuid4().hex[:8]
+    prod_id = client.post(
+        "/admin/products",
+        json={"sku": f"BLK-{s}", "name": f"Bulk {s}", "slug": f"bulk-{s}", "price_cents": 100},
+        headers=h,
+    ).json()["id"]
+    r = client.patch(f"/admin/products/{prod_id}/inventory", params={"qty": 10, "track_inventory": True}, headers=h)
+    assert r.status_code == HTTPStatus.OK, r.text
+
+    order_ids = []
+    for _ in range(n_orders):
+        r = client.post("/orders", json={"items": [{"product_id": prod_id, "quantity": 2}]}, headers=h)
+        assert r.status_code == HTTPStatus.CREATED, r.text
+        order_ids.append(r.json()["id"])
+    return h, prod_id, order_ids
+
+
+def test_bulk_cancel_restocks_and_reports_skipped(client, db, max_queries):
+    h, prod_id, order_ids = _setup(client, 3)
+    assert db.get(Inventory, prod_id).qty == 4
+
+    r = client.patch("/admin/orders:bulk", json={"status": "confirmed", "ids": [order_ids[0]]}, headers=h)
+    assert r.json()["updated"] == [order_ids[0]]
+
+    # NEW и CONFIRMED отменяются; уже отменённый и несуществующий — в skipped
+    client.patch(f"/admin/orders/{order_ids[2]}", json={"status": "canceled"}, headers=h)
+    missing = max(order_ids) + 1_000_000
+    # пользователь, UPDATE orders, статусы пропущенных, UPDATE inventory, outbox + NOTIFY — не зависит от числа заказов
+    with max_queries(6):
+        r = client.patch(
+            "/admin/orders:bulk",
+            json={"status": "canceled", "ids": [*order_ids, missing]},
+            headers=h,
+        )
+    assert r.status_code == HTTPStatus.OK, r.text
+    body = r.json()
+    assert body["updated"] == order_ids[:2]
+    assert body["skipped"] == [{"id": order_ids[2], "status": "canceled"}, {"id": missing, "status": None}]
+
+    db.expire_all()
+    assert db.get(Inventory, prod_id).qty == 10
+
+
+def test_bulk_by_filter_and_invalid_transitions(client):
+    h, _, order_ids = _setup(client, 2)
+    user_id = client.get("/users/me", headers=h).json()["id"]
+
+    r = client.patch(
+        "/admin/orders:bulk",
+        json={"status": "confirmed", "filter": {"user_id": user_id, "status": "new", "limit": 1}},
+        headers=h,
+    )
+    assert r.json()["updated"] == order_ids[:1]
+
+    # из canceled/confirmed обратно в new — нельзя
+    r = client.patch(f"/admin/orders/{order_ids[0]}", json={"status": "new"}, headers=h)
+    assert r.status_code == HTTPStatus.CONFLICT
+    r = client.patch("/admin/orders:bulk", json={"status": "new", "ids": order_ids}, headers=h)
+    assert r.json()["updated"] == []
+
+    # нужен ровно один селектор и непустой фильтр
+    r = client.patch("/admin/orders:bulk", json={"status": "canceled"}, headers=h)
+    assert r.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    r = client.patch("/admin/orders:bulk", json={"status": "canceled", "filter": {}}, headers=h)
+    assert r.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
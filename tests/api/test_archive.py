@@ -0,0 +1,61 @@
+from datetime import date, datetime, timedelta, timezone
+from http import HTTPStatus
+
+from sqlalchemy import update
+
+from app.api.services.archive import archive_cutoff, archive_orders
+from app.api.services.reports import refresh_sales_rollups
+from app.models.order import Order
+from app.models.payment import Payment, PaymentStatus
+from tests.api.test_admin_orders_bulk import _setup
+
+DAY = date(2000, 1, 15)
+
+
+def test_archive_cutoff_is_month_aligned():
+    now = datetime(2026, 3, 31, 12, tzinfo=timezone.utc)
+    assert archive_cutoff(now, 12) == datetime(2025, 3, 1, tzinfo=timezone.utc)
+    assert archive_cutoff(now, 3) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+
+def test_closed_orders_move_to_archive_and_stay_in_sales(client, db):
+    h, prod_id, order_ids = _setup(client, 4)
+    confirmed, canceled, new, pending = order_ids
+    client.patch(f"/admin/orders/{confirmed}", json={"status": "confirmed"}, headers=h)
+    client.patch(f"/admin/orders/{canceled}", json={"status": "canceled"}, headers=h)
+    client.patch(f"/admin/orders/{pending}", json={"status": "confirmed"}, headers=h)
+    db.add(Payment(order_id=pending, amount_cents=200, provider="test", status=PaymentStatus.PENDING))
+
+    before = datetime(2000, 2, 1, tzinfo=timezone.utc)
+    archive_orders(db, before=before)  # заказы прошлых прогонов теста
+    old = datetime.combine(DAY, datetime.min.time(), timezone.utc) + timedelta(hours=10)
+    db.execute(update(Order).where(Order.id.in_(order_ids)).values(created_at=old, updated_at=old))
+    db.commit()
+
+    # по одному заказу за пачку: new и заказ с pending-платежом остаются на месте
+    moved = archive_orders(db, before=before, batch_size=1)
+    assert moved == 2
+
+    live = client.get("/orders/me", headers=h).json()
+    assert sorted(o["id"] for o in live) == [new, pending]
+    archived = client.get("/orders/me", params={"archived": "true"}, headers=h).json()
+    assert sorted(o["id"] for o in archived) == [confirmed, canceled]
+
+    user_id = client.get("/users/me", headers=h).json()["id"]
+    r = client.get("/admin/orders", params={"archived": "true", "user_id": user_id}, headers=h)
+    assert r.status_code == HTTPStatus.OK, r.text
+    assert {o["id"]: [i["product_id"] for i in o["items"]] for o in r.json()} == {
+        confirmed: [prod_id],
+        canceled: [prod_id],
+    }
+
+    # день пересчитывается после подтверждения оставшегося заказа — архивный в продажах остаётся
+    client.patch(f"/admin/orders/{new}", json={"status": "confirmed"}, headers=h)
+    refresh_sales_rollups(db)
+    r = client.get(
+        "/admin/reports/sales",
+        params={"from": DAY.isoformat(), "to": DAY.isoformat(), "group_by": "product", "limit": 1000},
+        headers=h,
+    )
+    row = next(row for row in r.json()["rows"] if row["id"] == prod_id)
+    assert (row["units"], row["orders"]) == (6, 3)
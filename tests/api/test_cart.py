@@ -0,0 +1,114 @@
+from http import HTTPStatus
+from uuid import uuid4
+
+from app.models.catalog import Inventory, Product
+
+
+def _user_headers(client) -> dict[str, str]:
+    email = f"cart_{uuid4().hex[:8]}@example.com"
+    r = client.post("/auth/register", json={"email": email, "password": "x123456"})
+    assert r.status_code == HTTPStatus.CREATED
+    r = client.post("/auth/login", data={"username": email, "password": "x123456"})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _products(db) -> tuple[int, int]:
+    s = uuid4().hex[:6]
+    a = Product(sku=f"CA-{s}", name=f"Cart A {s}", slug=f"cart-a-{s}", price_cents=250)
+    b = Product(sku=f"CB-{s}", name=f"Cart B {s}", slug=f"cart-b-{s}", price_cents=1000)
+    db.add_all([a, b])
+    db.flush()
+    db.add(Inventory(product_id=b.id, qty=3))
+    db.commit()
+    return a.id, b.id
+
+
+def test_cart_flow_and_checkout(client, db, max_queries):
+    headers = _user_headers(client)
+    a, b = _products(db)
+
+    assert client.get("/cart", headers=headers).json() == {"items": [], "total_cents": 0}
+
+    r = client.post("/cart/items", json={"product_id": a, "quantity": 2}, headers=headers)
+    assert r.status_code == HTTPStatus.OK, r.text
+    client.post("/cart/items", json={"product_id": a, "quantity": 1}, headers=headers)
+    client.post("/cart/items", json={"product_id": b, "quantity": 2}, headers=headers)
+
+    # чтение корзины — без Postgres
+    with max_queries(0):
+        r = client.get("/cart", headers=headers)
+    cart = r.json()
+    lines = {line["product_id"]: line for line in cart["items"]}
+    assert lines[a]["quantity"] == 3 and lines[a]["price_cents"] == 250 and lines[a]["stock"] is None
+    assert lines[b]["quantity"] == 2 and lines[b]["stock"] == 3 and not lines[b]["stale"]
+    assert cart["total_cents"] == 3 * 250 + 2 * 1000
+
+    # больше остатка — 400, корзина не меняется
+    r = client.post("/cart/items", json={"product_id": b, "quantity": 2}, headers=headers)
+    assert r.status_code == HTTPStatus.BAD_REQUEST
+    r = client.put(f"/cart/items/{b}", json={"quantity": 4}, headers=headers)
+    assert r.status_code == HTTPStatus.BAD_REQUEST
+    assert {line["product_id"]: line["quantity"] for line in client.get("/cart", headers=headers).json()["items"]} == {
+        a: 3,
+        b: 2,
+    }
+
+    r = client.put(f"/cart/items/{a}", json={"quantity": 1}, headers=headers)
+    assert r.status_code == HTTPStatus.OK
+    assert client.post("/cart/items", json={"product_id": 999999999}, headers=headers).status_code == 404
+
+    # оформление без повторной передачи позиций
+    r = client.post("/cart/checkout", headers=headers)
+    assert r.status_code == HTTPStatus.CREATED, r.text
+    assert r.json()["total_cents"] == 250 + 2 * 1000
+    assert client.get("/cart", headers=headers).json()["items"] == []
+    assert client.post("/cart/checkout", headers=headers).status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_cart_stale_snapshot_is_refreshed_in_background(client, db, monkeypatch):
+    from app.core.config import settings
+
+    headers = _user_headers(client)
+    a, _ = _products(db)
+    client.post("/cart/items", json={"product_id": a}, headers=headers)
+    client.delete(f"/cart/items/{a}", headers=headers)
+    client.post("/cart/items", json={"product_id": a}, headers=headers)
+
+    db.query(Product).filter_by(id=a).update({"price_cents": 300})
+    db.commit()
+
+    monkeypatch.setattr(settings, "cart_snapshot_max_age", -1)
+    # старый снимок отдаётся сразу, обновление — фоновой задачей после ответа
+    first = client.get("/cart", headers=headers).json()["items"][0]
+    assert first["price_cents"] == 250 and first["stale"] is True
+    monkeypatch.setattr(settings, "cart_snapshot_max_age", 300)
+    second = client.get("/cart", headers=headers).json()["items"][0]
+    assert second["price_cents"] == 300 and second["stale"] is False
+
+
+def test_checkout_keeps_items_added_meanwhile(client, db, monkeypatch):
+    from app.api.services import cart as cart_service
+
+    headers = _user_headers(client)
+    a, b = _products(db)
+    client.post("/cart/items", json={"product_id": a, "quantity": 2}, headers=headers)
+    create_order = cart_service.create_order_for_user
+
+    def create_order_while_adding(db, user_id, order_in):
+        # вторая вкладка добавляет товары, пока заказ оформляется
+        client.post("/cart/items", json={"product_id": a, "quantity": 1}, headers=headers)
+        client.post("/cart/items", json={"product_id": b, "quantity": 1}, headers=headers)
+        return create_order(db, user_id, order_in)
+
+    monkeypatch.setattr(cart_service, "create_order_for_user", create_order_while_adding)
+    r = client.post("/cart/checkout", headers=headers)
+    assert r.status_code == HTTPStatus.CREATED, r.text
+    assert r.json()["total_cents"] == 2 * 250
+
+    left = client.get("/cart", headers=headers).json()["items"]
+    assert {line["product_id"]: line["quantity"] for line in left} == {a: 1, b: 1}
+
+
+def test_cart_requires_token(client):
+    assert client.get("/cart").status_code == HTTPStatus.UNAUTHORIZED
+    assert client.get("/cart", headers={"Authorization": "Bearer nope"}).status_code == HTTPStatus.UNAUTHORIZED
@@ -0,0 +1,119 @@
+from uuid import uuid4
+
+from app.models.catalog import Product
+from tests.api.test_admin_media_inventory import _make_admin_token
+
+
+def _category(client, headers, name: str, parent_id: int | None = None) -> int:
+    s = uuid4().hex[:6]
+    r = client.post(
+        "/admin/categories",
+        json={"name": name, "slug": f"{name.lower()}-{s}", "parent_id": parent_id},
+        headers=headers,
+    )
+    assert r.status_code == 201, r.text
+    return r.json()["id"]
+
+
+def test_subtree_filter_and_breadcrumbs(client, db, drain_outbox):
+    headers = {"Authorization": f"Bearer {_make_admin_token(client)}"}
+    electronics = _category(client, headers, "Electronics")
+    phones = _category(client, headers, "Smartphones", electronics)
+    android = _category(client, headers, "Android", phones)
+    drain_outbox()
+
+    s = uuid4().hex[:8]
+    db.add(Product(sku=f"SUB-{s}", name=f"Subtree {s}", slug=f"subtree-{s}", category_id=android, price_cents=100))
+    db.commit()
+
+    def listing(cat_id: int, **params) -> int:
+        r = client.get("/products", params={"category_id": cat_id, "q": f"subtree {s}", **params})
+        assert r.status_code == 200, r.text
+        return r.json()["total"]
+
+    assert listing(electronics) == 0
+    assert listing(electronics, include_descendants=True) == 1
+    assert listing(phones, include_descendants=True) == 1
+    facets = client.get(
+        "/products/facets",
+        params={"category_id": electronics, "include_descendants": True, "q": f"subtree {s}"},
+    )
+    assert facets.json()["categories"] == [{"id": android, "count": 1}]
+
+    r = client.get(f"/categories/{android}/breadcrumbs")
+    assert r.status_code == 200
+    assert [c["id"] for c in r.json()] == [electronics, phones, android]
+
+    # переносим «Smartphones» в корень: поддерево «Electronics» больше не содержит товар
+    r = client.patch(f"/admin/categories/{phones}", json={"parent_id": None}, headers=headers)
+    assert r.status_code == 200, r.text
+    drain_outbox()  # новое поколение каталога и снимок дерева — после commit, воркером
+    assert listing(electronics, include_descendants=True) == 0
+    assert listing(phones, include_descendants=True) == 1
+    assert [c["id"] for c in client.get(f"/categories/{android}/breadcrumbs").json()] == [phones, android]
+
+    # и обратно, под «Electronics»
+    r = client.patch(f"/admin/categories/{phones}", json={"parent_id": electronics}, headers=headers)
+    assert r.status_code == 200, r.text
+    drain_outbox()
+    assert listing(electronics, include_descendants=True) == 1
+
+
+def test_category_cycles_and_delete(client, drain_outbox):
+    headers = {"Authorization": f"Bearer {_make_admin_token(client)}"}
+    root = _category(client, headers, "Root")
+    child = _category(client, headers, "Child", root)
+    leaf = _category(client, headers, "Leaf", child)
+    drain_outbox()
+
+    # нельзя подвесить категорию под себя или своего потомка
+    for parent in (root, leaf):
+        r = client.patch(f"/admin/categories/{root}", json={"parent_id": parent}, headers=headers)
+        assert r.status_code == 400, r.text
+    r = client.post(
+        "/admin/categories", json={"name": "X", "slug": f"x-{uuid4().hex[:6]}", "parent_id": 0}, headers=headers
+    )
+    assert r.status_code == 400
+
+    # удаление середины: потомки становятся корнями
+    assert client.delete(f"/admin/categories/{child}", headers=headers).status_code == 204
+    drain_outbox()
+    assert [c["id"] for c in client.get(f"/categories/{leaf}/breadcrumbs").json()] == [leaf]
+    assert client.get(f"/categories/{child}/breadcrumbs").status_code == 404
+
+
+def test_public_tree_and_brands_from_snapshot(client, max_queries, drain_outbox):
+    headers = {"Authorization": f"Bearer {_make_admin_token(client)}"}
+    parent = _category(client, headers, "TreeRoot")
+    child = _category(client, headers, "TreeChild", parent)
+    drain_outbox()
+
+    r = client.get("/categories")
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    node = next(n for n in r.json() if n["id"] == parent)
+    assert [c["id"] for c in node["children"]] == [child]
+
+    # попадание в снимок: ни одного SQL-запроса, условный GET → 304
+    with max_queries(0):
+        assert client.get("/categories").headers["etag"] == etag
+        assert client.get("/categories", headers={"If-None-Match": etag}).status_code == 304
+
+    # правка категории пересобирает снимок
+    r = client.patch(f"/admin/categories/{child}", json={"name": "Renamed"}, headers=headers)
+    assert r.status_code == 200
+    drain_outbox()
+    r = client.get("/categories", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    node = next(n for n in r.json() if n["id"] == parent)
+    assert node["children"][0]["name"] == "Renamed"
+
+    s = uuid4().hex[:6]
+    b = client.post("/admin/brands", json={"name": f"SnapBrand-{s}", "slug": f"snapbrand-{s}"}, headers=headers)
+    assert b.status_code == 201
+    drain_outbox()
+    r = client.get("/brands")
+    assert r.status_code == 200
+    assert b.json() in r.json()
+    with max_queries(0):
+        assert client.get("/brands", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
@@ -0,0 +1,106 @@
+from uuid import uuid4
+
+from app.api.services import warmer
+from app.api.services.catalog import ListingParams
+from app.core.cache import get_redis
+from app.core.config import settings
+
+
+def test_large_json_is_compressed(client):
+    # /openapi.json — заведомо больше порога сжатия
+    r = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["vary"]
+    assert r.json()["info"]["title"] == "E-commerce Core API"
+
+    r = client.get("/openapi.json", headers={"Accept-Encoding": "br, gzip"})
+    assert r.headers["content-encoding"] == "br"
+    assert r.json()["info"]["title"] == "E-commerce Core API"
+
+    r = client.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+
+
+def test_small_response_is_not_compressed(client):
+    r = client.get("/healthz", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert "content-encoding" not in r.headers
+
+
+def test_cached_listing_is_compressed(client, sample_catalog, monkeypatch):
+    monkeypatch.setattr(settings, "compression_min_size", 0)
+    params = {"brand_id": sample_catalog["brand_id"], "q": "a", "limit": 17}
+
+    miss = client.get("/products", params=params, headers={"Accept-Encoding": "gzip"})
+    assert miss.status_code == 200
+    assert miss.headers["content-encoding"] == "gzip"
+
+    # попадание собирается из элементов товаров и сжимается так же, ETag — по несжатому телу
+    hit = client.get("/products", params=params, headers={"Accept-Encoding": "gzip"})
+    assert hit.headers["content-encoding"] == "gzip"
+    assert hit.json() == miss.json()
+    assert hit.headers["etag"] == miss.headers["etag"]
+
+    # у сжатого и несжатого представлений общий только слабый валидатор
+    plain = client.get("/products", params=params, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == miss.json()
+    assert plain.headers["etag"].startswith('"')
+    assert miss.headers["etag"] == "W/" + plain.headers["etag"]
+
+    # условный запрос со слабой формой: 304 с тем же W/ валидатором
+    r = client.get(
+        "/products", params=params, headers={"Accept-Encoding": "gzip", "If-None-Match": miss.headers["etag"]}
+    )
+    assert r.status_code == 304
+    assert r.headers["etag"] == miss.headers["etag"]
+    r = client.get(
+        "/products", params=params, headers={"Accept-Encoding": "identity", "If-None-Match": plain.headers["etag"]}
+    )
+    assert r.status_code == 304
+    assert r.headers["etag"] == plain.headers["etag"]
+
+
+def test_popular_listing_is_served_from_gzip_copy(client, sample_catalog, monkeypatch):
+    monkeypatch.setattr(settings, "compression_min_size", 0)
+    params = {"brand_id": sample_catalog["brand_id"], "limit": 13}
+    member = ListingParams(brand_id=sample_catalog["brand_id"], limit=13).dumps()
+    get_redis().zadd(warmer.LISTING_HITS_KEY, {member: 10**9})
+    try:
+        first = client.get("/products", params=params, headers={"Accept-Encoding": "gzip"})
+        assert first.headers["content-encoding"] == "gzip"
+
+        def assemble(*args, **kwargs):
+            raise AssertionError("page assembled despite the gzip copy")
+
+        # популярная страница: готовая gzip-копия из Redis, без сборки и сжатия
+        monkeypatch.setattr("app.api.routers.products.listing_page", assemble)
+        hit = client.get("/products", params=params, headers={"Accept-Encoding": "gzip"})
+        assert hit.status_code == 200
+        assert hit.headers["content-encoding"] == "gzip"
+        assert hit.headers["etag"] == first.headers["etag"]
+        assert hit.headers["etag"].startswith("W/")
+        assert "Accept-Encoding" in hit.headers["vary"]
+        assert hit.json() == first.json()
+    finally:
+        get_redis().zrem(warmer.LISTING_HITS_KEY, member)
+
+
+def test_streaming_is_compressed(client):
+    from fastapi.responses import StreamingResponse
+
+    from app.main import app
+
+    path = f"/__stream_{uuid4().hex[:6]}"
+
+    @app.get(path)
+    def _stream():
+        return StreamingResponse((b'{"chunk": %d}\n' % i for i in range(500)), media_type="text/plain")
+
+    try:
+        r = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert len(r.text.splitlines()) == 500
+    finally:
+        app.router.routes.pop()
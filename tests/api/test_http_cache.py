@@ -0,0 +1,119 @@
+from uuid import uuid4
+
+from app.core.cache import catalog_generation, get_redis, product_card_key
+from app.models.catalog import Product
+from tests.api.test_admin_media_inventory import _make_admin_token
+
+
+def test_product_detail_etag_and_304(client, db, sample_catalog, max_queries):
+    prod = db.query(Product).filter_by(sku="A1").one()
+
+    r = client.get(f"/products/{prod.id}")
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert etag.startswith('"')
+    assert r.headers["cache-control"].startswith("public, max-age=")
+    assert r.headers["surrogate-key"] == f"product-{prod.id}"
+
+    # ETag сверяется по Redis: ни одного SQL-запроса, пустое тело
+    with max_queries(0):
+        r = client.get(f"/products/{prod.id}", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
+
+    r = client.get(f"/products/{prod.id}", headers={"If-None-Match": '"stale"'})
+    assert r.status_code == 200
+    assert r.headers["etag"] == etag
+
+
+def test_listing_etag_changes_after_catalog_edit(client, drain_outbox):
+    headers = {"Authorization": f"Bearer {_make_admin_token(client)}"}
+    s = uuid4().hex[:8]
+    params = {"q": f"etag-{s}"}
+
+    r = client.get("/products", params=params)
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert r.headers["surrogate-key"] == "products"
+
+    # попадание в кэш отдаёт тот же ETag и 304 на условный запрос
+    assert client.get("/products", params=params).headers["etag"] == etag
+    assert client.get("/products", params=params, headers={"If-None-Match": etag}).status_code == 304
+
+    p = client.post(
+        "/admin/products",
+        json={"sku": f"ET-{s}", "name": f"Etag-{s}", "slug": f"etag-{s}", "price_cents": 100},
+        headers=headers,
+    )
+    assert p.status_code == 201, p.text
+    drain_outbox()
+
+    # новое поколение каталога → новый ключ, новое тело, новый ETag
+    r = client.get("/products", params=params, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert r.json()["total"] == 1
+
+    sim = client.get(f"/products/{p.json()['id']}/similar")
+    assert sim.status_code == 200
+    assert client.get(sim.url, headers={"If-None-Match": sim.headers["etag"]}).status_code == 304
+
+
+def test_product_edit_resets_only_its_listing_entry(client, drain_outbox, max_queries):
+    headers = {"Authorization": f"Bearer {_make_admin_token(client)}"}
+    s = uuid4().hex[:8]
+    ids = [
+        client.post(
+            "/admin/products",
+            json={"sku": f"LC{i}-{s}", "name": f"Card-{s}-{i}", "slug": f"card-{s}-{i}", "price_cents": 100 + i},
+            headers=headers,
+        ).json()["id"]
+        for i in range(3)
+    ]
+    drain_outbox()
+    params = {"q": f"card-{s}", "sort": "price_asc"}
+    first = client.get("/products", params=params)
+    assert [p["id"] for p in first.json()["items"]] == ids
+    generation = catalog_generation()
+
+    # sku не влияет на состав и порядок: поколение то же, сброшен один элемент
+    r = client.patch(f"/admin/products/{ids[1]}", json={"sku": f"LCX-{s}"}, headers=headers)
+    assert r.status_code == 200, r.text
+    drain_outbox()
+    assert catalog_generation() == generation
+    assert get_redis().exists(product_card_key(ids[0]), product_card_key(ids[1])) == 1
+
+    # страница из кэша, из Postgres — только сброшенный товар
+    with max_queries(1):
+        r = client.get("/products", params=params)
+    assert [p["sku"] for p in r.json()["items"]] == [f"LC0-{s}", f"LCX-{s}", f"LC2-{s}"]
+    assert r.headers["etag"] != first.headers["etag"]
+    with max_queries(0):
+        assert client.get("/products", params=params).json() == r.json()
+        # ETag страницы сменился вместе с элементом: старый больше не даёт 304
+        assert (
+            client.get("/products", params=params, headers={"If-None-Match": first.headers["etag"]}).status_code == 200
+        )
+
+    # цена меняет порядок — новое поколение
+    client.patch(f"/admin/products/{ids[0]}", json={"price_cents": 999}, headers=headers)
+    drain_outbox()
+    assert catalog_generation() > generation
+    assert [p["id"] for p in client.get("/products", params=params).json()["items"]] == [ids[1], ids[2], ids[0]]
+
+
+def test_listing_304_does_not_assemble_the_page(client, sample_catalog, monkeypatch, max_queries):
+    params = {"brand_id": sample_catalog["brand_id"], "limit": 7}
+    headers = {"Accept-Encoding": "identity"}
+    etag = client.get("/products", params=params, headers=headers).headers["etag"]
+
+    def assemble(*args, **kwargs):
+        raise AssertionError("page assembled for a conditional request")
+
+    # ETag страницы лежит рядом со списком id: ни Postgres, ни MGET элементов, ни разбора списка
+    monkeypatch.setattr("app.api.routers.products.listing_page", assemble)
+    with max_queries(0):
+        r = client.get("/products", params=params, headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# с запасом к замеренному локально (~150 мс): ловит возврат тяжёлых импортов, а не шум CI
+IMPORT_MAIN_BUDGET_MS = 500
+# поднимаются лениво: пул БД (диалект psycopg), bcrypt, сам FastAPI с роутерами
+DEFERRED = ("psycopg", "passlib", "fastapi", "sqlalchemy", "app.api.routers.products")
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Накопленное время импорта (мкс) по модулям из `python -X importtime`."""
+    stderr = _python("-X", "importtime", "-c", f"import {module}").stderr
+    times = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_main_is_cheap():
+    times = _import_times("app.main")
+    assert times["app.main"] / 1000 < IMPORT_MAIN_BUDGET_MS, f"import app.main took {times['app.main'] / 1000:.0f} ms"
+    assert not [m for m in DEFERRED if m in times]
+
+
+def test_create_app_does_not_open_resources():
+    # фабрика собирает роутеры, но движок БД и bcrypt появляются только в lifespan/при первом запросе
+    code = (
+        "import sys; from app.main import create_app; create_app(); "
+        "print(','.join(m for m in ('psycopg', 'passlib') if m in sys.modules))"
+    )
+    assert _python("-c", code).stdout.strip() == ""
@@ -0,0 +1,28 @@
+from uuid import uuid4
+
+
+def _sample(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found in /metrics")
+
+
+def test_metrics_exposes_route_latency_and_db_stats(client):
+    # уникальный q — гарантированный промах кэша и поход в БД
+    r = client.get(f"/products?q={uuid4().hex}")
+    assert r.status_code == 200
+
+    m = client.get("/metrics")
+    assert m.status_code == 200
+    assert m.headers["content-type"].startswith("text/plain")
+    body = m.text
+
+    # метки — шаблон маршрута, а не сырой путь
+    assert _sample(body, 'http_requests_total{method="GET",route="/products",status="200"}') >= 1
+    assert _sample(body, 'http_request_duration_seconds_count{method="GET",route="/products"}') >= 1
+    assert 'http_requests_in_flight{method="GET"}' in body
+    assert "products_cache_requests_total" in body
+    assert _sample(body, "db_pool_checkout_wait_seconds_count") >= 1
+    # запросы к БД из sync-эндпоинта (threadpool) попадают в статистику запроса
+    assert _sample(body, 'db_queries_per_request_sum{route="/products"}') >= 1
@@ -0,0 +1,85 @@
+from uuid import uuid4
+
+import psycopg
+from sqlalchemy import select
+
+from app.core import outbox
+from app.models.outbox import OutboxEvent
+from app.worker import _listen_dsn
+from tests.api.test_admin_media_inventory import _make_admin_token
+
+
+def _events(db, topic: str) -> list[OutboxEvent]:
+    db.expire_all()
+    return list(db.scalars(select(OutboxEvent).where(OutboxEvent.topic == topic)))
+
+
+def test_side_effects_run_after_commit_in_worker(client, db, drain_outbox):
+    headers = {"Authorization": f"Bearer {_make_admin_token(client)}"}
+    s = uuid4().hex[:8]
+    p = client.post(
+        "/admin/products",
+        json={"sku": f"OB-{s}", "name": f"Outbox {s}", "slug": f"outbox-{s}", "price_cents": 100},
+        headers=headers,
+    )
+    prod_id = p.json()["id"]
+    drain_outbox()
+    assert client.get(f"/products/{prod_id}").json()["price_cents"] == 100
+
+    r = client.patch(f"/admin/products/{prod_id}", json={"price_cents": 250}, headers=headers)
+    assert r.status_code == 200, r.text
+
+    # событие записано вместе с правкой; до воркера карточка ещё из кэша
+    pending = [e for e in _events(db, "cache.invalidate") if prod_id in e.payload["product_ids"]]
+    assert len(pending) == 1 and pending[0].payload["listings"] is True
+    assert client.get(f"/products/{prod_id}").json()["price_cents"] == 100
+
+    assert drain_outbox() >= 1
+    assert client.get(f"/products/{prod_id}").json()["price_cents"] == 250
+    assert not [e for e in _events(db, "cache.invalidate") if prod_id in e.payload["product_ids"]]
+
+
+def test_rolled_back_transaction_leaves_no_event(db):
+    topic = f"test.{uuid4().hex[:8]}"
+    outbox.enqueue(db, topic, {})
+    db.rollback()
+    assert _events(db, topic) == []
+
+
+def test_failed_handler_is_retried_later(db, monkeypatch):
+    topic = f"test.{uuid4().hex[:8]}"
+    calls = []
+
+    def flaky(payload: dict) -> None:
+        calls.append(payload)
+        raise RuntimeError("redis is down")
+
+    monkeypatch.setitem(outbox._handlers, topic, flaky)
+    outbox.enqueue(db, topic, {"n": 1})
+    db.commit()
+
+    outbox.drain(db)
+    (event,) = _events(db, topic)
+    assert calls == [{"n": 1}]
+    assert event.attempts == 1 and "redis is down" in event.last_error
+    assert event.available_at > event.created_at
+
+    # отложенное событие повторно не берётся до available_at
+    outbox.drain(db)
+    assert len(calls) == 1
+
+    db.delete(event)
+    db.commit()
+
+
+def test_commit_wakes_up_listener(db):
+    with psycopg.connect(_listen_dsn(), autocommit=True) as conn:
+        conn.execute(f"LISTEN {outbox.CHANNEL}")
+        topic = f"test.{uuid4().hex[:8]}"
+        outbox.enqueue(db, topic, {})
+        db.commit()
+        notes = list(conn.notifies(timeout=2, stop_after=1))
+    assert [n.channel for n in notes] == [outbox.CHANNEL]
+    for event in _events(db, topic):
+        db.delete(event)
+    db.commit()
@@ -0,0 +1,188 @@
+import asyncio
+import time
+from http import HTTPStatus
+from uuid import uuid4
+
+import httpx
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.services.payment_gateway import Charge, HttpPaymentGateway, WebhookEvent, get_gateway, sign_webhook
+from app.api.services.payments import apply_webhook, record_charge, start_payment
+from app.core.config import settings
+from app.main import create_app
+from app.models.payment import Payment, PaymentStatus
+from tests.api.test_admin_orders_bulk import _setup
+
+
+def _webhook(client, payload: dict, secret: str | None = None):
+    body = orjson.dumps(payload)
+    ts = int(time.time())
+    headers = {
+        "content-type": "application/json",
+        "x-signature-timestamp": str(ts),
+        "x-signature": sign_webhook(body, ts, secret or settings.payment_webhook_secret),
+    }
+    return client.post("/payments/webhook", content=body, headers=headers)
+
+
+@pytest.fixture
+def pending_gateway(monkeypatch):
+    """HTTP-провайдер, который всегда отвечает `pending`: итог приходит вебхуком."""
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        reference = orjson.loads(request.content)["reference"]
+        return httpx.Response(201, json={"id": f"prov-{reference}", "status": "pending"})
+
+    gateway = HttpPaymentGateway("http://provider", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr("app.api.services.payments.get_gateway", lambda: gateway)
+    monkeypatch.setattr("app.api.routers.payments.get_gateway", lambda: gateway)
+    return seen
+
+
+def test_demo_provider_pays_at_once(client):
+    h, _, (order_id,) = _setup(client, 1)
+
+    r = client.post(f"/orders/{order_id}/pay", headers=h)
+    assert r.status_code == HTTPStatus.CREATED, r.text
+    assert r.json()["status"] == "paid"
+    assert client.get("/orders/me", headers=h).json()[0]["status"] == "confirmed"
+
+    r = client.post(f"/orders/{order_id}/pay", headers=h)
+    assert r.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_webhook_completes_pending_payment_once(client, pending_gateway):
+    h, _, (order_id,) = _setup(client, 1)
+
+    r = client.post(f"/orders/{order_id}/pay", headers=h)
+    assert r.status_code == HTTPStatus.CREATED, r.text
+    payment = r.json()
+    assert payment["status"] == "pending"
+    assert pending_gateway[0].headers["idempotency-key"] == f"payment-{payment['id']}"
+
+    # пока платёж в процессе, второй не создаётся
+    assert client.post(f"/orders/{order_id}/pay", headers=h).status_code == HTTPStatus.CONFLICT
+
+    event = {"id": "evt-1", "type": "payment.succeeded", "payment_id": payment["provider_payment_id"]}
+    r = _webhook(client, event, secret="wrong")
+    assert r.status_code == HTTPStatus.BAD_REQUEST
+
+    assert _webhook(client, event).json() == {"applied": True}
+    assert _webhook(client, event).json() == {"applied": False}
+    assert client.get("/orders/me", headers=h).json()[0]["status"] == "confirmed"
+
+
+def test_webhook_before_provider_id_is_saved(client, db, pending_gateway):
+    h, _, (order_id,) = _setup(client, 1)
+    email = client.get("/users/me", headers=h).json()["email"]
+    payment_id, _ = start_payment(db, email, order_id, "http")
+    provider_id = f"prov-early-{uuid4().hex}"
+
+    # провайдер прислал итог раньше, чем мы сохранили его id, — платёж находится по reference
+    event = WebhookEvent(
+        event_id="evt-2", provider_payment_id=provider_id, status=PaymentStatus.FAILED, reference=payment_id
+    )
+    assert apply_webhook(db, "http", event) is True
+    record_charge(db, payment_id, Charge(provider_payment_id=provider_id, status=PaymentStatus.PENDING))
+    assert db.get(Payment, payment_id).status == PaymentStatus.FAILED
+
+    # после неудачной оплаты можно попробовать снова
+    assert client.post(f"/orders/{order_id}/pay", headers=h).status_code == HTTPStatus.CREATED
+
+
+def test_http_gateway_retries_with_same_idempotency_key():
+    keys: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        keys.append(request.headers["idempotency-key"])
+        if len(keys) == 1:
+            return httpx.Response(503)
+        return httpx.Response(201, json={"id": "prov-1", "status": "succeeded"})
+
+    gateway = HttpPaymentGateway("http://provider", transport=httpx.MockTransport(handler))
+
+    async def charge_once():
+        try:
+            return await gateway.create_charge(reference=42, amount_cents=100)
+        finally:
+            await gateway.aclose()
+
+    charge = asyncio.run(charge_once())
+
+    assert charge == Charge(provider_payment_id="prov-1", status=PaymentStatus.PAID)
+    assert keys == ["payment-42", "payment-42"]
+
+
+def test_provider_timeout_leaves_payment_pending(client, db, monkeypatch):
+    h, _, (order_id,) = _setup(client, 1)
+    answers = ["timeout", "timeout", "pending"]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if answers.pop(0) == "timeout":
+            raise httpx.ReadTimeout("provider is slow", request=request)
+        reference = orjson.loads(request.content)["reference"]
+        return httpx.Response(201, json={"id": f"prov-slow-{uuid4().hex}-{reference}", "status": "pending"})
+
+    gateway = HttpPaymentGateway("http://provider", retries=1, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr("app.api.services.payments.get_gateway", lambda: gateway)
+    monkeypatch.setattr("app.api.routers.payments.get_gateway", lambda: gateway)
+
+    # провайдер мог списать деньги — платёж не FAILED, а ждёт вебхук
+    r = client.post(f"/orders/{order_id}/pay", headers=h)
+    assert r.status_code == HTTPStatus.BAD_GATEWAY
+    payment = db.query(Payment).filter_by(order_id=order_id).one()
+    assert payment.status == PaymentStatus.PENDING
+
+    # повтор оплаты отправляет тот же платёж, а не создаёт второй
+    r = client.post(f"/orders/{order_id}/pay", headers=h)
+    assert r.status_code == HTTPStatus.CREATED, r.text
+    assert r.json()["id"] == payment.id
+
+    event = {"id": "evt-3", "type": "payment.succeeded", "payment_id": r.json()["provider_payment_id"]}
+    assert _webhook(client, event).json() == {"applied": True}
+    assert client.get("/orders/me", headers=h).json()[0]["status"] == "confirmed"
+
+
+def test_declined_charge_fails_payment(client, db, monkeypatch):
+    h, _, (order_id,) = _setup(client, 1)
+    gateway = HttpPaymentGateway(
+        "http://provider", transport=httpx.MockTransport(lambda request: httpx.Response(422, json={"error": "card"}))
+    )
+    monkeypatch.setattr("app.api.services.payments.get_gateway", lambda: gateway)
+
+    r = client.post(f"/orders/{order_id}/pay", headers=h)
+    assert r.status_code == HTTPStatus.PAYMENT_REQUIRED
+    assert db.query(Payment.status).filter_by(order_id=order_id).scalar() == PaymentStatus.FAILED
+
+
+def test_provider_auth_error_keeps_payment_pending(client, db, monkeypatch):
+    h, _, (order_id,) = _setup(client, 1)
+    gateway = HttpPaymentGateway(
+        "http://provider", transport=httpx.MockTransport(lambda request: httpx.Response(401, json={"error": "key"}))
+    )
+    monkeypatch.setattr("app.api.services.payments.get_gateway", lambda: gateway)
+
+    # неверный ключ API — не отказ по платежу: не проваливаем его навсегда
+    r = client.post(f"/orders/{order_id}/pay", headers=h)
+    assert r.status_code == HTTPStatus.BAD_GATEWAY
+    assert db.query(Payment.status).filter_by(order_id=order_id).scalar() == PaymentStatus.PENDING
+
+
+def test_http_provider_requires_webhook_secret(monkeypatch):
+    monkeypatch.setattr(settings, "payment_provider", "http")
+    monkeypatch.setattr(settings, "payment_webhook_secret", "change_me")
+    get_gateway.cache_clear()
+    try:
+        # приложение не стартует с общеизвестным секретом вебхука
+        with pytest.raises(ValueError, match="PAYMENT_WEBHOOK_SECRET"):
+            with TestClient(create_app()):
+                pass
+
+        monkeypatch.setattr(settings, "payment_webhook_secret", "s3cret")
+        assert isinstance(get_gateway(), HttpPaymentGateway)
+    finally:
+        get_gateway.cache_clear()
@@ -30,3 +30,44 @@ def test_products_sort_price_desc(client, db):
     data = r.json()
     prices = [p["price_cents"] for p in data["items"]]
     assert prices == sorted(prices, reverse=True)
+
+
+def test_facets_match_listing_filters(client, db, sample_catalog, max_queries):
+    from uuid import uuid4
+
+    from app.models.catalog import Product
+
+    s = uuid4().hex[:8]
+    prices = [500, 900, 3000, 150_000]
+    db.add_all(
+        Product(
+            sku=f"F-{s}-{i}",
+            name=f"Facet {s} {i}",
+            slug=f"facet-{s}-{i}",
+            brand_id=sample_catalog["brand_id"] if i < 2 else None,
+            category_id=sample_catalog["category_id"],
+            price_cents=price,
+            is_active=True,
+        )
+        for i, price in enumerate(prices)
+    )
+    db.commit()
+
+    with max_queries(1):
+        r = client.get("/products/facets", params={"q": f"facet {s}"})
+    assert r.status_code == 200, r.text
+    data = r.json()
+
+    assert data["total"] == 4 == client.get("/products", params={"q": f"facet {s}"}).json()["total"]
+    assert data["brands"] == [{"id": sample_catalog["brand_id"], "count": 2}, {"id": None, "count": 2}]
+    assert data["categories"] == [{"id": sample_catalog["category_id"], "count": 4}]
+    price = {(b["min_cents"], b["max_cents"]): b["count"] for b in data["price"]}
+    assert price[(0, 1000)] == 2
+    assert price[(2500, 5000)] == 1
+    assert price[(100_000, None)] == 1
+    assert sum(price.values()) == 4
+
+    # те же фильтры, что у листинга
+    r = client.get("/products/facets", params={"q": f"facet {s}", "max_price": 1000})
+    assert r.json()["total"] == 2
+    assert client.get("/products/facets", params={"q": f"nothing-{s}"}).json()["total"] == 0
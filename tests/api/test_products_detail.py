@@ -74,3 +74,43 @@ def test_product_detail_smoke(client, db):
     assert isinstance(body["images"], list) and len(body["images"]) >= 1
     assert body["inventory_qty"] == 2
     assert body["in_stock"] is True
+
+
+def test_products_batch(client, db, max_queries):
+    from app.core.cache import get_redis
+    from app.models.catalog import Inventory, Product, ProductImage
+
+    suf = uuid4().hex[:6]
+    products = [
+        Product(sku=f"BT-{suf}-{i}", name=f"Batch {suf} {i}", slug=f"batch-{suf}-{i}", price_cents=100 + i)
+        for i in range(3)
+    ]
+    products[2].is_active = False
+    db.add_all(products)
+    db.flush()
+    db.add(ProductImage(product_id=products[0].id, url="https://picsum.photos/seed/b/600/400", is_primary=True))
+    db.add(Inventory(product_id=products[1].id, qty=3))
+    db.commit()
+    a, b, inactive = (p.id for p in products)
+
+    # промах: товары + изображения + остатки, без запроса на каждый id
+    with max_queries(3):
+        r = client.get("/products/batch", params={"ids": f"{b},{a},{inactive},999999999,{b}"})
+    assert r.status_code == HTTPStatus.OK, r.text
+    data = r.json()
+    assert [p["id"] for p in data] == [b, a]
+    assert data[0]["inventory_qty"] == 3 and data[0]["in_stock"] is True
+    assert len(data[1]["images"]) == 1
+
+    # повтор — целиком из кэша карточек; совпадает с /products/{id}
+    with max_queries(0):
+        r = client.get("/products/batch", params=[("ids", a), ("ids", b)])
+    assert [p["id"] for p in r.json()] == [a, b]
+    assert r.json()[0] == client.get(f"/products/{a}").json()
+
+    # просмотры не считаются
+    assert get_redis().get(f"product:views:{b}") is None
+
+    assert client.get("/products/batch", params={"ids": "x"}).status_code == HTTPStatus.BAD_REQUEST
+    too_many = ",".join(str(i) for i in range(1, 202))
+    assert client.get("/products/batch", params={"ids": too_many}).status_code == HTTPStatus.BAD_REQUEST
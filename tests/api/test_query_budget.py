@@ -0,0 +1,52 @@
+from http import HTTPStatus
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.db import get_engine
+from tests.api.test_admin_media_inventory import _make_admin_token
+
+
+def test_listing_runs_items_and_count_only(client, max_queries):
+    # уникальный q — промах кэша
+    with max_queries(2):
+        r = client.get(f"/products?q={uuid4().hex}")
+    assert r.status_code == HTTPStatus.OK
+
+
+def test_admin_orders_list_has_no_n_plus_one(client, max_queries):
+    token = _make_admin_token(client)
+    h = {"Authorization": f"Bearer {token}"}
+    sfx = uuid4().hex[:6]
+
+    p = client.post(
+        "/admin/products",
+        json={"sku": f"QB-{sfx}", "name": f"Budget {sfx}", "slug": f"budget-{sfx}", "price_cents": 100},
+        headers=h,
+    )
+    assert p.status_code == HTTPStatus.CREATED, p.text
+    prod_id = p.json()["id"]
+
+    for _ in range(4):
+        r = client.post("/orders", json={"items": [{"product_id": prod_id, "quantity": 1}]}, headers=h)
+        assert r.status_code == HTTPStatus.CREATED, r.text
+    user_id = client.get("/users/me", headers=h).json()["id"]
+
+    # пользователь + заказы + позиции одним SELECT ... IN, независимо от числа заказов
+    with max_queries(3):
+        r = client.get(f"/admin/orders?user_id={user_id}", headers=h)
+    assert r.status_code == HTTPStatus.OK
+    assert len(r.json()) == 4
+    assert all(len(o["items"]) == 1 for o in r.json())
+
+
+def test_failed_statement_does_not_leak_start_time():
+    with get_engine().connect() as conn:
+        with pytest.raises(DBAPIError):
+            conn.execute(text("SELECT 1 / 0"))
+        assert conn.info.get("query_start") == []
+        conn.rollback()
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_start"] == []
@@ -0,0 +1,72 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse
+
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.ratelimit import LocalBuckets, RateLimiter, RateLimitMiddleware, Rule, route_class
+
+
+async def _ok(scope, receive, send):
+    await PlainTextResponse("ok")(scope, receive, send)
+
+
+def _client(limiter: RateLimiter) -> TestClient:
+    return TestClient(RateLimitMiddleware(_ok, limiter))
+
+
+def test_route_classes():
+    assert route_class("POST", "/auth/login", b"") == "auth"
+    assert route_class("GET", "/products", b"q=phone&limit=5") == "search"
+    assert route_class("GET", "/products", b"sort=price_asc") == "catalog"
+    assert route_class("GET", "/products", b"limit=5&q=%D1%82%D0%B5%D0%BB") == "search"
+    # только параметр с именем ровно q и непустым значением
+    assert route_class("GET", "/products", b"faq=1&sq=2&brand_id=3") == "catalog"
+    assert route_class("GET", "/products", b"ref=a%26q%3Dx") == "catalog"
+    assert route_class("GET", "/products", b"q=&limit=5") == "catalog"
+    assert route_class("GET", "/products/42", b"") == "catalog"
+    assert route_class("POST", "/cart/items", b"") == "write"
+    assert route_class("GET", "/orders", b"") == "default"
+
+
+def test_local_bucket_refills():
+    buckets = LocalBuckets()
+    rule = Rule.parse("3/60")
+    assert [buckets.hit("k", rule).allowed for _ in range(4)] == [True, True, True, False]
+    assert buckets.hit("k", rule).retry_after_ms > 0
+    # полное ведро при новом ключе
+    assert buckets.hit("other", rule).remaining == 2
+
+
+def test_redis_bucket_per_class_and_identity(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_auth", "3/60")
+    get_redis().delete("rl:auth:ip:testclient")
+    client = _client(RateLimiter(settings.redis_url))
+
+    codes = [client.post("/auth/login").status_code for _ in range(4)]
+    assert codes == [200, 200, 200, 429]
+    r = client.post("/auth/login")
+    assert r.status_code == 429 and int(r.headers["retry-after"]) >= 1
+    # ведро общее для всех процессов — лежит в Redis
+    assert get_redis().exists("rl:auth:ip:testclient")
+
+    # другой класс маршрута — своё ведро
+    assert client.get(f"/products?sort=x{uuid4().hex}").status_code == 200
+
+
+def test_falls_back_to_local_bucket_without_redis(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_search", "2/60")
+    client = _client(RateLimiter("redis://127.0.0.1:1/0"))
+    codes = [client.get("/products?q=x").status_code for _ in range(3)]
+    assert codes == [200, 200, 429]
+
+
+def test_in_flight_cap_sheds_with_503(client, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "max_in_flight", 0)
+    r = client.get("/")
+    assert r.status_code == 503 and r.headers["retry-after"] == "1"
+    assert client.get("/healthz").status_code == 200
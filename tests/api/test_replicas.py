@@ -0,0 +1,92 @@
+from uuid import uuid4
+
+from sqlalchemy import event, text
+
+import app.db as db_module
+from app.core.cache import get_redis, invalidate_product_cards, product_card_key
+from app.db import ReplicaRouter, get_engine, make_engine
+from tests.api.test_admin_media_inventory import _make_admin_token
+
+
+def _current_db(router: ReplicaRouter) -> str:
+    with router.connect() as conn:
+        return conn.scalar(text("SELECT current_database()"))
+
+
+def test_round_robin_skips_dead_replica_and_falls_back_to_primary():
+    # две «реплики» — разные базы того же сервера; третья недоступна
+    engine = get_engine()
+    other = make_engine(engine.url.set(database="postgres").render_as_string(hide_password=False))
+    same = make_engine(engine.url.render_as_string(hide_password=False))
+    dead = make_engine(engine.url.set(host="127.0.0.1", port=1).render_as_string(hide_password=False))
+    router = ReplicaRouter([other, dead, same], engine)
+    try:
+        seen = [_current_db(router) for _ in range(4)]
+        assert set(seen) == {"postgres", engine.url.database}
+        assert router.replicas[1].down_until > 0  # выведена из ротации
+
+        primary_only = ReplicaRouter([dead], engine)
+        primary_only.replicas[0].down_until = 0
+        assert _current_db(primary_only) == engine.url.database
+    finally:
+        for e in (other, same, dead):
+            e.dispose()
+
+
+def test_catalog_reads_go_to_replica_and_orders_to_primary(client, monkeypatch):
+    engine = get_engine()
+    replica = make_engine(engine.url.render_as_string(hide_password=False))
+    statements: list[str] = []
+    event.listen(replica, "before_cursor_execute", lambda conn, cur, stmt, *a: statements.append(stmt))
+    monkeypatch.setattr(db_module, "_read_router", ReplicaRouter([replica], engine))
+    try:
+        headers = {"Authorization": f"Bearer {_make_admin_token(client)}"}
+        s = uuid4().hex[:8]
+        prod_id = client.post(
+            "/admin/products",
+            json={"sku": f"RR-{s}", "name": f"Replica {s}", "slug": f"replica-{s}", "price_cents": 100},
+            headers=headers,
+        ).json()["id"]
+        assert statements == []
+
+        assert client.get("/products", params={"q": f"replica {s}"}).json()["total"] == 1
+        assert any("FROM products" in stmt for stmt in statements)
+
+        # заказ — запись и чтение-после-записи, только primary
+        statements.clear()
+        r = client.post("/orders", json={"items": [{"product_id": prod_id, "quantity": 1}]}, headers=headers)
+        assert r.status_code == 201, r.text
+        assert statements == []
+    finally:
+        replica.dispose()
+
+
+def test_product_caches_are_filled_from_primary(client, monkeypatch):
+    engine = get_engine()
+    replica = make_engine(engine.url.render_as_string(hide_password=False))
+    statements: list[str] = []
+    event.listen(replica, "before_cursor_execute", lambda conn, cur, stmt, *a: statements.append(stmt))
+    monkeypatch.setattr(db_module, "_read_router", ReplicaRouter([replica], engine))
+    try:
+        headers = {"Authorization": f"Bearer {_make_admin_token(client)}"}
+        s = uuid4().hex[:8]
+        prod_id = client.post(
+            "/admin/products",
+            json={"sku": f"RC-{s}", "name": f"Replica card {s}", "slug": f"replica-card-{s}", "price_cents": 100},
+            headers=headers,
+        ).json()["id"]
+        invalidate_product_cards(prod_id)
+
+        # с реплики — только total и id страницы; элементы и карточка читаются с primary,
+        # чтобы отстающая реплика не вернула в кэш уже сброшенную строку
+        items = client.get("/products", params={"q": f"replica card {s}"}).json()["items"]
+        assert [item["id"] for item in items] == [prod_id]
+        assert statements and not any("products.price_cents" in stmt for stmt in statements)
+        assert get_redis().exists(product_card_key(prod_id))
+
+        statements.clear()
+        assert client.get(f"/products/{prod_id}").status_code == 200
+        assert client.get("/products/batch", params={"ids": prod_id}).status_code == 200
+        assert statements == []
+    finally:
+        replica.dispose()
@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from app.api.services.reports import refresh_sales_rollups
+from app.db import SessionLocal
+from tests.api.test_admin_media_inventory import _make_admin_token
+
+
+def _refresh() -> int:
+    db = SessionLocal()
+    try:
+        return refresh_sales_rollups(db)
+    finally:
+        db.close()
+
+
+def _row(client, headers, group_by: str, key_id: int):
+    today = datetime.now(timezone.utc).date().isoformat()
+    r = client.get(
+        "/admin/reports/sales",
+        params={"from": today, "to": today, "group_by": group_by, "limit": 1000},
+        headers=headers,
+    )
+    assert r.status_code == 200, r.text
+    return next((row for row in r.json()["rows"] if row["id"] == key_id), None)
+
+
+def test_sales_rollup_is_incremental_and_drops_canceled_orders(client):
+    headers = {"Authorization": f"Bearer {_make_admin_token(client)}"}
+    s = uuid4().hex[:8]
+    brand_id = client.post("/admin/brands", json={"name": f"Rep {s}", "slug": f"rep-{s}"}, headers=headers).json()["id"]
+    prod_id = client.post(
+        "/admin/products",
+        json={
+            "sku": f"REP-{s}",
+            "name": f"Report {s}",
+            "slug": f"report-{s}",
+            "price_cents": 250,
+            "brand_id": brand_id,
+        },
+        headers=headers,
+    ).json()["id"]
+
+    order_ids = []
+    for qty in (2, 3):
+        r = client.post("/orders", json={"items": [{"product_id": prod_id, "quantity": qty}]}, headers=headers)
+        assert r.status_code == 201, r.text
+        order_ids.append(r.json()["id"])
+
+    assert _refresh() >= 1
+    row = _row(client, headers, "product", prod_id)
+    assert row == {"day": None, "id": prod_id, "name": f"Report {s}", "units": 5, "revenue_cents": 1250, "orders": 2}
+    assert _row(client, headers, "brand", brand_id)["revenue_cents"] == 1250
+
+    # отмена меняет updated_at — следующий прогон пересчитывает день без этого заказа
+    r = client.patch(f"/admin/orders/{order_ids[0]}", json={"status": "canceled"}, headers=headers)
+    assert r.status_code == 200, r.text
+    _refresh()
+    row = _row(client, headers, "product", prod_id)
+    assert (row["units"], row["revenue_cents"], row["orders"]) == (3, 750, 1)
+
+
+def test_sales_report_validates_range(client):
+    headers = {"Authorization": f"Bearer {_make_admin_token(client)}"}
+    r = client.get("/admin/reports/sales", params={"from": "2026-02-01", "to": "2026-01-01"}, headers=headers)
+    assert r.status_code == 400
+    r = client.get("/admin/reports/sales", params={"group_by": "day"}, headers=headers)
+    assert r.status_code == 200
+    assert r.json()["group_by"] == "day"
@@ -0,0 +1,83 @@
+from uuid import uuid4
+
+from app.api.services import warmer
+from app.core.cache import bump_catalog_generation, get_redis, product_detail_key
+from app.core.config import settings
+from tests.api.test_admin_media_inventory import _make_admin_token
+
+
+def test_popular_listing_is_rebuilt_after_generation_bump(client, max_queries, monkeypatch):
+    monkeypatch.setattr(settings, "warmer_enabled", True)
+    params = {"q": f"warm-{uuid4().hex[:8]}", "sort": "price_asc", "limit": 5}
+
+    # самый частый ключ — заведомо в топе
+    for _ in range(5):
+        client.get("/products", params=params)
+    warmer.flush_hits()
+    member = warmer.ListingParams(**params).dumps()
+    get_redis().zincrby(warmer.LISTING_HITS_KEY, 1_000_000, member)
+
+    bump_catalog_generation()
+    assert warmer.warm_listings() >= 1
+
+    # после прогрева первый же запрос нового поколения — попадание в кэш
+    with max_queries(0):
+        r = client.get("/products", params=params)
+    assert r.status_code == 200
+    assert r.json() == {"total": 0, "limit": 5, "offset": 0, "items": []}
+
+    # уже прогретое второй раз не строится
+    with max_queries(0):
+        warmer.warm_listings()
+    get_redis().zrem(warmer.LISTING_HITS_KEY, member)
+
+
+def test_popular_product_card_is_rebuilt_after_edit(client, monkeypatch, drain_outbox):
+    monkeypatch.setattr(settings, "warmer_enabled", True)
+    headers = {"Authorization": f"Bearer {_make_admin_token(client)}"}
+    s = uuid4().hex[:8]
+    prod_id = client.post(
+        "/admin/products",
+        json={"sku": f"WM-{s}", "name": f"Warm {s}", "slug": f"warm-{s}", "price_cents": 100},
+        headers=headers,
+    ).json()["id"]
+    monkeypatch.setattr(warmer, "schedule_listings_warm", lambda: None)
+    drain_outbox()
+
+    client.get(f"/products/{prod_id}")
+    warmer.flush_hits()
+    get_redis().zincrby(warmer.PRODUCT_HITS_KEY, 1_000_000, str(prod_id))
+
+    client.patch(f"/admin/products/{prod_id}", json={"price_cents": 300}, headers=headers)
+    drain_outbox()
+
+    cached = get_redis().get(product_detail_key(prod_id))
+    assert cached is not None and b'"price_cents":300' in cached
+    get_redis().zrem(warmer.PRODUCT_HITS_KEY, str(prod_id))
+
+
+def test_failed_listing_does_not_stop_warming(client, max_queries, monkeypatch):
+    monkeypatch.setattr(settings, "warmer_enabled", True)
+    s = uuid4().hex[:8]
+    good = warmer.ListingParams(q=f"warm-ok-{s}", limit=5)
+    bad = warmer.ListingParams(q=f"warm-bad-{s}", limit=5)
+    r = get_redis()
+    r.zadd(warmer.LISTING_HITS_KEY, {good.dumps(): 2_000_000, bad.dumps(): 2_000_000})
+
+    build_listing = warmer.build_listing
+
+    def flaky(db, params):
+        if params == bad:
+            raise RuntimeError("boom")
+        return build_listing(db, params)
+
+    monkeypatch.setattr(warmer, "build_listing", flaky)
+    bump_catalog_generation()
+    try:
+        assert warmer.warm_listings() >= 1
+        with max_queries(0):
+            assert client.get("/products", params={"q": good.q, "limit": 5}).status_code == 200
+        # затухание выполнилось, несмотря на ошибку
+        assert r.zscore(warmer.LISTING_HITS_KEY, bad.dumps()) == 1_000_000
+    finally:
+        r.zrem(warmer.LISTING_HITS_KEY, good.dumps(), bad.dumps())
@@ -1,12 +1,20 @@
+from contextlib import contextmanager
 from datetime import datetime
 
 import pytest
 from fastapi.testclient import TestClient
 
+from app.core import outbox, sqlstats
+from app.core.config import settings
 from app.db import SessionLocal
 from app.main import app
 from app.models.catalog import Brand, Category, Product
 
+# фоновый прогрев кэша после drain_outbox шёл бы параллельно с тестами и их бюджетами SQL
+settings.warmer_enabled = False
+# лимиты проверяются отдельно (test_ratelimit), остальным тестам они бы мешали
+settings.rate_limit_enabled = False
+
 
 @pytest.fixture()
 def client():
@@ -24,6 +32,33 @@ def db():
         session.close()
 
 
+@pytest.fixture()
+def max_queries():
+    """Бюджет SQL-запросов на блок: `with max_queries(2): client.get(...)`."""
+
+    @contextmanager
+    def _budget(limit: int):
+        with sqlstats.capture() as statements:
+            yield statements
+        assert len(statements) <= limit, f"{len(statements)} queries > {limit}:\n" + "\n\n".join(statements)
+
+    return _budget
+
+
+@pytest.fixture()
+def drain_outbox():
+    """Выполнить накопившиеся события outbox, как это сделал бы воркер."""
+
+    def _drain() -> int:
+        session = SessionLocal()
+        try:
+            return outbox.drain(session)
+        finally:
+            session.close()
+
+    return _drain
+
+
 def get_or_create(session, model, **kwargs):
     obj = session.query(model).filter_by(**kwargs).first()
     if obj: